@@ -1,12 +1,14 @@
 import os
 from datetime import datetime
-import requests
 import logging
 from dotenv import load_dotenv
 
+from ollama_pool import get_ollama_pool
 from opensearch_client import get_opensearch_client
-from patent_crew import run_patent_analysis, test_model, check_ollama_availability
-from patent_search_tools import hybrid_search, iterative_search, semantic_search, keyword_search
+from patent_search_tools import citation_graph_search, hit_snippet, hybrid_search, iterative_search, semantic_search, keyword_search
+
+# Characters of abstract shown per result; searches return only a fragment this long
+SNIPPET_CHARS = 150
 
 # Setup directories
 BASE_OUTPUT_DIR = "output"
@@ -47,11 +49,14 @@ def display_patent_results(results, show_score=True):
             print(f"   Score: {hit.get('_score', 'N/A')}")
         print(f"   Date: {source.get('publication_date', 'N/A')}")
         print(f"   Patent ID: {source.get('patent_id', 'N/A')}")
-        print(f"   Abstract: {source.get('abstract', '')[:150]}...")
+        print(f"   Abstract: {hit_snippet(hit, SNIPPET_CHARS)}...")
         print("-" * 60)
 
 # Option 1: Run Patent Analysis
 def run_complete_analysis():
+    # CrewAI and LangChain take seconds to import, so only the analysis option loads them
+    from patent_crew import print_task_output, run_patent_analysis, test_model
+
     print("\nRunning comprehensive patent analysis...")
     research_area = input("Enter research area") or "Lithium Battery"
     model_name = input("Enter the Ollama model to use (default: llama2:latest): ") or "llama2:latest"
@@ -64,7 +69,7 @@ def run_complete_analysis():
         return
 
     try:
-        result = run_patent_analysis(research_area, model_name)
+        result = run_patent_analysis(research_area, model_name, on_task=print_task_output)
         if not isinstance(result, str):
             result = str(result)
 
@@ -96,11 +101,11 @@ def search_patents():
 
     try:
         if search_type == "1":
-            results = keyword_search(query)
+            results = keyword_search(query, highlight_chars=SNIPPET_CHARS)
         elif search_type == "2":
-            results = semantic_search(query)
+            results = semantic_search(query, highlight_chars=SNIPPET_CHARS)
         else:
-            results = hybrid_search(query)
+            results = hybrid_search(query, highlight_chars=SNIPPET_CHARS)
 
         display_patent_results(results)
 
@@ -117,6 +122,7 @@ def iterative_exploration():
         print("Query cannot be empty.")
         return
 
+    mode = input("Exploration mode (1: Query refinement, 2: Citation graph) [1]: ") or "1"
     steps = input("Number of exploration steps (default: 3): ")
     try:
         steps = int(steps) if steps else 3
@@ -124,8 +130,12 @@ def iterative_exploration():
         steps = 3
 
     try:
-        results = iterative_search(query, refinement_steps=steps)
-        display_patent_results(results, show_score=False)
+        if mode == "2":
+            results = citation_graph_search(query, max_hops=steps)
+            display_patent_results(results)
+        else:
+            results = iterative_search(query, refinement_steps=steps, highlight_chars=SNIPPET_CHARS)
+            display_patent_results(results, show_score=False)
     except Exception as e:
         logging.exception("Iterative search error")
         print(f"❌ Exploration error: {e}")
@@ -145,13 +155,16 @@ def check_system_status():
         print(f"❌ OpenSearch connection: Failed - {e}")
 
     try:
-        response = requests.get("http://localhost:11434/api/tags")
-        if response.status_code == 200:
-            models = response.json().get("models", [])
+        pool = get_ollama_pool()
+        models = pool.list_models()
+        if models:
             print("✅ Ollama connection: OK")
             print(f"   Models: {', '.join([m.get('name', 'unknown') for m in models])}")
         else:
-            print(f"❌ Ollama connection failed: {response.status_code}")
+            print("❌ Ollama connection failed: no models on any endpoint")
+        for endpoint in pool.stats():
+            state = "unhealthy" if endpoint["circuit_open"] else "healthy"
+            print(f"   - {endpoint['url']}: {state}, {endpoint['requests']} requests, {endpoint['failures']} failures")
     except Exception as e:
         logging.exception("Ollama status error")
         print(f"❌ Ollama connection: Failed - {e}")
@@ -171,7 +184,7 @@ def list_ollama_models():
     print("\nAVAILABLE OLLAMA MODELS")
     print("-" * 60)
     try:
-        models = check_ollama_availability()
+        models = [model.get("name") for model in get_ollama_pool().list_models() if model.get("name")]
         if models:
             for i, model in enumerate(models):
                 print(f"{i+1}. {model}")
@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+CHECKPOINT_DIR = "outputs/patent_analysis/checkpoints"
+HISTORY_DIR = "outputs/patent_analysis/history"
+# Runs whose full report text is kept; older runs keep only their patent ids
+HISTORY_MAX_REPORTS = 10
+
+# Display names of the sequential crew tasks, used for streaming and checkpoints.
+# Kept here rather than in patent_crew so the UI can show progress without importing CrewAI.
+TASK_NAMES = ["Research Plan", "Patent Retrieval", "Trend Analysis", "Innovation Forecast"]
+# Steps of a delta analysis, which updates the last report instead of running the crew
+DELTA_TASK_NAMES = ["New Patent Summaries", "Updated Report"]
+
+
+def slugify(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_") or "default"
+
+
+class AnalysisCheckpoint:
+    """
+    On-disk record of finished crew task outputs so a crashed analysis can resume.
+
+    Each completed task is written to its own JSON file as soon as it finishes;
+    a later run for the same research area and model picks up after the last one.
+    """
+
+    def __init__(self, research_area, model_name, base_dir=CHECKPOINT_DIR):
+        self.research_area = research_area
+        self.model_name = model_name
+        self.dir_path = os.path.join(base_dir, f"{slugify(research_area)}__{slugify(model_name)}")
+
+    def _task_path(self, index):
+        return os.path.join(self.dir_path, f"task_{index:02d}.json")
+
+    def save_task(self, index, name, output, patents=None, run_started=None):
+        """
+        Persist one finished task output atomically.
+
+        Args:
+            index (int): Zero-based position of the task in the crew.
+            name (str): Task name or description summary.
+            output (str): Raw task output.
+            patents (dict): Patents the agents were shown so far, as recorded in AnalysisHistory.
+            run_started (int): Epoch milliseconds when the run that produced the first task started.
+        """
+        os.makedirs(self.dir_path, exist_ok=True)
+        record = {
+            "index": index,
+            "name": name,
+            "output": output,
+            "patents": patents or {},
+            "run_started": run_started,
+            "research_area": self.research_area,
+            "model_name": self.model_name,
+            "completed_at": datetime.now().isoformat(),
+        }
+        tmp_path = self._task_path(index) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp_path, self._task_path(index))
+
+    def load_completed(self):
+        """
+        Load the contiguous run of completed tasks starting from the first one.
+
+        Returns:
+            list: Task records ordered by index.
+        """
+        completed = []
+        index = 0
+        while os.path.exists(self._task_path(index)):
+            with open(self._task_path(index), "r", encoding="utf-8") as f:
+                completed.append(json.load(f))
+            index += 1
+        return completed
+
+    def assemble_report(self):
+        """Join every checkpointed task output into a single report string."""
+        sections = []
+        for record in self.load_completed():
+            sections.append(f"## {record['name']}\n\n{record['output']}")
+        return "\n\n".join(sections)
+
+    def clear(self):
+        if os.path.exists(self.dir_path):
+            shutil.rmtree(self.dir_path)
+
+
+class AnalysisHistory:
+    """
+    Persistent record of the reports produced for a research area and the patents that fed them.
+
+    Every finished analysis stores its report, the patents the agents were
+    shown (id, title, date, assignees and the snippet they read) and a
+    watermark: the time the run started. A delta analysis then only looks at
+    patents indexed after the latest watermark and updates the latest report.
+    """
+
+    def __init__(self, research_area, model_name, base_dir=HISTORY_DIR):
+        self.research_area = research_area
+        self.model_name = model_name
+        self.path = os.path.join(base_dir, f"{slugify(research_area)}__{slugify(model_name)}.json")
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return {"research_area": self.research_area, "model_name": self.model_name, "runs": [], "patents": {}}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def latest(self):
+        """The most recent run with its report, or None before the first analysis."""
+        runs = [run for run in self.load()["runs"] if run.get("report")]
+        return runs[-1] if runs else None
+
+    def known_patent_ids(self):
+        return set(self.load()["patents"])
+
+    def record(self, report, patents, watermark, mode, summaries=None):
+        """
+        Append a finished run atomically.
+
+        Args:
+            report (str): Report the run produced.
+            patents (dict): patent id -> {title, publication_date, assignees, summary} for the patents it read.
+            watermark (int): Epoch milliseconds when the run started; later runs look at patents indexed after it.
+            mode (str): 'full' for a crew run, 'delta' for an update of the previous report.
+            summaries (list): Summaries of the new patents written during a delta run.
+        """
+        state = self.load()
+        state["patents"].update(patents)
+        state["runs"].append({
+            "mode": mode,
+            "completed_at": datetime.now().isoformat(),
+            "watermark": watermark,
+            "patent_ids": sorted(patents),
+            "summaries": summaries or [],
+            "report": report,
+        })
+        for run in state["runs"][:-HISTORY_MAX_REPORTS]:
+            run["report"] = None
+            run["summaries"] = []
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.path)
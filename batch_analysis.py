@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from analysis_checkpoint import slugify
+from llm_cache import get_llm_cache
+from opensearch_client import get_shared_opensearch_client
+from patent_crew import check_ollama_availability, run_patent_analysis, test_model, warm_up_model
+from tracing import enable_tracing, summarize, tracing_enabled
+
+BATCH_OUTPUT_DIR = "outputs/batch"
+
+
+def read_research_areas(path):
+    """
+    Read research areas from a text file, one per line; blank lines and '#' comments are skipped.
+
+    Args:
+        path (str): Path to the research area list.
+
+    Returns:
+        list: Research areas in file order.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def analyze_area(research_area, model_name, output_dir, delta=False):
+    """
+    Run one research area through the crew and write its report.
+
+    Args:
+        research_area (str): Research area to analyze.
+        model_name (str): Ollama model, already validated and warm.
+        output_dir (str): Directory for this model's reports.
+        delta (bool): Update the area's previous report with only the patents indexed since.
+
+    Returns:
+        dict: Summary record with per-stage timings and token usage.
+    """
+    stages = []
+    usage = {}
+    started = time.perf_counter()
+    last_mark = [started]
+
+    def record_stage(index, name, output):
+        now = time.perf_counter()
+        stages.append({"index": index, "name": name, "seconds": round(now - last_mark[0], 3), "chars": len(output)})
+        last_mark[0] = now
+
+    result = run_patent_analysis(
+        research_area,
+        model_name,
+        on_task=record_stage,
+        validate_model=False,
+        usage=usage,
+        delta=delta,
+    )
+    elapsed = time.perf_counter() - started
+
+    report_path = os.path.join(output_dir, f"{slugify(research_area)}.txt")
+    with open(report_path, "w", encoding="utf-8") as f:
+        f.write(str(result))
+
+    return {
+        "research_area": research_area,
+        "model": model_name,
+        "status": "failed" if str(result).startswith("Analysis failed") else "ok",
+        "report": report_path,
+        "seconds": round(elapsed, 3),
+        "stages": stages,
+        "token_usage": usage,
+    }
+
+
+def run_batch(research_areas, models, max_workers=2, output_root=BATCH_OUTPUT_DIR, delta=False):
+    """
+    Run every research area through every model, sharing one warm pipeline.
+
+    Each model is validated and loaded once, then its areas run with bounded
+    concurrency over the shared OpenSearch client pool and LLM cache. Models
+    are processed one after another so only one is resident at a time.
+
+    Args:
+        research_areas (list): Research areas to analyze.
+        models (list): Ollama models to use.
+        max_workers (int): Maximum number of areas analyzed concurrently per model.
+        output_root (str): Root directory for batch outputs.
+        delta (bool): Update each area's previous report instead of re-analyzing the whole corpus.
+
+    Returns:
+        dict: Machine-readable batch summary (also written to summary.json).
+    """
+    run_dir = os.path.join(output_root, datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(run_dir, exist_ok=True)
+
+    # Warm the shared client pool before the workers start
+    get_shared_opensearch_client(pool_maxsize=max(4, max_workers * 4))
+
+    available = check_ollama_availability()
+    summary = {"started_at": datetime.now().isoformat(), "max_workers": max_workers, "delta": delta, "runs": []}
+    batch_started = time.perf_counter()
+
+    for model_name in models:
+        model_dir = os.path.join(run_dir, slugify(model_name))
+        os.makedirs(model_dir, exist_ok=True)
+
+        if model_name not in available and f"{model_name}:latest" not in available:
+            print(f"⚠️ Model '{model_name}' is not listed by Ollama; it will be pulled if possible.")
+        if not test_model(model_name):
+            print(f"❌ Skipping model '{model_name}': validation failed.")
+            for research_area in research_areas:
+                summary["runs"].append({"research_area": research_area, "model": model_name, "status": "skipped"})
+            continue
+        warm_up_model(model_name)
+
+        print(f"\n🚀 Running {len(research_areas)} research areas on '{model_name}' ({max_workers} concurrent)")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(analyze_area, research_area, model_name, model_dir, delta): research_area
+                for research_area in research_areas
+            }
+            for future in as_completed(futures):
+                research_area = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {"research_area": research_area, "model": model_name, "status": "failed", "error": str(e)}
+                summary["runs"].append(record)
+                print(f"   {'✅' if record['status'] == 'ok' else '❌'} {research_area} ({record.get('seconds', 0)}s)")
+
+    summary["seconds"] = round(time.perf_counter() - batch_started, 3)
+    summary["llm_cache"] = get_llm_cache().stats()
+    if tracing_enabled():
+        summary["stage_latency"] = summarize()
+    summary_path = os.path.join(run_dir, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print(f"\n✅ Batch finished in {summary['seconds']}s; summary saved to {summary_path}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run patent analysis for many research areas headlessly.")
+    parser.add_argument("areas", nargs="*", help="Research areas to analyze")
+    parser.add_argument("--areas-file", help="Text file with one research area per line")
+    parser.add_argument("--models", nargs="+", default=["llama2:latest"], help="Ollama models to use")
+    parser.add_argument("--workers", type=int, default=2, help="Concurrent analyses per model")
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR, help="Root directory for reports")
+    parser.add_argument("--trace", action="store_true", help="Record stage spans and add p50/p95 latencies to the summary")
+    parser.add_argument("--delta", action="store_true", help="Only analyze patents indexed since each area's last report")
+    args = parser.parse_args()
+
+    if args.trace:
+        print(f"🔎 Tracing to {enable_tracing()}")
+
+    areas = list(args.areas)
+    if args.areas_file:
+        areas.extend(read_research_areas(args.areas_file))
+    if not areas:
+        parser.error("Provide research areas as arguments or via --areas-file.")
+
+    run_batch(areas, args.models, max_workers=args.workers, output_root=args.output_dir, delta=args.delta)
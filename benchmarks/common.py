@@ -0,0 +1,137 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Benchmarks must never touch the production index
+os.environ.setdefault("PATENT_INDEX", "patents_benchmark")
+
+BENCHMARK_OUTPUT_DIR = "outputs/benchmarks"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def latency_stats(samples_ms):
+    """
+    Summarize latency samples.
+
+    Args:
+        samples_ms (list): Latencies in milliseconds.
+
+    Returns:
+        dict: count, mean, p50, p95, p99, max and throughput.
+    """
+    values = sorted(samples_ms)
+    total = sum(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(total / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 3),
+        "p95_ms": round(percentile(values, 0.95), 3),
+        "p99_ms": round(percentile(values, 0.99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+        "qps": round(len(values) / (total / 1000), 2) if total else 0.0,
+    }
+
+
+def time_calls(func, inputs, warmup=3):
+    """Call func once per input (after a few warm-up calls) and return per-call latencies in ms."""
+    for item in inputs[:warmup]:
+        func(item)
+    samples = []
+    for item in inputs:
+        started = time.perf_counter()
+        func(item)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_metadata(params):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+    }
+
+
+def write_results(name, results, output=None):
+    """
+    Write benchmark results as JSON for run-to-run comparison.
+
+    Args:
+        name (str): Benchmark name, used for the default file name.
+        results (dict): Results payload.
+        output (str): Explicit output path.
+
+    Returns:
+        str: Path the results were written to.
+    """
+    if output is None:
+        os.makedirs(BENCHMARK_OUTPUT_DIR, exist_ok=True)
+        output = os.path.join(BENCHMARK_OUTPUT_DIR, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    else:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results written to {output}")
+    return output
+
+
+def setup_backend(backend, host="localhost", port=9200):
+    """
+    Install the search backend used by the project's search functions.
+
+    Args:
+        backend (str): 'inprocess' for the in-memory stand-in or 'opensearch' for a live cluster.
+        host (str): OpenSearch host for the live backend.
+        port (int): OpenSearch port for the live backend.
+
+    Returns:
+        The shared client.
+    """
+    from opensearch_client import get_shared_opensearch_client, register_shared_opensearch_client
+
+    if backend == "inprocess":
+        from inprocess_opensearch import InProcessOpenSearch
+
+        client = InProcessOpenSearch()
+        register_shared_opensearch_client(client)
+        return client
+    client = get_shared_opensearch_client(host, port)
+    if (host, port) != ("localhost", 9200):
+        register_shared_opensearch_client(client)
+    return client
+
+
+def point_embeddings_at(url):
+    """Send all Ollama requests to the given URL or list of URLs (e.g. stub servers)."""
+    from ollama_pool import set_ollama_pool
+
+    set_ollama_pool(url)
@@ -0,0 +1,45 @@
+import argparse
+import json
+
+
+def flatten(prefix, value, out):
+    if isinstance(value, dict):
+        for key, child in value.items():
+            flatten(f"{prefix}.{key}" if prefix else key, child, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(baseline_path, candidate_path, threshold=0.10):
+    """
+    Print the relative change of every numeric metric between two benchmark result files.
+
+    Args:
+        baseline_path (str): Earlier results JSON.
+        candidate_path (str): Newer results JSON.
+        threshold (float): Relative change flagged as significant.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+    baseline.pop("meta", None)
+    candidate.pop("meta", None)
+    old, new = flatten("", baseline, {}), flatten("", candidate, {})
+
+    print(f"{'Metric':<60}{'Baseline':>14}{'Candidate':>14}{'Change':>10}")
+    print("-" * 98)
+    for key in sorted(set(old) & set(new)):
+        change = (new[key] - old[key]) / old[key] if old[key] else 0.0
+        flag = " ⚠️" if abs(change) >= threshold else ""
+        print(f"{key:<60}{old[key]:>14.3f}{new[key]:>14.3f}{change:>+9.1%}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    compare(args.baseline, args.candidate, args.threshold)
@@ -0,0 +1,127 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import latency_stats, point_embeddings_at, run_metadata, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import generate_corpus, sample_queries
+
+DEFAULT_SETTINGS = [
+    "full:float32",
+    "512:float32",
+    "256:float32",
+    "256:fp16",
+    "256:int8",
+    "128:int8",
+]
+
+# OpenSearch HNSW sizing guide: 1.1 * (bytes per vector + 8 * M) per document
+HNSW_M = 16
+
+
+def parse_setting(setting):
+    dimension, precision = setting.split(":")
+    return (None if dimension == "full" else int(dimension)), precision
+
+
+def embed_all(texts, model):
+    from embeddings import get_embedding
+
+    return np.asarray([get_embedding(text, model=model) for text in texts], dtype=np.float32)
+
+
+def exact_top_k(corpus, queries, k):
+    """Brute-force cosine top-k, returning ids and per-query latencies in ms."""
+    corpus = corpus / np.maximum(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12)
+    neighbors = []
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        scores = corpus @ (query / max(np.linalg.norm(query), 1e-12))
+        top = np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+        neighbors.append(top[np.argsort(-scores[top])])
+        samples.append((time.perf_counter() - started) * 1000)
+    return neighbors, samples
+
+
+def recall_at_k(truth, found, k):
+    overlaps = [len(set(t[:k]) & set(f[:k])) / k for t, f in zip(truth, found)]
+    return round(float(np.mean(overlaps)), 4)
+
+
+def benchmark_setting(raw_corpus, raw_queries, truth, setting, top_ks):
+    from embedding_format import BYTES_PER_VALUE, shape_embedding
+
+    dimension, precision = parse_setting(setting)
+    corpus = np.asarray([shape_embedding(v, dimension, precision) for v in raw_corpus], dtype=np.float32)
+    queries = np.asarray([shape_embedding(v, dimension, precision) for v in raw_queries], dtype=np.float32)
+    stored_dimension = corpus.shape[1]
+    # Quantized values are scanned as float32 here, so latency reflects dimension only
+    found, samples = exact_top_k(corpus, queries, max(top_ks))
+
+    vector_bytes = stored_dimension * BYTES_PER_VALUE[precision]
+    docs = len(raw_corpus)
+    return {
+        "dimension": stored_dimension,
+        "precision": precision,
+        "vector_mb": round(docs * vector_bytes / 1024 ** 2, 3),
+        "hnsw_estimate_mb": round(1.1 * (vector_bytes + 8 * HNSW_M) * docs / 1024 ** 2, 3),
+        "recall": {str(k): recall_at_k(truth, found, k) for k in top_ks},
+        "latency": latency_stats(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recall@k against memory and latency for truncated and quantized embeddings.")
+    parser.add_argument("--docs", type=int, default=2000, help="Number of synthetic abstracts.")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries.")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[10, 20], help="k values for recall@k.")
+    parser.add_argument("--settings", nargs="+", default=DEFAULT_SETTINGS, help="dimension:precision pairs, e.g. 256:int8 or full:float32.")
+    parser.add_argument("--ollama-url", default=None, help="Embed with a real Ollama server instead of the stub (needed for meaningful Matryoshka recall).")
+    parser.add_argument("--model", default="nomic-embed-text:v1.5", help="Embedding model.")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", default=None, help="Results file (defaults to outputs/benchmarks/).")
+    args = parser.parse_args()
+
+    stub = None
+    if args.ollama_url:
+        point_embeddings_at(args.ollama_url)
+    else:
+        stub = StubOllamaServer().start()
+        point_embeddings_at(stub.url)
+        print("⚠️ Using stub hashed embeddings: latency and memory are representative, recall of truncation is not.")
+
+    try:
+        documents = generate_corpus(args.docs, seed=args.seed)
+        abstracts = [doc["abstract"] for doc in documents]
+        queries = sample_queries(args.queries, seed=args.seed)
+
+        print(f"🔢 Embedding {len(abstracts)} abstracts and {len(queries)} queries...")
+        raw_corpus = embed_all(abstracts, args.model)
+        raw_queries = embed_all(queries, args.model)
+        # Ground truth is exact search over the untouched full-precision vectors
+        truth, _ = exact_top_k(raw_corpus, raw_queries, max(args.top_k))
+
+        results = {}
+        for setting in args.settings:
+            results[setting] = benchmark_setting(raw_corpus, raw_queries, truth, setting, args.top_k)
+            row = results[setting]
+            recalls = " ".join(f"recall@{k}={value:.3f}" for k, value in row["recall"].items())
+            print(
+                f"   {setting:<14} {recalls} vectors={row['vector_mb']:.2f}MB "
+                f"hnsw≈{row['hnsw_estimate_mb']:.2f}MB p50={row['latency']['p50_ms']:.3f}ms"
+            )
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    write_results(
+        "embedding_formats",
+        {"benchmark": "embedding_formats", "meta": run_metadata(vars(args)), "settings": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import latency_stats, point_embeddings_at, run_metadata, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import generate_corpus, sample_queries
+
+MODEL = "nomic-embed-text:v1.5"
+
+
+def run_interactive(embed_one, queries, interval_ms, stop):
+    """Send one interactive query every interval until the bulk load finishes; returns latencies in ms."""
+    samples = []
+    for query in queries:
+        if stop.is_set():
+            break
+        started = time.perf_counter()
+        embed_one(query)
+        samples.append((time.perf_counter() - started) * 1000)
+        time.sleep(interval_ms / 1000)
+    return samples
+
+
+def unscheduled(texts, queries, args):
+    """The previous behaviour: every caller posts its own request straight to Ollama."""
+    from embeddings import get_embedding
+
+    stop = threading.Event()
+    result = {}
+
+    def bulk():
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.bulk_threads) as executor:
+            list(executor.map(lambda text: get_embedding(text, model=MODEL), texts))
+        result["bulk_seconds"] = time.perf_counter() - started
+        stop.set()
+
+    loader = threading.Thread(target=bulk)
+    loader.start()
+    samples = run_interactive(lambda query: get_embedding(query, model=MODEL), queries, args.interval_ms, stop)
+    loader.join()
+    return samples, result["bulk_seconds"], None
+
+
+def scheduled(texts, queries, args):
+    from embedding_scheduler import PRIORITY_BULK, PRIORITY_INTERACTIVE, EmbeddingScheduler
+
+    scheduler = EmbeddingScheduler(
+        max_in_flight=args.max_in_flight, bulk_max_in_flight=args.bulk_max_in_flight, max_batch_size=args.batch_size
+    )
+    stop = threading.Event()
+    result = {}
+
+    def bulk():
+        started = time.perf_counter()
+        scheduler.embed_many(texts, MODEL, priority=PRIORITY_BULK)
+        result["bulk_seconds"] = time.perf_counter() - started
+        stop.set()
+
+    loader = threading.Thread(target=bulk)
+    loader.start()
+    samples = run_interactive(
+        lambda query: scheduler.embed(query, MODEL, priority=PRIORITY_INTERACTIVE), queries, args.interval_ms, stop
+    )
+    loader.join()
+    return samples, result["bulk_seconds"], scheduler.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interactive embedding latency while a bulk ingestion load runs.")
+    parser.add_argument("--docs", type=int, default=2000, help="Abstracts embedded by the bulk load.")
+    parser.add_argument("--interval-ms", type=float, default=50.0, help="Pause between interactive queries.")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub per-request latency.")
+    parser.add_argument("--item-latency-ms", type=float, default=2.0, help="Stub latency per text in a request.")
+    parser.add_argument("--ollama-parallel", type=int, default=4, help="Requests the stub processes at once (OLLAMA_NUM_PARALLEL).")
+    parser.add_argument("--bulk-threads", type=int, default=16, help="Bulk client threads in the unscheduled baseline.")
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--bulk-max-in-flight", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    texts = [doc["abstract"] for doc in generate_corpus(args.docs, seed=args.seed)]
+    queries = sample_queries(10000, seed=args.seed)
+
+    results = {}
+    with StubOllamaServer(
+        latency_ms=args.latency_ms, item_latency_ms=args.item_latency_ms, max_parallel=args.ollama_parallel
+    ) as stub:
+        point_embeddings_at(stub.url)
+        for name, run in (("unscheduled", unscheduled), ("scheduled", scheduled)):
+            print(f"⏱ {name}: {len(texts)} bulk embeddings with interactive queries every {args.interval_ms:.0f}ms")
+            samples, bulk_seconds, scheduler_stats = run(texts, queries, args)
+            results[name] = {
+                "interactive_latency": latency_stats(samples),
+                "bulk_seconds": round(bulk_seconds, 3),
+                "bulk_per_second": round(len(texts) / bulk_seconds, 1),
+                "scheduler": scheduler_stats,
+            }
+            row = results[name]
+            print(
+                f"   interactive p50={row['interactive_latency']['p50_ms']:.1f}ms "
+                f"p95={row['interactive_latency']['p95_ms']:.1f}ms | bulk {row['bulk_per_second']:.0f} docs/s"
+            )
+
+    write_results(
+        "embedding_priority",
+        {"benchmark": "embedding_priority", "meta": run_metadata(vars(args)), "runs": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
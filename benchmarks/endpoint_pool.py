@@ -0,0 +1,120 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import latency_stats, run_metadata, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+
+EMBED_MODEL = "nomic-embed-text:v1.5"
+
+
+def run_load(pool, requests_total, concurrency, on_progress=None):
+    """Send embedding requests through the pool from several threads; returns latencies and error count."""
+    from embeddings import get_embedding
+
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+    done = [0]
+
+    def one(i):
+        started = time.perf_counter()
+        try:
+            get_embedding(f"solid state electrolyte sample {i}", model=EMBED_MODEL)
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                samples.append(elapsed)
+        except Exception:
+            with lock:
+                errors[0] += 1
+        with lock:
+            done[0] += 1
+            if on_progress:
+                on_progress(done[0])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(requests_total)))
+    return samples, errors[0], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exercise the Ollama endpoint pool against local stub servers: routing, failover and model affinity."
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latencies-ms", type=float, nargs="+", default=[5.0, 5.0, 20.0],
+                        help="Artificial latency of each stub endpoint.")
+    parser.add_argument("--cold-endpoints", type=int, default=1,
+                        help="How many of the last endpoints do not have the embedding model loaded.")
+    parser.add_argument("--kill-after", type=float, default=0.5,
+                        help="Stop the first endpoint after this fraction of requests (0 disables).")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from ollama_pool import OllamaPool, set_ollama_pool
+
+    stubs = []
+    for i, latency in enumerate(args.latencies_ms):
+        cold = i >= len(args.latencies_ms) - args.cold_endpoints
+        models = ("llama2:latest",) if cold else (EMBED_MODEL, "llama2:latest")
+        stubs.append(StubOllamaServer(latency_ms=latency, models=models).start())
+
+    try:
+        baseline_pool = set_ollama_pool([stubs[0].url])
+        print(f"⏱️ Single endpoint baseline ({args.requests} requests, concurrency {args.concurrency})...")
+        base_samples, base_errors, base_seconds = run_load(baseline_pool, args.requests, args.concurrency)
+        baseline = {
+            "seconds": round(base_seconds, 3),
+            "throughput_rps": round(len(base_samples) / base_seconds, 1),
+            "errors": base_errors,
+            "latency": latency_stats(base_samples),
+        }
+        print(f"   {baseline['throughput_rps']} req/s, p95={baseline['latency']['p95_ms']:.1f}ms")
+
+        for stub in stubs:
+            stub.requests_served = 0
+        pool = set_ollama_pool(OllamaPool([stub.url for stub in stubs], cooldown=60.0))
+        kill_at = int(args.requests * args.kill_after) if args.kill_after else None
+        killed = [False]
+
+        def maybe_kill(done):
+            if kill_at and done >= kill_at and not killed[0]:
+                killed[0] = True
+                stubs[0].stop()
+                print(f"   💥 stopped {stubs[0].url} after {done} requests")
+
+        print(f"⏱️ Pool of {len(stubs)} endpoints...")
+        samples, errors, seconds = run_load(pool, args.requests, args.concurrency, maybe_kill)
+        pooled = {
+            "seconds": round(seconds, 3),
+            "throughput_rps": round(len(samples) / seconds, 1),
+            "errors": errors,
+            "latency": latency_stats(samples),
+            "endpoints": [
+                dict(snapshot, latency_ms=latency, requests_served=stub.requests_served)
+                for snapshot, latency, stub in zip(pool.stats(), args.latencies_ms, stubs)
+            ],
+        }
+        print(f"   {pooled['throughput_rps']} req/s, p95={pooled['latency']['p95_ms']:.1f}ms, errors={errors}")
+        for endpoint in pooled["endpoints"]:
+            print(
+                f"   - {endpoint['url']} latency={endpoint['latency_ms']}ms served={endpoint['requests_served']} "
+                f"failures={endpoint['failures']} circuit_open={endpoint['circuit_open']}"
+            )
+    finally:
+        # Stopping an already stopped stub is a no-op
+        for stub in stubs:
+            stub.stop()
+
+    write_results(
+        "endpoint_pool",
+        {"benchmark": "endpoint_pool", "meta": run_metadata(vars(args)), "single_endpoint": baseline, "pool": pooled},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
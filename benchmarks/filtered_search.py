@@ -0,0 +1,120 @@
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+from benchmarks.common import latency_stats, point_embeddings_at, run_metadata, setup_backend, time_calls, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import ASSIGNEES, JURISDICTIONS, sample_queries, write_corpus
+
+# Synthetic publication dates span ten years from 2015-01-01
+CORPUS_START = date(2015, 1, 1)
+CORPUS_DAYS = 365 * 10
+DATE_FRACTIONS = [0.01, 0.05, 0.2, 0.5, 1.0]
+
+
+def filter_cases():
+    """Named filter sets covering a range of selectivities."""
+    cases = {}
+    for fraction in DATE_FRACTIONS:
+        start = CORPUS_START + timedelta(days=int(CORPUS_DAYS * (1 - fraction)))
+        cases[f"date_{int(fraction * 100)}pct"] = {"start_date": start.isoformat()}
+    cases["jurisdiction"] = {"jurisdiction": JURISDICTIONS[0]}
+    cases["assignee"] = {"assignee": ASSIGNEES[0]}
+    cases["assignee_jurisdiction_date"] = {
+        "assignee": ASSIGNEES[0],
+        "jurisdiction": JURISDICTIONS[0],
+        "start_date": (CORPUS_START + timedelta(days=CORPUS_DAYS // 2)).isoformat(),
+    }
+    return cases
+
+
+def post_filter_search(client, index_name, query_text, top_k, filters):
+    """The previous approach: k-NN without a filter, then drop non-matching hits."""
+    from embedding_format import get_index_embedding
+
+    body = {
+        "size": top_k,
+        "query": {
+            "bool": {
+                "must": [{"knn": {"embedding": {"vector": get_index_embedding(query_text), "k": top_k}}}],
+                "filter": filters,
+            }
+        },
+        "_source": ["patent_id"],
+    }
+    return client.search(index=index_name, body=body)["hits"]["hits"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark filtered k-NN latency and result counts at several filter selectivities.")
+    parser.add_argument("--backend", choices=["inprocess", "opensearch"], default="inprocess")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+    from patent_search_tools import build_filters, semantic_search
+
+    with StubOllamaServer() as stub:
+        point_embeddings_at(stub.url)
+        client = setup_backend(args.backend, args.host, args.port)
+        index_name = PATENT_INDEX
+
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.docs, seed=args.seed)
+            create_index_if_not_exists(client, index_name)
+            index_patent_data(client, index_name, load_patent_data(corpus_dir))
+            client.indices.refresh(index=index_name)
+        total = client.count(index=index_name)["count"]
+        queries = sample_queries(args.queries)
+
+        results = {}
+        for name, case in filter_cases().items():
+            filters = build_filters(**case)
+            matching = client.count(index=index_name, body={"query": {"bool": {"filter": filters}}})["count"]
+
+            returned = []
+            def filtered(query):
+                returned.append(len(semantic_search(query, top_k=args.top_k, **case)))
+            filtered_samples = time_calls(filtered, queries)
+
+            post_returned = []
+            def post_filtered(query):
+                post_returned.append(len(post_filter_search(client, index_name, query, args.top_k, filters)))
+            post_samples = time_calls(post_filtered, queries)
+
+            results[name] = {
+                "filters": case,
+                "matching_docs": matching,
+                "selectivity": round(matching / total, 4) if total else 0.0,
+                "efficient_filter": {
+                    "latency": latency_stats(filtered_samples),
+                    "mean_hits": round(sum(returned[-len(queries):]) / len(queries), 2),
+                },
+                "post_filter": {
+                    "latency": latency_stats(post_samples),
+                    "mean_hits": round(sum(post_returned[-len(queries):]) / len(queries), 2),
+                },
+            }
+            row = results[name]
+            print(
+                f"   {name:<28} selectivity={row['selectivity']:.3f} "
+                f"filtered p50={row['efficient_filter']['latency']['p50_ms']:.2f}ms hits={row['efficient_filter']['mean_hits']:.1f} | "
+                f"post-filter p50={row['post_filter']['latency']['p50_ms']:.2f}ms hits={row['post_filter']['mean_hits']:.1f}"
+            )
+
+    write_results(
+        "filtered_search",
+        {"benchmark": "filtered_search", "meta": run_metadata(vars(args)), "total_docs": total, "cases": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import os
+import re
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+# Set before fulltext is imported: every run starts from an empty PDF and text cache under this directory
+os.environ.setdefault("PATENT_FULLTEXT_DIR", os.path.join(tempfile.gettempdir(), "patent_fulltext_benchmark"))
+
+from benchmarks.common import point_embeddings_at, run_metadata, setup_backend, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.stub_pdf_server import StubPdfServer
+from benchmarks.synthetic_corpus import generate_corpus, write_corpus
+from benchmarks.synthetic_pdfs import build_pdf, patent_full_text
+
+WORD = re.compile(r"\w+")
+
+
+def serve_pdfs(stub, patents, payloads, paragraphs):
+    """Serve a PDF per patent from the stub server and point the patents' pdf links at it."""
+    paragraphs_by_id = {}
+    for patent in patents:
+        payload = payloads[patent["patent_id"]]
+        paragraphs_by_id[patent["patent_id"]] = patent_full_text(payload, paragraphs)
+        patent["pdf"] = stub.add(f"/pdf/{payload['publication_number']}.pdf", build_pdf(paragraphs_by_id[patent["patent_id"]]))
+    return paragraphs_by_id
+
+
+def word_recall(expected_paragraphs, text):
+    """Share of the PDF's words that the extracted text contains, in order-insensitive bag-of-words terms."""
+    expected = WORD.findall(" ".join(expected_paragraphs).lower())
+    found = set(WORD.findall(text.lower()))
+    return sum(word in found for word in expected) / max(len(expected), 1)
+
+
+def passage_queries(paragraphs_by_id, count):
+    """One query per patent for the experimental detail only its PDF states (see patent_full_text)."""
+    queries = []
+    for patent_id, paragraphs in list(paragraphs_by_id.items())[:count]:
+        detail = next(paragraph for paragraph in paragraphs if paragraph.startswith("In a preferred example"))
+        queries.append((patent_id, detail.replace("In a preferred example the ", "").rstrip(".")))
+    return queries
+
+
+def run(client, concurrency, workers, **options):
+    from fulltext import extract_full_text
+
+    with redirect_stdout(StringIO()):
+        return extract_full_text(client, concurrency=concurrency, workers=workers, **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF download, text extraction and passage indexing throughput.")
+    parser.add_argument("--docs", type=int, default=300)
+    parser.add_argument("--paragraphs", type=int, default=40, help="Description paragraphs per PDF (about 100 tokens each).")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Delay of the stub PDF host per request.")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--backend", choices=["inprocess", "opensearch"], default="inprocess")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from fulltext import FULLTEXT_DIR, cache_paths
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+    from patent_search_tools import fulltext_search, hybrid_search
+
+    results = {"runs": [], "checks": {}}
+    with StubOllamaServer() as ollama, StubPdfServer(latency_ms=args.latency_ms) as pdf_host:
+        point_embeddings_at(ollama.url)
+        client = setup_backend(args.backend, args.host, args.port)
+        payloads = {payload["search_parameters"]["patent_id"]: payload for payload in generate_corpus(args.docs, seed=args.seed)}
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.docs, seed=args.seed)
+            patents = load_patent_data(corpus_dir)
+        paragraphs_by_id = serve_pdfs(pdf_host, patents, payloads, args.paragraphs)
+        create_index_if_not_exists(client, PATENT_INDEX)
+        index_patent_data(client, PATENT_INDEX, patents)
+        client.indices.refresh(index=PATENT_INDEX)
+        pdf_mb = sum(len(body) for body in pdf_host.documents.values()) / 2 ** 20
+
+        # Throughput by download concurrency and extraction processes, each from a cold cache
+        for workers in args.workers:
+            for concurrency in args.concurrency:
+                shutil.rmtree(FULLTEXT_DIR, ignore_errors=True)
+                stats = run(client, concurrency, workers, rebuild=True)
+                row = {
+                    "concurrency": concurrency,
+                    "workers": workers,
+                    "seconds": stats["seconds"],
+                    "patents_per_second": round(stats["indexed"] / max(stats["seconds"], 1e-9), 1),
+                    "download_mb_per_second": round(stats["download_bytes"] / 2 ** 20 / max(stats["seconds"], 1e-9), 2),
+                    "indexed": stats["indexed"],
+                    "failed": stats["failed"],
+                    "passages": stats["chunks"],
+                    "busy_seconds": stats["busy_seconds"],
+                }
+                results["runs"].append(row)
+                print(f"   concurrency={concurrency:<3} workers={workers:<2} {row['patents_per_second']:>7} patents/s  "
+                      f"{row['download_mb_per_second']:>6} MiB/s  busy {row['busy_seconds']}")
+
+        # An interrupted run resumes from the checkpoint without redoing finished patents
+        best = max(results["runs"], key=lambda row: row["patents_per_second"])
+        shutil.rmtree(FULLTEXT_DIR, ignore_errors=True)
+        first = run(client, best["concurrency"], best["workers"], rebuild=True, limit=args.docs // 2)
+        served = pdf_host.requests_served
+        resumed = run(client, best["concurrency"], best["workers"])
+        results["checks"]["resume"] = {
+            "first_run_indexed": first["indexed"],
+            "second_run_skipped": resumed["skipped"],
+            "second_run_indexed": resumed["indexed"],
+            "second_run_downloads": pdf_host.requests_served - served,
+        }
+
+        # Rebuilding re-embeds from the cache without touching the network or re-extracting
+        served = pdf_host.requests_served
+        rebuilt = run(client, best["concurrency"], best["workers"], rebuild=True)
+        results["checks"]["cached_rebuild"] = {
+            "indexed": rebuilt["indexed"],
+            "downloads": pdf_host.requests_served - served,
+            "texts_from_cache": rebuilt["text_cached"],
+            "seconds": rebuilt["seconds"],
+        }
+
+        # A host that answers 503 once per PDF still yields every document after retries
+        shutil.rmtree(FULLTEXT_DIR, ignore_errors=True)
+        pdf_host.failures_per_path = 1
+        pdf_host.reset_attempts()
+        served = pdf_host.requests_served
+        retried = run(client, best["concurrency"], best["workers"], rebuild=True)
+        pdf_host.failures_per_path = 0
+        results["checks"]["retries"] = {
+            "indexed": retried["indexed"],
+            "failed": retried["failed"],
+            "requests": pdf_host.requests_served - served,
+            "seconds": retried["seconds"],
+        }
+
+        recalls = []
+        for patent in patents:
+            with open(cache_paths(patent["pdf"])[1], encoding="utf-8") as f:
+                recalls.append(word_recall(paragraphs_by_id[patent["patent_id"]], f.read()))
+
+        # Description sentences are only findable through the full text
+        queries = passage_queries(paragraphs_by_id, args.queries)
+        fulltext_found = sum(
+            patent_id in {hit["_source"]["patent_id"] for hit in fulltext_search(query, args.top_k)} for patent_id, query in queries
+        )
+        abstract_found = sum(
+            patent_id in {hit["_id"] for hit in hybrid_search(query, args.top_k)} for patent_id, query in queries
+        )
+
+    results["corpus"] = {"patents": len(patents), "pdf_mb": round(pdf_mb, 2), "latency_ms": args.latency_ms}
+    results["checks"]["extraction_word_recall"] = round(sum(recalls) / max(len(recalls), 1), 4)
+    results["checks"]["description_queries"] = {
+        "queries": len(queries),
+        "found_by_fulltext_search": round(fulltext_found / max(len(queries), 1), 4),
+        "found_by_abstract_search": round(abstract_found / max(len(queries), 1), 4),
+    }
+    print(f"   resume: {results['checks']['resume']}")
+    print(f"   cached rebuild: {results['checks']['cached_rebuild']}")
+    print(f"   retries: {results['checks']['retries']}")
+    print(f"   extraction word recall={results['checks']['extraction_word_recall']}  "
+          f"description queries found: full text={results['checks']['description_queries']['found_by_fulltext_search']} "
+          f"abstracts={results['checks']['description_queries']['found_by_abstract_search']}")
+
+    write_results(
+        "fulltext",
+        {"benchmark": "fulltext", "meta": run_metadata(vars(args)), "results": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import latency_stats, point_embeddings_at, run_metadata, setup_backend, time_calls, write_results
+from benchmarks.snapshot import overlap
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import sample_queries, write_corpus
+from benchmarks.topic_clusters import true_topic
+
+
+def ingest_by_area(client, index_name, patents):
+    """Index the corpus with each patent's synthetic topic as its research area."""
+    from ingestion import index_patent_data
+
+    by_area = {}
+    for patent in patents:
+        by_area.setdefault(true_topic(patent.get("title")) or "general", []).append(patent)
+    for area, group in sorted(by_area.items()):
+        index_patent_data(client, index_name, group, research_area=area)
+    return sorted(by_area)
+
+
+def shard_layout(client, index_name):
+    settings = client.indices.get_settings(index=index_name, flat_settings=True)
+    return {
+        "indices": len(settings),
+        "primary_shards": sum(int(entry["settings"].get("index.number_of_shards", 1)) for entry in settings.values()),
+    }
+
+
+def run_layout(args):
+    """Measure one layout; runs in its own interpreter because the layout is read at import."""
+    from ingestion import load_patent_data
+    from index_layout import INDEX_LAYOUT
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+    from patent_search_tools import keyword_search, semantic_search
+    from semantic_cache import SemanticQueryCache, set_semantic_cache
+
+    # Every query must reach the index, or the layouts would only be compared on cache lookups
+    set_semantic_cache(SemanticQueryCache(capacity=0))
+    queries = sample_queries(args.queries, seed=args.seed)
+    results = {"layout": INDEX_LAYOUT, "sizes": {}}
+    with StubOllamaServer() as stub:
+        point_embeddings_at(stub.url)
+        client = setup_backend(args.backend, args.host, args.port)
+        for size in args.sizes:
+            with tempfile.TemporaryDirectory() as corpus_dir:
+                write_corpus(corpus_dir, size, seed=args.seed)
+                create_index_if_not_exists(client, PATENT_INDEX)
+                areas = ingest_by_area(client, PATENT_INDEX, load_patent_data(corpus_dir))
+            client.indices.refresh(index=PATENT_INDEX)
+            # Each query is scoped to the area of its topic, like a crew run on that area
+            cases = [(query, true_topic(query.title())) for query in queries]
+
+            ids = {"keyword": [], "semantic": []}
+            def scoped(search, mode):
+                def call(case):
+                    query, area = case
+                    ids[mode].append([hit["_id"] for hit in search(query, top_k=args.top_k, research_area=area)])
+                return call
+            keyword_samples = time_calls(scoped(keyword_search, "keyword"), cases)
+            semantic_samples = time_calls(scoped(semantic_search, "semantic"), cases)
+            unscoped_samples = time_calls(lambda query: keyword_search(query, top_k=args.top_k), queries)
+
+            results["sizes"][str(size)] = {
+                **shard_layout(client, PATENT_INDEX),
+                "documents": client.count(index=PATENT_INDEX)["count"],
+                "areas": len(areas),
+                "area_keyword": latency_stats(keyword_samples),
+                "area_semantic": latency_stats(semantic_samples),
+                "all_areas_keyword": latency_stats(unscoped_samples),
+                # Warm-up calls are recorded too; keep the timed pass only
+                "top_ids": {mode: calls[-len(cases):] for mode, calls in ids.items()},
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark area-scoped search latency against corpus size for each index layout.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 20000])
+    parser.add_argument("--layouts", nargs="+", default=["single", "routed", "per-area"])
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--backend", choices=["inprocess", "opensearch"], default="inprocess")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--worker-output", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_output:
+        with open(args.worker_output, "w", encoding="utf-8") as f:
+            json.dump(run_layout(args), f)
+        return
+
+    worker_args = [
+        "--sizes", *map(str, args.sizes), "--queries", str(args.queries), "--top-k", str(args.top_k),
+        "--backend", args.backend, "--host", args.host, "--port", str(args.port), "--seed", str(args.seed),
+    ]
+    layouts = {}
+    top_ids = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for layout in args.layouts:
+            print(f"📐 Layout: {layout}")
+            output = os.path.join(work_dir, f"{layout}.json")
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.index_layout", *worker_args, "--worker-output", output],
+                check=True, env={**os.environ, "PATENT_INDEX_LAYOUT": layout},
+            )
+            with open(output, encoding="utf-8") as f:
+                layouts[layout] = json.load(f)["sizes"]
+            top_ids[layout] = {size: stats.pop("top_ids") for size, stats in layouts[layout].items()}
+
+    # Scoped results should not depend on how the index is laid out
+    if "single" in top_ids:
+        for layout, sizes in layouts.items():
+            if layout == "single":
+                continue
+            for size, stats in sizes.items():
+                stats["overlap_with_single"] = {
+                    mode: overlap(top_ids["single"][size][mode], ids) for mode, ids in top_ids[layout][size].items()
+                }
+
+    print(f"   {'layout':<9} {'docs':>7} {'shards':>6} {'area kw p50':>12} {'area sem p50':>13} {'all kw p50':>11}  overlap")
+    for layout, sizes in layouts.items():
+        for size, stats in sizes.items():
+            print(f"   {layout:<9} {stats['documents']:>7} {stats['primary_shards']:>6} "
+                  f"{stats['area_keyword']['p50_ms']:>10.2f}ms {stats['area_semantic']['p50_ms']:>11.2f}ms "
+                  f"{stats['all_areas_keyword']['p50_ms']:>9.2f}ms  {stats.get('overlap_with_single', '-')}")
+
+    write_results(
+        "index_layout",
+        {"benchmark": "index_layout", "meta": run_metadata(vars(args)), "layouts": layouts},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
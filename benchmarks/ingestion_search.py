@@ -0,0 +1,107 @@
+import argparse
+import tempfile
+import time
+
+from benchmarks.common import (
+    latency_stats,
+    peak_rss_mb,
+    point_embeddings_at,
+    run_metadata,
+    setup_backend,
+    time_calls,
+    write_results,
+)
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import sample_queries, write_corpus
+
+
+def benchmark_ingestion(client, index_name, corpus_dir):
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import create_index_if_not_exists
+
+    create_index_if_not_exists(client, index_name)
+    rss_before = peak_rss_mb()
+
+    started = time.perf_counter()
+    patent_data = load_patent_data(corpus_dir)
+    loaded = time.perf_counter()
+    index_patent_data(client, index_name, patent_data)
+    client.indices.refresh(index=index_name)
+    finished = time.perf_counter()
+
+    docs = len(patent_data)
+    return {
+        "docs": docs,
+        "load_embed_seconds": round(loaded - started, 3),
+        "index_seconds": round(finished - loaded, 3),
+        "total_seconds": round(finished - started, 3),
+        "docs_per_second": round(docs / (finished - started), 2) if docs else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def benchmark_search(queries, top_ks, refinement_steps=3):
+    from patent_search_tools import hybrid_search, iterative_search, keyword_search, semantic_search
+
+    modes = {
+        "keyword": lambda q, k: keyword_search(q, top_k=k),
+        "semantic": lambda q, k: semantic_search(q, top_k=k),
+        "hybrid": lambda q, k: hybrid_search(q, top_k=k),
+        "iterative": lambda q, k: iterative_search(q, refinement_steps=refinement_steps, top_k=k),
+    }
+    results = {}
+    for mode, search in modes.items():
+        results[mode] = {}
+        for top_k in top_ks:
+            samples = time_calls(lambda q: search(q, top_k), queries)
+            results[mode][str(top_k)] = latency_stats(samples)
+            stats = results[mode][str(top_k)]
+            print(f"   {mode:<10} top_k={top_k:<4} p50={stats['p50_ms']:.2f}ms p95={stats['p95_ms']:.2f}ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion throughput and search latency.")
+    parser.add_argument("--docs", type=int, default=1000, help="Number of distinct synthetic patents")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=["inprocess", "opensearch"], default="inprocess")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--dimension", type=int, default=768, help="Stub embedding dimension")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Artificial stub embedding latency")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--output", help="Path of the JSON results file")
+    args = parser.parse_args()
+
+    from opensearch_client import PATENT_INDEX
+
+    with StubOllamaServer(dimension=args.dimension, latency_ms=args.embed_latency_ms) as stub, \
+            tempfile.TemporaryDirectory() as corpus_dir:
+        point_embeddings_at(stub.url)
+        files = write_corpus(corpus_dir, args.docs, seed=args.seed)
+        print(f"📄 Generated {files} synthetic patent files")
+
+        client = setup_backend(args.backend, args.host, args.port)
+        print(f"⏱️ Ingesting into '{PATENT_INDEX}' ({args.backend})...")
+        ingestion = benchmark_ingestion(client, PATENT_INDEX, corpus_dir)
+        print(f"   {ingestion['docs_per_second']} docs/sec, peak RSS {ingestion['peak_rss_mb']} MiB")
+
+        print("⏱️ Running search benchmarks...")
+        search = benchmark_search(sample_queries(args.queries), args.top_k)
+
+        if args.backend == "opensearch":
+            client.indices.delete(index=PATENT_INDEX)
+
+    results = {
+        "benchmark": "ingestion_search",
+        "meta": run_metadata(vars(args)),
+        "ingestion": ingestion,
+        "search": search,
+    }
+    write_results("ingestion_search", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
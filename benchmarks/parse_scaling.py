@@ -0,0 +1,68 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import run_metadata, write_results
+from benchmarks.synthetic_corpus import write_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parse/tokenize ingestion stage at several worker counts.")
+    parser.add_argument("--docs", type=int, default=5000, help="Number of synthetic patents (citation copies add more files).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per worker count; the best is reported.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    import ingestion
+
+    workers_list = [w for w in args.workers if w <= (os.cpu_count() or 1)] or [1]
+    results = {}
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        write_corpus(corpus_dir, args.docs, seed=args.seed)
+        files = len([f for f in os.listdir(corpus_dir) if f.endswith(".json")])
+        corpus_mb = sum(os.path.getsize(os.path.join(corpus_dir, f)) for f in os.listdir(corpus_dir)) / 1024 ** 2
+        print(f"📄 {files} files, {corpus_mb:.1f} MB, orjson={'yes' if ingestion.orjson else 'no'}")
+
+        baseline = None
+        reference = None
+        for workers in workers_list:
+            timings = []
+            for _ in range(args.repeats):
+                started = time.perf_counter()
+                records = ingestion.parse_patent_files(corpus_dir, workers=workers)
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            baseline = baseline or best
+            # Every worker count must produce exactly the same records in the same order
+            reference = reference or records
+            results[str(workers)] = {
+                "seconds": round(best, 3),
+                "files_per_second": round(files / best, 1),
+                "speedup": round(baseline / best, 2),
+                "identical_output": records == reference,
+            }
+            row = results[str(workers)]
+            print(
+                f"   workers={workers:<3} {row['seconds']:.3f}s {row['files_per_second']:.0f} files/s "
+                f"speedup={row['speedup']:.2f}x identical={row['identical_output']}"
+            )
+
+    write_results(
+        "parse_scaling",
+        {
+            "benchmark": "parse_scaling",
+            "meta": run_metadata(vars(args)),
+            "files": files,
+            "corpus_mb": round(corpus_mb, 2),
+            "orjson": ingestion.orjson is not None,
+            "workers": results,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
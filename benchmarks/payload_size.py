@@ -0,0 +1,92 @@
+import argparse
+import json
+import tempfile
+import time
+
+from benchmarks.common import latency_stats, point_embeddings_at, run_metadata, setup_backend, time_calls, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import sample_queries, write_corpus
+
+
+def decode_ms(payload, repeats=5):
+    """Best-of time to parse a serialized response, the client-side cost that grows with payload size."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        json.loads(payload)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best
+
+
+def measure(search, queries, top_k, highlight_chars):
+    payloads = []
+
+    def call(query):
+        payloads.append(json.dumps(search(query, top_k=top_k, highlight_chars=highlight_chars)))
+
+    samples = time_calls(call, queries)
+    measured = payloads[-len(queries):]
+    return {
+        "mean_payload_kb": round(sum(len(p) for p in measured) / len(measured) / 1024, 2),
+        "mean_decode_ms": round(sum(decode_ms(p) for p in measured) / len(measured), 3),
+        "latency": latency_stats(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response size, decode time and latency of full abstracts against highlight fragments.")
+    parser.add_argument("--backend", choices=["inprocess", "opensearch"], default="inprocess")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--highlight-chars", type=int, default=150)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+    from patent_search_tools import hybrid_search, keyword_search
+    from semantic_cache import SemanticQueryCache, set_semantic_cache
+
+    # Every call must reach the backend
+    set_semantic_cache(SemanticQueryCache(capacity=0))
+    results = {}
+    with StubOllamaServer() as stub:
+        point_embeddings_at(stub.url)
+        client = setup_backend(args.backend, args.host, args.port)
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.docs, seed=args.seed)
+            create_index_if_not_exists(client, PATENT_INDEX)
+            index_patent_data(client, PATENT_INDEX, load_patent_data(corpus_dir))
+            client.indices.refresh(index=PATENT_INDEX)
+        queries = sample_queries(args.queries)
+        if args.backend == "inprocess":
+            print("⚠️ The in-process backend highlights in Python; use --backend opensearch for representative latency.")
+
+        for mode, search in (("keyword", keyword_search), ("hybrid", hybrid_search)):
+            results[mode] = {}
+            for top_k in args.top_k:
+                full = measure(search, queries, top_k, None)
+                trimmed = measure(search, queries, top_k, args.highlight_chars)
+                results[mode][str(top_k)] = {"full_abstract": full, "highlight": trimmed}
+                print(
+                    f"   {mode:<8} top_k={top_k:<4} payload {full['mean_payload_kb']:.1f}KB -> {trimmed['mean_payload_kb']:.1f}KB, "
+                    f"decode {full['mean_decode_ms']:.2f}ms -> {trimmed['mean_decode_ms']:.2f}ms, "
+                    f"p50 {full['latency']['p50_ms']:.2f}ms -> {trimmed['latency']['p50_ms']:.2f}ms"
+                )
+
+        if args.backend == "opensearch":
+            client.indices.delete(index=PATENT_INDEX)
+
+    write_results(
+        "payload_size",
+        {"benchmark": "payload_size", "meta": run_metadata(vars(args)), "highlight_chars": args.highlight_chars, "modes": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
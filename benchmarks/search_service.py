@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from benchmarks.common import latency_stats, point_embeddings_at, run_metadata, setup_backend, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import sample_queries, write_corpus
+
+MODES = ["keyword", "semantic", "hybrid", "iterative", "date-range"]
+
+
+def start_service(coalesce, workers):
+    """Run the search service on its own event loop thread; returns (base url, stop callable)."""
+    from aiohttp import web
+
+    from search_service import create_app
+
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_app(workers=workers, coalesce=coalesce))
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    host, port = runner.addresses[0][:2]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    return f"http://{host}:{port}", stop
+
+
+def build_workload(requests_total, distinct_queries, skew, seed):
+    """Requests drawn from a skewed query distribution, so popular queries overlap in flight."""
+    rng = random.Random(seed)
+    queries = sample_queries(distinct_queries, seed=seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(len(queries))]
+    workload = []
+    for query in rng.choices(queries, weights=weights, k=requests_total):
+        mode = rng.choice(MODES)
+        params = {"q": query, "top_k": "20"}
+        if mode == "date-range":
+            params["start_date"] = "2020-01-01"
+        workload.append((mode, params))
+    return workload
+
+
+async def run_load(base_url, workload, concurrency):
+    import aiohttp
+
+    samples = defaultdict(list)
+    errors = [0]
+    pending = iter(workload)
+
+    async def worker(session):
+        for mode, params in pending:
+            started = time.perf_counter()
+            try:
+                async with session.get(f"{base_url}/search/{mode}", params=params) as response:
+                    await response.json()
+                    if response.status != 200:
+                        errors[0] += 1
+                        continue
+            except aiohttp.ClientError:
+                errors[0] += 1
+                continue
+            samples[mode].append((time.perf_counter() - started) * 1000)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        seconds = time.perf_counter() - started
+        async with session.get(f"{base_url}/health") as response:
+            health = await response.json()
+    return samples, errors[0], seconds, health["coalescing"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the HTTP search service against the in-process search backend.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--distinct-queries", type=int, default=200, help="Size of the query pool requests are drawn from.")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of query popularity (0 = uniform).")
+    parser.add_argument("--workers", type=int, default=16, help="Service search threads.")
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0, help="Stub embedding latency.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+
+    results = {}
+    with StubOllamaServer(latency_ms=args.embed_latency_ms) as stub:
+        point_embeddings_at(stub.url)
+        client = setup_backend("inprocess")
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.docs, seed=args.seed)
+            create_index_if_not_exists(client, PATENT_INDEX)
+            index_patent_data(client, PATENT_INDEX, load_patent_data(corpus_dir))
+            client.indices.refresh(index=PATENT_INDEX)
+
+        workload = build_workload(args.requests, args.distinct_queries, args.skew, args.seed)
+        for name, coalesce in (("no_coalescing", False), ("coalescing", True)):
+            base_url, stop = start_service(coalesce, args.workers)
+            try:
+                print(f"⏱️ {name}: {args.requests} requests, concurrency {args.concurrency}")
+                samples, errors, seconds, coalescing = asyncio.run(run_load(base_url, workload, args.concurrency))
+            finally:
+                stop()
+            all_samples = [sample for mode_samples in samples.values() for sample in mode_samples]
+            results[name] = {
+                "seconds": round(seconds, 3),
+                "requests_per_second": round(len(all_samples) / seconds, 1),
+                "errors": errors,
+                "searches_executed": coalescing["executed"],
+                "requests_coalesced": coalescing["coalesced"],
+                "latency": latency_stats(all_samples),
+                "latency_by_mode": {mode: latency_stats(mode_samples) for mode, mode_samples in sorted(samples.items())},
+            }
+            row = results[name]
+            print(
+                f"   {row['requests_per_second']} req/s p50={row['latency']['p50_ms']:.1f}ms "
+                f"p99={row['latency']['p99_ms']:.1f}ms executed={row['searches_executed']} "
+                f"coalesced={row['requests_coalesced']} errors={errors}"
+            )
+
+    write_results(
+        "search_service",
+        {"benchmark": "search_service", "meta": run_metadata(vars(args)), "runs": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
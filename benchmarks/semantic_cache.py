@@ -0,0 +1,128 @@
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks.common import latency_stats, point_embeddings_at, run_metadata, setup_backend, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import COMMON_WORDS, sample_queries, write_corpus
+
+DEFAULT_THRESHOLDS = [0.85, 0.9, 0.95, 0.98]
+
+
+def paraphrase(query, rng):
+    """Cheap stand-in for a reworded query: reorder, drop or add a word."""
+    words = query.split()
+    choice = rng.random()
+    if choice < 0.25:
+        return query
+    if choice < 0.5:
+        rng.shuffle(words)
+    elif choice < 0.75 and len(words) > 2:
+        words.pop(rng.randrange(len(words)))
+    else:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(COMMON_WORDS))
+    return " ".join(words)
+
+
+def build_workload(requests_total, distinct_queries, skew, seed):
+    rng = random.Random(seed)
+    queries = sample_queries(distinct_queries, seed=seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(len(queries))]
+    return [(rng.choice(["semantic", "hybrid"]), paraphrase(query, rng))
+            for query in rng.choices(queries, weights=weights, k=requests_total)]
+
+
+def run_workload(workload, top_k):
+    """Returns per-request latencies in ms and the returned patent ids."""
+    from patent_search_tools import hybrid_search, semantic_search
+
+    searches = {"semantic": semantic_search, "hybrid": hybrid_search}
+    samples = []
+    returned = []
+    for mode, query in workload:
+        started = time.perf_counter()
+        hits = searches[mode](query, top_k=top_k)
+        samples.append((time.perf_counter() - started) * 1000)
+        returned.append([hit["_id"] for hit in hits])
+    return samples, returned
+
+
+def overlap(truth, found, k):
+    if not truth:
+        return 1.0 if not found else 0.0
+    return len(set(truth[:k]) & set(found[:k])) / min(k, len(truth))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the semantic query cache: hit rate, latency and result agreement per threshold.")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct-queries", type=int, default=300)
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of query popularity.")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--capacity", type=int, default=512)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0, help="Stub embedding latency.")
+    parser.add_argument("--ollama-url", default=None, help="Embed with a real Ollama server (needed for realistic paraphrase similarity).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+    from semantic_cache import SemanticQueryCache, set_semantic_cache
+
+    stub = None
+    if args.ollama_url:
+        point_embeddings_at(args.ollama_url)
+    else:
+        stub = StubOllamaServer(latency_ms=args.embed_latency_ms).start()
+        point_embeddings_at(stub.url)
+        print("⚠️ Using stub hashed embeddings: reordered queries match exactly, reworded ones only by shared words.")
+
+    results = {}
+    try:
+        client = setup_backend("inprocess")
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.docs, seed=args.seed)
+            create_index_if_not_exists(client, PATENT_INDEX)
+            index_patent_data(client, PATENT_INDEX, load_patent_data(corpus_dir))
+            client.indices.refresh(index=PATENT_INDEX)
+
+        workload = build_workload(args.requests, args.distinct_queries, args.skew, args.seed)
+        set_semantic_cache(SemanticQueryCache(capacity=0))
+        base_samples, truth = run_workload(workload, args.top_k)
+        results["uncached"] = {"latency": latency_stats(base_samples)}
+        print(f"   uncached        p50={results['uncached']['latency']['p50_ms']:.2f}ms")
+
+        for threshold in args.thresholds:
+            cache = set_semantic_cache(SemanticQueryCache(capacity=args.capacity, threshold=threshold))
+            samples, returned = run_workload(workload, args.top_k)
+            agreement = sum(overlap(t, f, args.top_k) for t, f in zip(truth, returned)) / len(workload)
+            stats = cache.stats()
+            results[str(threshold)] = {
+                "latency": latency_stats(samples),
+                "cache": stats,
+                # Share of the uncached top-k that the (possibly cached) answer also returned
+                "result_agreement": round(agreement, 4),
+            }
+            row = results[str(threshold)]
+            print(
+                f"   threshold={threshold:<5} hit_rate={stats['hit_rate']:.3f} "
+                f"(exact {stats['exact_hits']}, semantic {stats['semantic_hits']}) "
+                f"agreement={row['result_agreement']:.3f} p50={row['latency']['p50_ms']:.2f}ms"
+            )
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    write_results(
+        "semantic_cache",
+        {"benchmark": "semantic_cache", "meta": run_metadata(vars(args)), "runs": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
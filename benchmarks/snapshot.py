@@ -0,0 +1,108 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.common import point_embeddings_at, run_metadata, setup_backend, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import sample_queries, write_corpus
+
+
+def top_ids(queries, top_k):
+    from patent_search_tools import keyword_search, semantic_search
+
+    return [
+        ([hit["_id"] for hit in keyword_search(query, top_k=top_k)],
+         [hit["_id"] for hit in semantic_search(query, top_k=top_k)])
+        for query in queries
+    ]
+
+
+def overlap(before, after):
+    """
+    Mean share of the top-k ids a search returns both before and after the round trip.
+
+    Documents are loaded in a different order, so hits tied at the cutoff can
+    swap and keep this slightly below 1.0 even when every score is unchanged.
+    """
+    shares = [len(set(b) & set(a)) / max(len(b), 1) for b, a in zip(before, after)]
+    return round(sum(shares) / max(len(shares), 1), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark snapshot export and import against re-ingesting the corpus.")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--precisions", nargs="+", default=["auto", "fp16"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--backend", choices=["inprocess", "opensearch"], default="inprocess")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+    from snapshot import export_snapshot, import_snapshot
+
+    queries = sample_queries(args.queries, seed=args.seed)
+    results = {"reingest": {}, "snapshots": {}}
+    stub = StubOllamaServer().start()
+    point_embeddings_at(stub.url)
+    try:
+        client = setup_backend(args.backend, args.host, args.port)
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.docs, seed=args.seed)
+            create_index_if_not_exists(client, PATENT_INDEX)
+            corpus_mb = sum(os.path.getsize(os.path.join(corpus_dir, name)) for name in os.listdir(corpus_dir)) / 2 ** 20
+            # Re-ingesting is the alternative to a snapshot: parse, embed and index every document again
+            started = time.perf_counter()
+            index_patent_data(client, PATENT_INDEX, load_patent_data(corpus_dir))
+            client.indices.refresh(index=PATENT_INDEX)
+            reingest_s = time.perf_counter() - started
+        results["reingest"] = {
+            "documents": args.docs,
+            "corpus_mb": round(corpus_mb, 1),
+            "seconds": round(reingest_s, 2),
+            "docs_per_second": round(args.docs / reingest_s, 1),
+        }
+        baseline = top_ids(queries, args.top_k)
+
+        with tempfile.TemporaryDirectory() as snapshot_dir:
+            for precision in args.precisions:
+                path = os.path.join(snapshot_dir, f"{precision}.zip")
+                manifest = export_snapshot(path, precision)
+                served = stub.requests_served
+                imported = import_snapshot(path, client, PATENT_INDEX, replace=True, workers=args.workers)
+                # Importing must not call the embedding model at all
+                embedding_requests = stub.requests_served - served
+                restored = top_ids(queries, args.top_k)
+                results["snapshots"][precision] = {
+                    "vector_dtype": manifest["vectors"]["dtype"],
+                    "file_mb": round(os.path.getsize(path) / 2 ** 20, 2),
+                    "export_seconds": manifest["seconds"],
+                    "import_seconds": imported["seconds"],
+                    "import_docs_per_second": round(imported["documents"] / max(imported["seconds"], 1e-9), 1),
+                    "import_embedding_requests": embedding_requests,
+                    "keyword_overlap": overlap([ids for ids, _ in baseline], [ids for ids, _ in restored]),
+                    "semantic_overlap": overlap([ids for _, ids in baseline], [ids for _, ids in restored]),
+                }
+    finally:
+        stub.stop()
+
+    print(f"   re-ingest: {results['reingest']['docs_per_second']} docs/s ({results['reingest']['seconds']}s)")
+    for precision, stats in results["snapshots"].items():
+        print(f"   {precision:<7} {stats['vector_dtype']:<7} {stats['file_mb']:>7} MiB  export {stats['export_seconds']}s  "
+              f"import {stats['import_docs_per_second']} docs/s  overlap kw={stats['keyword_overlap']} sem={stats['semantic_overlap']}")
+
+    write_results(
+        "snapshot",
+        {"benchmark": "snapshot", "meta": run_metadata(vars(args)), "results": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from benchmarks.common import run_metadata, write_results
+
+# Modules a user starts directly; none of them should pay for the agent stack up front
+ENTRY_POINTS = ["agentic_rag", "patent_analyzer_app", "search_export", "streamlit_app"]
+# Imported only when an agent feature is used, measured for reference
+REFERENCE_MODULES = ["patent_crew"]
+AGENT_PACKAGES = ("crewai", "langchain", "langchain_core", "langchain_ollama", "litellm")
+
+
+def parse_importtime(stderr):
+    """
+    Parse `python -X importtime` output.
+
+    Returns:
+        list: (module name, self µs, cumulative µs, nesting depth) per imported module.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure(module, repeats):
+    """Import a module in fresh interpreters and keep the fastest run."""
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True, env={**os.environ, "PYTHONPATH": os.getcwd()},
+        )
+        wall_ms = (time.perf_counter() - started) * 1000
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import failed"
+            return {"error": error}
+        rows = parse_importtime(completed.stderr)
+        import_ms = next((cumulative for name, _, cumulative, depth in rows if name == module and depth == 0), 0) / 1000
+        if best is None or import_ms < best["import_ms"]:
+            packages = defaultdict(int)
+            for name, self_us, _, _ in rows:
+                packages[name.split(".")[0]] += self_us
+            heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:10]
+            best = {
+                "import_ms": round(import_ms, 1),
+                "wall_ms": round(wall_ms, 1),
+                "modules_imported": len(rows),
+                "loads_agent_stack": any(package in packages for package in AGENT_PACKAGES),
+                "heaviest_packages_ms": {package: round(us / 1000, 1) for package, us in heaviest},
+            }
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the entry points with python -X importtime.")
+    parser.add_argument("--modules", nargs="+", default=ENTRY_POINTS, help="Entry-point modules held to the target.")
+    parser.add_argument("--target-ms", type=float, default=1000.0, help="Maximum cumulative import time per entry point.")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per module; the fastest is reported.")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = {}
+    failed = []
+    for module in args.modules + REFERENCE_MODULES:
+        row = measure(module, args.repeats)
+        results[module] = row
+        if "error" in row:
+            print(f"   {module:<22} ⚠️ skipped: {row['error']}")
+            continue
+        checked = module in args.modules
+        ok = not checked or (row["import_ms"] <= args.target_ms and not row["loads_agent_stack"])
+        if not ok:
+            failed.append(module)
+        row["within_target"] = ok if checked else None
+        heaviest = ", ".join(f"{package} {ms:.0f}ms" for package, ms in list(row["heaviest_packages_ms"].items())[:3])
+        marker = "✅" if ok else "❌"
+        print(
+            f"   {marker} {module:<22} import={row['import_ms']:.0f}ms wall={row['wall_ms']:.0f}ms "
+            f"agent_stack={'yes' if row['loads_agent_stack'] else 'no'} heaviest: {heaviest}"
+        )
+
+    write_results(
+        "startup_time",
+        {"benchmark": "startup_time", "meta": run_metadata(vars(args)), "target_ms": args.target_ms, "modules": results},
+        args.output,
+    )
+    if failed:
+        print(f"❌ Over the {args.target_ms:.0f}ms target or loading the agent stack: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
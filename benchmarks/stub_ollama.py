@@ -0,0 +1,143 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def hashed_embedding(text, dimension=768):
+    """
+    Deterministic bag-of-words embedding using the hashing trick.
+
+    Texts sharing vocabulary get similar vectors, which is enough for
+    semantic and hybrid search to return meaningful neighbours in benchmarks.
+
+    Args:
+        text (str): Text to embed.
+        dimension (int): Vector dimension.
+
+    Returns:
+        list: Unit-length embedding.
+    """
+    vector = np.zeros(dimension, dtype=np.float32)
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimension
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector.tolist()
+
+
+class StubOllamaServer:
+    """
+    Local HTTP server speaking the subset of the Ollama API used by this project.
+
+    Serves /api/embeddings, /api/embed, /api/tags and a canned /api/generate,
+    with an optional per-request delay (plus a per-input delay for batched
+    /api/embed calls) to mimic model latency. max_parallel caps concurrently
+    processed requests like OLLAMA_NUM_PARALLEL; the rest queue.
+    """
+
+    def __init__(self, dimension=768, latency_ms=0.0, models=("nomic-embed-text:v1.5", "llama2:latest"), port=0,
+                 item_latency_ms=0.0, max_parallel=None):
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.item_latency_ms = item_latency_ms
+        self._slots = threading.Semaphore(max_parallel) if max_parallel else None
+        self.models = list(models)
+        self.requests_served = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/tags":
+                    models = [{"name": name, "digest": hashlib.sha256(name.encode()).hexdigest()} for name in stub.models]
+                    self._reply(200, {"models": models})
+                elif self.path == "/api/ps":
+                    self._reply(200, {"models": [{"name": name} for name in stub.models]})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                stub.requests_served += 1
+                if stub._slots is not None:
+                    with stub._slots:
+                        self._handle(request)
+                else:
+                    self._handle(request)
+
+            def _handle(self, request):
+                inputs = request.get("input", "")
+                items = len(inputs) if isinstance(inputs, list) else 1
+                delay_ms = stub.latency_ms + (stub.item_latency_ms * items if self.path.startswith("/api/embed") else 0)
+                if delay_ms:
+                    time.sleep(delay_ms / 1000)
+
+                if self.path == "/api/embeddings":
+                    self._reply(200, {"embedding": hashed_embedding(request.get("prompt", ""), stub.dimension)})
+                elif self.path == "/api/embed":
+                    inputs = request.get("input", "")
+                    inputs = [inputs] if isinstance(inputs, str) else inputs
+                    embeddings = [hashed_embedding(text, stub.dimension) for text in inputs]
+                    self._reply(200, {"model": request.get("model"), "embeddings": embeddings})
+                elif self.path == "/api/generate":
+                    self._reply(200, {"model": request.get("model"), "response": "Hello!", "done": True})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    server = StubOllamaServer(port=11434).start()
+    print(f"Stub Ollama listening on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
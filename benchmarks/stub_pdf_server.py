@@ -0,0 +1,92 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubPdfServer:
+    """
+    Local HTTP server standing in for the patent PDF host.
+
+    Serves registered PDF bodies by path with an optional per-request delay
+    to mimic network latency, and can fail the first failures_per_path
+    requests of each path with a 503 to exercise download retries.
+    """
+
+    def __init__(self, latency_ms=0.0, failures_per_path=0, port=0):
+        self.latency_ms = latency_ms
+        self.failures_per_path = failures_per_path
+        self.documents = {}
+        self.requests_served = 0
+        self.bytes_served = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 128
+        # Clients drop the connection after an error status without reading the body; that is not a server error
+        self._server.handle_error = lambda request, client_address: None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add(self, path, body):
+        """Serve body at path (e.g. '/pdf/US123.pdf') and return its URL."""
+        self.documents[path] = body
+        return self.url + path
+
+    def reset_attempts(self):
+        """Forget earlier requests, so each path fails failures_per_path times again."""
+        with self._lock:
+            self._attempts.clear()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests_served += 1
+                    attempt = stub._attempts[self.path] = stub._attempts.get(self.path, 0) + 1
+                if stub.latency_ms:
+                    time.sleep(stub.latency_ms / 1000)
+                body = stub.documents.get(self.path)
+                if body is None:
+                    self._reply(404, b"not found", "text/plain")
+                elif attempt <= stub.failures_per_path:
+                    self._reply(503, b"busy", "text/plain")
+                else:
+                    with stub._lock:
+                        stub.bytes_served += len(body)
+                    self._reply(200, body, "application/pdf")
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,183 @@
+import json
+import os
+import random
+from datetime import date, timedelta
+
+TOPICS = {
+    "solid state electrolyte": ["sulfide", "garnet", "ceramic", "ionic", "conductivity", "interface", "dendrite", "separator"],
+    "silicon anode": ["silicon", "anode", "expansion", "binder", "graphite", "composite", "porous", "capacity"],
+    "cathode material": ["nickel", "cobalt", "manganese", "cathode", "layered", "coating", "doping", "olivine"],
+    "battery management": ["state", "charge", "estimation", "cell", "balancing", "thermal", "monitoring", "controller"],
+    "recycling process": ["recycling", "leaching", "recovery", "hydrometallurgical", "black", "mass", "lithium", "precipitation"],
+    "fast charging": ["charging", "current", "protocol", "plating", "temperature", "pulse", "rate", "fast"],
+    "electrolyte additive": ["additive", "carbonate", "salt", "film", "solvent", "fluorinated", "stability", "sei"],
+    "thermal runaway": ["runaway", "venting", "flame", "retardant", "propagation", "cooling", "safety", "module"],
+}
+# CPC codes per topic, so rollups see realistic sub-technologies (several topics share H01M10)
+TOPIC_CPC = {
+    "solid state electrolyte": [("H01M10/0562", "Solid materials for electrolytes")],
+    "silicon anode": [("H01M4/386", "Silicon or alloys based on silicon")],
+    "cathode material": [("H01M4/525", "Mixed oxides of nickel, cobalt or manganese")],
+    "battery management": [("H01M10/48", "Accumulators combined with arrangements for measuring"),
+                           ("G01R31/382", "Arrangements for monitoring battery or accumulator variables")],
+    "recycling process": [("H01M10/54", "Reclaiming serviceable parts of waste accumulators"),
+                          ("C22B7/007", "Wet processes for working-up secondary raw materials")],
+    "fast charging": [("H02J7/00712", "Regulation of charging or discharging current or voltage")],
+    "electrolyte additive": [("H01M10/0567", "Liquid electrolytes characterised by the additives")],
+    "thermal runaway": [("H01M10/658", "Means for temperature control structurally associated with the cells"),
+                        ("H01M50/383", "Flame arresting or ignition-preventing means")],
+}
+COMMON_WORDS = [
+    "method", "system", "device", "comprising", "layer", "battery", "lithium", "ion", "improved",
+    "performance", "wherein", "configured", "material", "structure", "electrode", "energy", "density",
+]
+ASSIGNEES = [
+    "Contemporary Amperex Technology", "LG Energy Solution", "Panasonic Holdings", "Samsung SDI",
+    "Toyota Motor", "QuantumScape", "BYD Company", "Tesla", "SK On", "Robert Bosch",
+]
+JURISDICTIONS = ["US", "EP", "CN", "JP", "KR", "WO"]
+
+
+def _patent_number(rng, jurisdiction):
+    return f"{jurisdiction}{rng.randint(1_000_000, 99_999_999)}{rng.choice(['A1', 'B1', 'B2'])}"
+
+
+def generate_patent(rng, index, start_date=date(2015, 1, 1), days=365 * 10):
+    """
+    Generate one patent record shaped like a SerpApi google_patents_details response.
+
+    Args:
+        rng (random.Random): Seeded random generator.
+        index (int): Sequence number of the patent, used for uniqueness.
+        start_date (date): Earliest publication date.
+        days (int): Span of publication dates in days.
+
+    Returns:
+        dict: Synthetic patent payload.
+    """
+    topic = rng.choice(list(TOPICS))
+    words = TOPICS[topic]
+    jurisdiction = rng.choice(JURISDICTIONS)
+    number = _patent_number(rng, jurisdiction)
+    publication_date = start_date + timedelta(days=rng.randrange(days))
+    sentence_count = rng.randint(3, 7)
+    sentences = []
+    for _ in range(sentence_count):
+        chosen = rng.sample(words, 4) + rng.sample(COMMON_WORDS, 6)
+        rng.shuffle(chosen)
+        sentences.append(" ".join(chosen).capitalize() + ".")
+    abstract = f"A {topic} {rng.choice(COMMON_WORDS)} is disclosed. " + " ".join(sentences)
+
+    return {
+        "search_metadata": {"id": f"synthetic-{index}", "status": "Success"},
+        "search_parameters": {"engine": "google_patents_details", "patent_id": f"patent/{number}/en"},
+        "title": f"{topic.title()} {rng.choice(COMMON_WORDS)} {rng.choice(words)} {index}",
+        "type": "patent",
+        "pdf": f"https://patentimages.storage.googleapis.com/synthetic/{number}.pdf",
+        "publication_number": number,
+        "country": jurisdiction,
+        "publication_date": publication_date.isoformat(),
+        "priority_date": (publication_date - timedelta(days=rng.randint(300, 900))).isoformat(),
+        "inventors": [{"name": f"Inventor {rng.randint(1, 500)}"} for _ in range(rng.randint(1, 4))],
+        "assignees": [rng.choice(ASSIGNEES)],
+        "classifications": [
+            {"code": code, "description": description, "is_cpc": True, "leaf": True, "first": position == 0}
+            for position, (code, description) in enumerate(TOPIC_CPC[topic])
+        ],
+        "abstract": abstract,
+        "claims": [f"{n + 1}. {sentence}" for n, sentence in enumerate(sentences)],
+        "patent_citations": {"original": []},
+        "cited_by": {"original": []},
+    }
+
+
+def _citation_stub(patent):
+    return {
+        "publication_number": patent["publication_number"],
+        "patent_id": patent["search_parameters"]["patent_id"],
+        "title": patent["title"],
+        "assignee_original": patent["assignees"][0],
+        "priority_date": patent["priority_date"],
+        "publication_date": patent["publication_date"],
+        "serpapi_link": (
+            "https://serpapi.com/search.json?engine=google_patents_details"
+            f"&patent_id={patent['search_parameters']['patent_id']}"
+        ),
+    }
+
+
+def generate_corpus(num_patents, seed=42, citations_per_patent=3):
+    """
+    Generate a list of synthetic patents with a citation graph between them.
+
+    Each patent cites a few earlier patents (by publication date), and the
+    cited patents list it under cited_by, mirroring the SerpApi payloads.
+
+    Args:
+        num_patents (int): Number of patents to generate.
+        seed (int): Random seed so corpora are reproducible.
+        citations_per_patent (int): Maximum backward citations per patent.
+
+    Returns:
+        list: Synthetic patent payloads.
+    """
+    rng = random.Random(seed)
+    patents = [generate_patent(rng, index) for index in range(num_patents)]
+    patents.sort(key=lambda patent: patent["publication_date"])
+    for position, patent in enumerate(patents[1:], start=1):
+        for cited in rng.sample(patents[:position], min(position, rng.randint(0, citations_per_patent))):
+            patent["patent_citations"]["original"].append(_citation_stub(cited))
+            cited["cited_by"]["original"].append(_citation_stub(patent))
+    return patents
+
+
+def write_corpus(dir_path, num_patents, seed=42, citation_copies=2):
+    """
+    Write a synthetic corpus to disk in the layout produced by information_collector.
+
+    Top-level results become patent_data_{i}.json and the details of up to
+    citation_copies cited patents are saved again as citation_{i}_{j}.json.
+
+    Args:
+        dir_path (str): Output directory.
+        num_patents (int): Number of distinct patents.
+        seed (int): Random seed.
+        citation_copies (int): Cited patent payloads to store per top-level patent.
+
+    Returns:
+        int: Number of JSON files written.
+    """
+    os.makedirs(dir_path, exist_ok=True)
+    patents = generate_corpus(num_patents, seed=seed)
+    by_id = {patent["search_parameters"]["patent_id"]: patent for patent in patents}
+    written = 0
+    for idx, patent in enumerate(patents):
+        with open(os.path.join(dir_path, f"patent_data_{idx}.json"), "w") as f:
+            json.dump(patent, f)
+        written += 1
+        for idx2, citation in enumerate(patent["patent_citations"]["original"][:citation_copies]):
+            with open(os.path.join(dir_path, f"citation_{idx}_{idx2}.json"), "w") as f:
+                json.dump(by_id[citation["patent_id"]], f)
+            written += 1
+    return written
+
+
+def sample_queries(count, seed=7):
+    """Build reproducible search queries from the synthetic topic vocabulary."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        topic = rng.choice(list(TOPICS))
+        queries.append(f"{topic} {' '.join(rng.sample(TOPICS[topic], 2))}")
+    return queries
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Write a synthetic SerpApi-shaped patent corpus.")
+    parser.add_argument("dir_path")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(f"Wrote {write_corpus(args.dir_path, args.docs, seed=args.seed)} files to '{args.dir_path}'")
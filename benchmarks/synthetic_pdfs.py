@@ -0,0 +1,120 @@
+import random
+import zlib
+
+from benchmarks.synthetic_corpus import COMMON_WORDS, TOPICS
+
+LINE_CHARS = 90
+LINES_PER_PAGE = 50
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(paragraph, width=LINE_CHARS):
+    lines, line = [], ""
+    for word in paragraph.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def build_pdf(paragraphs):
+    """
+    Minimal PDF with a text layer, shaped like a born-digital patent publication.
+
+    Each page has a Flate-compressed content stream that draws the lines
+    with Tj operators in the standard Helvetica font, which every PDF text
+    extractor can read back.
+
+    Args:
+        paragraphs (list): Paragraph texts; each is wrapped to lines and paragraphs flow across pages.
+
+    Returns:
+        bytes: PDF file contents.
+    """
+    lines = []
+    for paragraph in paragraphs:
+        lines.extend(_wrap(paragraph))
+        lines.append("")
+    pages = [lines[start:start + LINES_PER_PAGE] for start in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+    # 1: catalog, 2: page tree, 3: font, then a page and a content stream object per page
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>", 3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for number, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * number, 5 + 2 * number
+        kids.append(f"{page_id} 0 R")
+        operations = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        for line in page_lines:
+            operations.append(f"({_escape(line)}) Tj T*")
+        operations.append("ET")
+        stream = zlib.compress("\n".join(operations).encode("latin-1", "replace"))
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {content_id} 0 R >>"
+        ).encode("latin-1")
+        objects[content_id] = f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("latin-1") + stream + b"\nendstream"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode("latin-1")
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(output)
+        output += f"{object_id} 0 obj\n".encode("latin-1") + objects[object_id] + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for object_id in sorted(objects):
+        output += f"{offsets[object_id]:010d} 00000 n \n".encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    return bytes(output)
+
+
+def patent_full_text(patent, paragraphs=40, seed=0):
+    """
+    Description paragraphs for a synthetic patent, after its title, abstract and claims.
+
+    The description reuses the patent's topic vocabulary, so full-text
+    search has more to match than the abstract. One paragraph in the middle
+    states an experimental detail (a compound code and process conditions)
+    found nowhere else in the corpus, so a search for it can only succeed
+    through the full text.
+
+    Args:
+        patent (dict): Payload from synthetic_corpus.generate_patent.
+        paragraphs (int): Description paragraphs; about 100 tokens each.
+        seed (int): Random seed, combined with the patent number.
+
+    Returns:
+        list: Paragraph texts.
+    """
+    rng = random.Random(f"{seed}-{patent['publication_number']}")
+    topic = next((name for name in TOPICS if patent["title"].lower().startswith(name)), rng.choice(list(TOPICS)))
+    words = TOPICS[topic]
+    description = []
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(4, 7)):
+            chosen = rng.sample(words, 3) + rng.sample(COMMON_WORDS, 8)
+            rng.shuffle(chosen)
+            sentences.append(" ".join(chosen).capitalize() + ".")
+        description.append(" ".join(sentences))
+    compound = f"{''.join(rng.choice('BCDFGHJKLMNPQRSTVWXZ') for _ in range(3))}{rng.randint(100, 999)}"
+    description.insert(len(description) // 2, detail_sentence(compound, rng.choice(words), rng.randint(120, 950), rng.randint(2, 48)))
+    return [
+        patent["title"],
+        f"Abstract. {patent['abstract']}",
+        "Description.",
+        *description,
+        "Claims.",
+        *patent["claims"],
+    ]
+
+
+def detail_sentence(compound, word, temperature, hours):
+    return f"In a preferred example the {word} is treated with compound {compound} at {temperature} degrees for {hours} hours."
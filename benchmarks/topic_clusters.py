@@ -0,0 +1,121 @@
+import argparse
+import os
+import tempfile
+import time
+from collections import Counter
+
+from benchmarks.common import peak_rss_mb, point_embeddings_at, run_metadata, setup_backend, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import TOPICS, write_corpus
+
+_TOPIC_BY_TITLE = {topic.title(): topic for topic in TOPICS}
+
+
+def true_topic(title):
+    """The synthetic generator starts every title with its topic."""
+    return next((topic for prefix, topic in _TOPIC_BY_TITLE.items() if (title or "").startswith(prefix)), None)
+
+
+def purity(pairs):
+    """Share of patents whose cluster's majority topic is their own topic."""
+    by_cluster = {}
+    for cluster_id, topic in pairs:
+        by_cluster.setdefault(cluster_id, Counter())[topic] += 1
+    return sum(counts.most_common(1)[0][1] for counts in by_cluster.values()) / max(len(pairs), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline topic clustering: build time, memory, purity and incremental assignment.")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--new-docs", type=int, default=500, help="Patents ingested after clustering, assigned incrementally.")
+    parser.add_argument("--clusters", type=int, default=len(TOPICS))
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--backend", choices=["inprocess", "opensearch"], default="inprocess")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+    from patent_search_tools import stream_search_hits
+    from topic_clusters import CLUSTER_DIR, build_topic_clusters, get_cluster_model
+
+    stub = StubOllamaServer().start()
+    point_embeddings_at(stub.url)
+    try:
+        client = setup_backend(args.backend, args.host, args.port)
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.docs, seed=args.seed)
+            create_index_if_not_exists(client, PATENT_INDEX)
+            index_patent_data(client, PATENT_INDEX, load_patent_data(corpus_dir))
+            client.indices.refresh(index=PATENT_INDEX)
+
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        build_topic_clusters(args.clusters, args.batch_size, seed=args.seed)
+        build_s = time.perf_counter() - started
+        client.indices.refresh(index=PATENT_INDEX)
+        vectors_mb = os.path.getsize(os.path.join(CLUSTER_DIR, PATENT_INDEX, "work", "vectors.npy")) / 2 ** 20
+
+        pairs = [
+            (hit["_source"].get("cluster_id"), true_topic(hit["_source"].get("title")))
+            for hit in stream_search_hits(source_fields=["cluster_id", "title"])
+        ]
+        unlabeled = sum(cluster_id is None for cluster_id, _ in pairs)
+
+        # New patents are assigned to the existing centroids while they are indexed
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.new_docs, seed=args.seed + 1)
+            new_patents = load_patent_data(corpus_dir)
+        started = time.perf_counter()
+        index_patent_data(client, PATENT_INDEX, new_patents)
+        incremental_s = time.perf_counter() - started
+        majority = {}
+        for cluster_id, topic in pairs:
+            majority.setdefault(cluster_id, Counter())[topic] += 1
+        majority = {cluster_id: counts.most_common(1)[0][0] for cluster_id, counts in majority.items()}
+        assigned_correctly = sum(
+            majority.get(patent.get("cluster_id")) == true_topic(patent["title"]) for patent in new_patents
+        )
+    finally:
+        stub.stop()
+
+    model = get_cluster_model(PATENT_INDEX)
+    results = {
+        "build": {
+            "documents": model.meta["documents"],
+            "clusters": model.meta["n_clusters"],
+            "iterations": model.meta["iterations"],
+            "seconds": round(build_s, 2),
+            "timings_s": model.meta["timings_s"],
+            "vectors_file_mb": round(vectors_mb, 1),
+            # Peak RSS is a high-water mark; growth during the build should stay well below the vector file size
+            "peak_rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+        },
+        "purity": round(purity(pairs), 4),
+        "documents_without_cluster": unlabeled,
+        "incremental": {
+            "documents": len(new_patents),
+            "seconds": round(incremental_s, 3),
+            "assigned_to_majority_topic": round(assigned_correctly / max(len(new_patents), 1), 4),
+        },
+        "labels": {cluster["cluster_id"]: cluster["label"] for cluster in model.clusters},
+    }
+    print(f"   build: {results['build']['seconds']}s for {results['build']['documents']} docs, "
+          f"{results['build']['iterations']} steps, RSS +{results['build']['peak_rss_growth_mb']} MiB "
+          f"(vectors {results['build']['vectors_file_mb']} MiB)")
+    print(f"   purity={results['purity']:.3f}  incremental accuracy={results['incremental']['assigned_to_majority_topic']:.3f}")
+    for cluster_id, label in sorted(results["labels"].items()):
+        print(f"   {cluster_id:>3} {label}")
+
+    write_results(
+        "topic_clusters",
+        {"benchmark": "topic_clusters", "meta": run_metadata(vars(args)), "results": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import random
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+from benchmarks.common import latency_stats, point_embeddings_at, run_metadata, setup_backend, write_results
+from benchmarks.stub_ollama import StubOllamaServer
+from benchmarks.synthetic_corpus import ASSIGNEES, write_corpus
+
+
+def scan_time_series(granularity, sub_technology, assignee):
+    """What a trend query costs without rollups: stream every matching document and count."""
+    from patent_search_tools import stream_search_hits
+    from trend_rollups import UNKNOWN_PERIOD, period_of
+
+    counts = Counter()
+    fields = ["publication_date", "cpc_groups"]
+    for hit in stream_search_hits(assignee=assignee, source_fields=fields):
+        source = hit["_source"]
+        if sub_technology and sub_technology not in (source.get("cpc_groups") or []):
+            continue
+        counts[period_of(source.get("publication_date"), granularity)] += 1
+    counts.pop(UNKNOWN_PERIOD, None)
+    return sorted(counts.items())
+
+
+def build_queries(sub_technologies, count, seed):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        queries.append((
+            rng.choice(["year", "quarter"]),
+            rng.choice([None] + sub_technologies),
+            rng.choice([None, None] + ASSIGNEES),
+        ))
+    return queries
+
+
+def check_incremental(rollups, documents, seed):
+    """
+    Move some documents to other dates and assignees and delete others, then
+    compare the incrementally updated rollups with ones built from scratch.
+    """
+    from trend_rollups import GRANULARITIES, TrendRollups
+
+    rng = random.Random(seed)
+    documents = dict(documents)
+    changed = rng.sample(sorted(documents), len(documents) // 10)
+    for patent_id in changed:
+        document = dict(documents[patent_id])
+        document["publication_date"] = f"{rng.randint(2015, 2024)}-{rng.randint(1, 12):02d}-15"
+        document["assignees"] = [rng.choice(ASSIGNEES)]
+        documents[patent_id] = document
+    deleted = rng.sample(sorted(set(documents) - set(changed)), len(documents) // 20)
+    for patent_id in deleted:
+        documents.pop(patent_id)
+
+    started = time.perf_counter()
+    rollups.upsert([documents[patent_id] for patent_id in changed])
+    rollups.delete(deleted)
+    update_ms = (time.perf_counter() - started) * 1000
+
+    fresh = TrendRollups(":memory:")
+    fresh.upsert(list(documents.values()))
+    consistent = rollups.stats() == fresh.stats()
+    for granularity in GRANULARITIES:
+        for sub_technology in [None] + [code for code, _ in fresh.sub_technologies()]:
+            consistent &= rollups.time_series(granularity, sub_technology) == fresh.time_series(granularity, sub_technology)
+            for (p1, c1, v1), (p2, c2, v2) in zip(rollups.centroids(granularity, sub_technology),
+                                                   fresh.centroids(granularity, sub_technology)):
+                consistent &= p1 == p2 and c1 == c2 and bool(np.allclose(v1, v2, atol=1e-6))
+        for assignee in ASSIGNEES:
+            consistent &= rollups.time_series(granularity, None, assignee) == fresh.time_series(granularity, None, assignee)
+    return {"updated": len(changed), "deleted": len(deleted), "update_ms": round(update_ms, 2), "consistent": consistent}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trend queries served from rollups against scanning the index.")
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--backend", choices=["inprocess", "opensearch"], default="inprocess")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    from ingestion import index_patent_data, load_patent_data
+    from opensearch_client import PATENT_INDEX, create_index_if_not_exists
+    from trend_rollups import get_trend_rollups
+
+    stub = StubOllamaServer().start()
+    point_embeddings_at(stub.url)
+    try:
+        client = setup_backend(args.backend, args.host, args.port)
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            write_corpus(corpus_dir, args.docs, seed=args.seed)
+            create_index_if_not_exists(client, PATENT_INDEX)
+            documents = load_patent_data(corpus_dir)
+        rollups = get_trend_rollups(PATENT_INDEX)
+        started = time.perf_counter()
+        rollups.upsert(documents)
+        upsert_ms = (time.perf_counter() - started) * 1000
+        # index_patent_data upserts them again; unchanged documents must leave the counts as they are
+        index_patent_data(client, PATENT_INDEX, documents)
+        client.indices.refresh(index=PATENT_INDEX)
+    finally:
+        stub.stop()
+
+    queries = build_queries([code for code, _ in rollups.sub_technologies()], args.queries, args.seed)
+    mismatches = sum(rollups.time_series(*query) != scan_time_series(*query) for query in queries)
+    rollup_samples = []
+    for query in queries:
+        started = time.perf_counter()
+        rollups.time_series(*query)
+        rollup_samples.append((time.perf_counter() - started) * 1000)
+    scan_samples = []
+    for query in queries:
+        started = time.perf_counter()
+        scan_time_series(*query)
+        scan_samples.append((time.perf_counter() - started) * 1000)
+
+    results = {
+        "ingest": {
+            "documents": len(documents),
+            "upsert_ms": round(upsert_ms, 2),
+            "upsert_ms_per_doc": round(upsert_ms / max(len(documents), 1), 4),
+            **rollups.stats(),
+        },
+        "rollup": latency_stats(rollup_samples),
+        "scan": latency_stats(scan_samples),
+        "mismatched_queries": mismatches,
+        "incremental": check_incremental(
+            rollups, {document["patent_id"]: document for document in documents}, args.seed
+        ),
+    }
+    print(f"   ingest: {results['ingest']['upsert_ms_per_doc']} ms/doc, {results['ingest']['count_buckets']} count buckets")
+    print(f"   rollup p50={results['rollup']['p50_ms']:.3f}ms   scan p50={results['scan']['p50_ms']:.2f}ms")
+    print(f"   mismatched queries: {mismatches}, incremental updates consistent: {results['incremental']['consistent']}")
+
+    write_results(
+        "trend_rollups",
+        {"benchmark": "trend_rollups", "meta": run_metadata(vars(args)), "results": results},
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+import json
+import os
+from datetime import date
+
+import numpy as np
+
+CITATION_GRAPH_DIR = "outputs/citation_graph"
+
+_ARRAYS = ("forward_indptr", "forward_indices", "backward_indptr", "backward_indices", "years", "pagerank", "velocity")
+
+
+def _year(value):
+    try:
+        return int(str(value)[:4])
+    except (TypeError, ValueError):
+        return 0
+
+
+def _gather(indptr, indices, nodes):
+    """Concatenate the CSR rows of several nodes without a Python loop."""
+    nodes = np.asarray(nodes, dtype=np.int64)
+    starts = np.asarray(indptr)[nodes]
+    lengths = np.asarray(indptr)[nodes + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+    return np.asarray(indices)[offsets].astype(np.int64)
+
+
+def _csr(sources, targets, num_nodes):
+    """Build CSR (indptr, indices) arrays from edge lists, sorted by source."""
+    order = np.lexsort((targets, sources))
+    indices = targets[order].astype(np.int32)
+    counts = np.bincount(sources, minlength=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, indices
+
+
+class CitationGraph:
+    """
+    Compact citation graph in CSR form keyed by an integer patent id map.
+
+    Forward edges point from a citing patent to the patents it cites;
+    backward edges are the transpose (who cites this patent). Arrays can be
+    memory-mapped from disk so lookups don't load the whole graph.
+    """
+
+    def __init__(self, ids, arrays):
+        self.ids = list(ids)
+        self.id_map = {patent_id: node for node, patent_id in enumerate(self.ids)}
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self._percentiles = None
+
+    @property
+    def num_nodes(self):
+        return len(self.ids)
+
+    @property
+    def num_edges(self):
+        return int(self.forward_indptr[-1])
+
+    @classmethod
+    def from_edges(cls, ids, sources, targets, years):
+        """
+        Build a graph and its scores from integer edge lists.
+
+        Args:
+            ids (list): Patent id of each node.
+            sources (array): Citing node of each edge.
+            targets (array): Cited node of each edge.
+            years (array): Publication year of each node (0 if unknown).
+
+        Returns:
+            CitationGraph: The graph with PageRank and citation velocity computed.
+        """
+        num_nodes = len(ids)
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if len(sources):
+            # Drop duplicate edges and self-citations
+            keys = np.unique(sources * num_nodes + targets)
+            sources, targets = keys // num_nodes, keys % num_nodes
+            keep = sources != targets
+            sources, targets = sources[keep], targets[keep]
+
+        forward_indptr, forward_indices = _csr(sources, targets, num_nodes)
+        backward_indptr, backward_indices = _csr(targets, sources, num_nodes)
+        arrays = {
+            "forward_indptr": forward_indptr,
+            "forward_indices": forward_indices,
+            "backward_indptr": backward_indptr,
+            "backward_indices": backward_indices,
+            "years": np.asarray(years, dtype=np.int16),
+            "pagerank": np.zeros(num_nodes, dtype=np.float32),
+            "velocity": np.zeros(num_nodes, dtype=np.float32),
+        }
+        graph = cls(ids, arrays)
+        graph.pagerank = graph.compute_pagerank()
+        graph.velocity = graph.compute_citation_velocity()
+        return graph
+
+    def _node(self, patent_id):
+        return self.id_map.get(patent_id)
+
+    def _neighbors(self, indptr, indices, node):
+        return indices[indptr[node]:indptr[node + 1]]
+
+    def cites(self, patent_id):
+        """Patent ids cited by the given patent (backward citations)."""
+        node = self._node(patent_id)
+        if node is None:
+            return []
+        return [self.ids[n] for n in self._neighbors(self.forward_indptr, self.forward_indices, node)]
+
+    def cited_by(self, patent_id):
+        """Patent ids citing the given patent (forward citations)."""
+        node = self._node(patent_id)
+        if node is None:
+            return []
+        return [self.ids[n] for n in self._neighbors(self.backward_indptr, self.backward_indices, node)]
+
+    def _expand(self, frontier, direction):
+        parts = []
+        if direction in ("cites", "both"):
+            parts.append(_gather(self.forward_indptr, self.forward_indices, frontier))
+        if direction in ("cited_by", "both"):
+            parts.append(_gather(self.backward_indptr, self.backward_indices, frontier))
+        return np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def k_hop(self, patent_ids, k=2, direction="both", max_nodes=None):
+        """
+        Expand from seed patents through up to k citation hops.
+
+        Args:
+            patent_ids (list): Seed patent ids.
+            k (int): Number of hops.
+            direction (str): 'cites', 'cited_by' or 'both'.
+            max_nodes (int): Stop once this many nodes have been reached.
+
+        Returns:
+            dict: Patent id mapped to its hop distance from the seeds.
+        """
+        distance = np.full(self.num_nodes, -1, dtype=np.int16)
+        frontier = np.unique(np.asarray([self.id_map[p] for p in patent_ids if p in self.id_map], dtype=np.int64))
+        distance[frontier] = 0
+        reached = len(frontier)
+        for hop in range(1, k + 1):
+            if not len(frontier) or (max_nodes and reached >= max_nodes):
+                break
+            frontier = self._expand(frontier, direction)
+            frontier = frontier[distance[frontier] < 0]
+            if max_nodes:
+                frontier = frontier[: max(0, max_nodes - reached)]
+            distance[frontier] = hop
+            reached += len(frontier)
+        nodes = np.flatnonzero(distance >= 0)
+        return {self.ids[node]: int(distance[node]) for node in nodes}
+
+    def compute_pagerank(self, damping=0.85, iterations=100, tolerance=1e-8):
+        """Vectorized PageRank over citation edges (citing -> cited)."""
+        n = self.num_nodes
+        if n == 0:
+            return np.zeros(0, dtype=np.float32)
+        out_degree = np.diff(self.forward_indptr).astype(np.float64)
+        sources = np.repeat(np.arange(n), np.diff(self.forward_indptr))
+        targets = np.asarray(self.forward_indices, dtype=np.int64)
+        dangling = out_degree == 0
+        safe_degree = np.where(dangling, 1.0, out_degree)
+
+        rank = np.full(n, 1.0 / n)
+        for _ in range(iterations):
+            contributions = rank[sources] / safe_degree[sources]
+            updated = np.bincount(targets, weights=contributions, minlength=n)
+            updated = (1 - damping) / n + damping * (updated + rank[dangling].sum() / n)
+            converged = np.abs(updated - rank).sum() < tolerance
+            rank = updated
+            if converged:
+                break
+        return rank.astype(np.float32)
+
+    def compute_citation_velocity(self, window_years=3, reference_year=None):
+        """
+        Citations received per year over the most recent window.
+
+        Args:
+            window_years (int): Length of the window in years.
+            reference_year (int): Last year of the window; defaults to the current year.
+
+        Returns:
+            array: Citations per year for each node.
+        """
+        n = self.num_nodes
+        reference_year = reference_year or date.today().year
+        cited = np.repeat(np.arange(n), np.diff(self.backward_indptr))
+        citing_years = np.asarray(self.years)[np.asarray(self.backward_indices, dtype=np.int64)]
+        recent = (citing_years > reference_year - window_years) & (citing_years <= reference_year)
+        return (np.bincount(cited[recent], minlength=n) / window_years).astype(np.float32)
+
+    def scores(self, patent_id):
+        """
+        Citation statistics for one patent.
+
+        Returns:
+            dict: Citation counts, PageRank and velocity, or None if the patent is unknown.
+        """
+        node = self._node(patent_id)
+        if node is None:
+            return None
+        return {
+            "patent_id": patent_id,
+            "cites": int(self.forward_indptr[node + 1] - self.forward_indptr[node]),
+            "cited_by": int(self.backward_indptr[node + 1] - self.backward_indptr[node]),
+            "pagerank": float(self.pagerank[node]),
+            "pagerank_percentile": float(self.pagerank_percentiles()[node]),
+            "citation_velocity": float(self.velocity[node]),
+        }
+
+    def pagerank_percentiles(self):
+        """Rank-normalized PageRank in [0, 1], used as a bounded ranking boost."""
+        if self._percentiles is None:
+            n = self.num_nodes
+            percentiles = np.zeros(n, dtype=np.float32)
+            if n > 1:
+                percentiles[np.argsort(self.pagerank, kind="stable")] = np.arange(n) / (n - 1)
+            self._percentiles = percentiles
+        return self._percentiles
+
+    def top(self, n=10, by="pagerank"):
+        values = self.pagerank if by == "pagerank" else self.velocity
+        order = np.argsort(-np.asarray(values), kind="stable")[:n]
+        return [self.scores(self.ids[node]) for node in order]
+
+    def save(self, dir_path=CITATION_GRAPH_DIR):
+        os.makedirs(dir_path, exist_ok=True)
+        # Replaced rather than overwritten, so processes with the old arrays memory-mapped keep reading them
+        for name in _ARRAYS:
+            partial = os.path.join(dir_path, f"{name}.partial.npy")
+            np.save(partial, np.asarray(getattr(self, name)))
+            os.replace(partial, os.path.join(dir_path, f"{name}.npy"))
+        with open(os.path.join(dir_path, "ids.json.partial"), "w", encoding="utf-8") as f:
+            json.dump(self.ids, f)
+        os.replace(os.path.join(dir_path, "ids.json.partial"), os.path.join(dir_path, "ids.json"))
+        _graph_cache.pop(dir_path, None)
+
+    @classmethod
+    def load(cls, dir_path=CITATION_GRAPH_DIR, mmap=True):
+        with open(os.path.join(dir_path, "ids.json"), "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(dir_path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in _ARRAYS
+        }
+        return cls(ids, arrays)
+
+
+def build_citation_graph(dir_path, base=None):
+    """
+    Build the citation graph from harvested SerpApi patent JSON files.
+
+    Uses patent_citations.original (what a patent cites) and cited_by.original
+    (who cites it) of every file, including citation_*.json payloads.
+
+    Args:
+        dir_path (str): Directory with the patent JSON files.
+        base (CitationGraph): Existing graph whose patents and citations are kept; the files' edges are merged into it.
+
+    Returns:
+        CitationGraph: The citation graph.
+    """
+    id_map = {}
+    years = []
+    sources, targets = [], []
+    if base is not None:
+        id_map = {patent_id: node for node, patent_id in enumerate(base.ids)}
+        years = [int(year) for year in base.years]
+        forward_indptr = np.asarray(base.forward_indptr)
+        sources = np.repeat(np.arange(base.num_nodes), np.diff(forward_indptr)).tolist()
+        targets = np.asarray(base.forward_indices).tolist()
+
+    def node_for(patent_id, publication_date=None):
+        if patent_id not in id_map:
+            id_map[patent_id] = len(id_map)
+            years.append(0)
+        node = id_map[patent_id]
+        if publication_date and not years[node]:
+            years[node] = _year(publication_date)
+        return node
+
+    for file in sorted(os.listdir(dir_path)):
+        if not file.endswith(".json"):
+            continue
+        with open(os.path.join(dir_path, file), "r") as f:
+            data = json.load(f)
+        patent_id = data.get("search_parameters", {}).get("patent_id")
+        if not patent_id:
+            continue
+        node = node_for(patent_id, data.get("publication_date"))
+        for citation in data.get("patent_citations", {}).get("original", []):
+            if citation.get("patent_id"):
+                sources.append(node)
+                targets.append(node_for(citation["patent_id"], citation.get("publication_date")))
+        for citing in data.get("cited_by", {}).get("original", []):
+            if citing.get("patent_id"):
+                sources.append(node_for(citing["patent_id"], citing.get("publication_date")))
+                targets.append(node)
+
+    ids = [None] * len(id_map)
+    for patent_id, node in id_map.items():
+        ids[node] = patent_id
+    return CitationGraph.from_edges(ids, sources, targets, years)
+
+
+_graph_cache = {}
+
+
+def load_citation_graph(dir_path=CITATION_GRAPH_DIR):
+    """
+    Return the memory-mapped citation graph, loading it once per process.
+
+    Returns:
+        CitationGraph: The graph, or None if it has not been built yet.
+    """
+    if dir_path not in _graph_cache:
+        if not os.path.exists(os.path.join(dir_path, "ids.json")):
+            return None
+        _graph_cache[dir_path] = CitationGraph.load(dir_path)
+    return _graph_cache[dir_path]
+
+
+def apply_citation_boost(hits, weight=0.2, graph=None):
+    """
+    Re-rank search hits by blending their score with citation PageRank.
+
+    Each score becomes score * (1 + weight * pagerank_percentile), so
+    influential prior art moves up without overriding relevance.
+
+    Args:
+        hits (list): OpenSearch hits with patent_id in _source.
+        weight (float): Maximum relative boost.
+        graph (CitationGraph): Graph to use; defaults to the saved graph.
+
+    Returns:
+        list: Hits re-sorted by boosted score.
+    """
+    if not weight:
+        return hits
+    graph = graph or load_citation_graph()
+    if graph is None:
+        return hits
+    percentiles = graph.pagerank_percentiles()
+    for hit in hits:
+        node = graph.id_map.get(hit.get("_source", {}).get("patent_id"))
+        boost = float(percentiles[node]) if node is not None else 0.0
+        hit["_score"] = (hit.get("_score") or 0.0) * (1 + weight * boost)
+    return sorted(hits, key=lambda hit: hit.get("_score") or 0.0, reverse=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    dir_path = sys.argv[1] if len(sys.argv) > 1 else "results"
+    graph = build_citation_graph(dir_path)
+    graph.save()
+    print(f"✅ Citation graph with {graph.num_nodes} patents and {graph.num_edges} citations saved to '{CITATION_GRAPH_DIR}'")
+    for record in graph.top(5):
+        print(f"   {record['patent_id']}: pagerank={record['pagerank']:.5f}, cited_by={record['cited_by']}")
@@ -0,0 +1,175 @@
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# 128 permutations in 16 bands of 8 rows: pairs above ~0.7 Jaccard become LSH candidates
+NUM_PERM = 128
+NUM_BANDS = 16
+SHINGLE_SIZE = 3
+# Estimated Jaccard similarity at which candidates are treated as the same invention
+SIMILARITY_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalize_text(text):
+    return " ".join(TOKEN_PATTERN.findall(str(text or "").lower()))
+
+
+def content_hash(title, abstract):
+    """Hash of the normalized title and abstract, identical for exact duplicates."""
+    normalized = f"{normalize_text(title)}\n{normalize_text(abstract)}"
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def shingle_hashes(text, k=SHINGLE_SIZE):
+    """
+    Hash the word k-shingles of a text to 32-bit integers.
+
+    Args:
+        text (str): Text to shingle.
+        k (int): Words per shingle.
+
+    Returns:
+        numpy.ndarray: Unique shingle hashes as uint64.
+    """
+    tokens = normalize_text(text).split()
+    if len(tokens) < k:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+    return np.unique(np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64))
+
+
+class MinHashDeduplicator:
+    """
+    Groups near-duplicate patents into families with MinHash signatures and LSH banding.
+
+    Documents are added one at a time; each gets a family_key, which is the
+    id of the first document seen in its family. Exact duplicates (same
+    patent id or same normalized title and abstract) are reported so the
+    caller can skip them entirely.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, num_bands=NUM_BANDS, threshold=SIMILARITY_THRESHOLD, seed=1):
+        if num_perm % num_bands:
+            raise ValueError("num_perm must be divisible by num_bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.num_bands = num_bands
+        self.rows = num_perm // num_bands
+        self.threshold = threshold
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self.signatures = {}
+        self.buckets = [defaultdict(list) for _ in range(num_bands)]
+        self.parent = {}
+        self.seen_ids = {}
+        self.seen_hashes = {}
+        self.external_families = {}
+
+    def signature(self, text):
+        """MinHash signature of a text: the minimum of each permuted shingle hash."""
+        hashes = shingle_hashes(text)
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (a * x + b) mod p stays below 2**64 because a, b and x are all below 2**32
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
+
+    def _find(self, doc_id):
+        while self.parent[doc_id] != doc_id:
+            self.parent[doc_id] = self.parent[self.parent[doc_id]]
+            doc_id = self.parent[doc_id]
+        return doc_id
+
+    def _union(self, first, second):
+        root_first, root_second = self._find(first), self._find(second)
+        if root_first != root_second:
+            # The earlier document stays the representative of the family
+            self.parent[root_second] = root_first
+
+    def add(self, doc_id, title, abstract, family_id=None):
+        """
+        Register a document and assign it to a family.
+
+        Args:
+            doc_id (str): Unique document id (the patent id).
+            title (str): Patent title.
+            abstract (str): Patent abstract used for shingling.
+            family_id (str): Patent family id from the source data, if known.
+
+        Returns:
+            tuple: (family_key, duplicate_of) where duplicate_of is the id of an
+            exact duplicate already seen, or None.
+        """
+        if doc_id in self.seen_ids:
+            return self.family_key(doc_id), doc_id
+        # Patents without a title or abstract share no content, so they are never duplicates of each other
+        has_content = bool(normalize_text(title) or normalize_text(abstract))
+        exact = content_hash(title, abstract)
+        if has_content and exact in self.seen_hashes:
+            original = self.seen_hashes[exact]
+            return self.family_key(original), original
+
+        self.seen_ids[doc_id] = True
+        if has_content:
+            self.seen_hashes[exact] = doc_id
+        self.parent[doc_id] = doc_id
+
+        if family_id:
+            if family_id in self.external_families:
+                self._union(self.external_families[family_id], doc_id)
+            else:
+                self.external_families[family_id] = doc_id
+        if not has_content:
+            return self.family_key(doc_id), None
+
+        signature = self.signature(abstract or title)
+        self.signatures[doc_id] = signature
+        candidates = set()
+        for band in range(self.num_bands):
+            key = signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            candidates.update(self.buckets[band][key])
+            self.buckets[band][key].append(doc_id)
+
+        for candidate in candidates:
+            if self.similarity(doc_id, candidate) >= self.threshold:
+                self._union(candidate, doc_id)
+        return self.family_key(doc_id), None
+
+    def similarity(self, first, second):
+        """Estimated Jaccard similarity of two registered documents."""
+        return float(np.mean(self.signatures[first] == self.signatures[second]))
+
+    def family_key(self, doc_id):
+        return self._find(doc_id)
+
+
+def collapse_by_family(hits):
+    """
+    Keep only the first (best-ranked) hit of each patent family.
+
+    Args:
+        hits (list): Hits ordered by relevance, with family_key in _source.
+
+    Returns:
+        list: Hits with later family members removed.
+    """
+    seen = set()
+    collapsed = []
+    for hit in hits:
+        source = hit.get("_source", {})
+        key = source.get("family_key") or source.get("patent_id") or hit.get("_id")
+        if key in seen:
+            continue
+        seen.add(key)
+        collapsed.append(hit)
+    return collapsed
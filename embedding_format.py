@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+
+from embedding_scheduler import get_embedding_scheduler
+
+EMBEDDING_MODEL = os.getenv("PATENT_EMBEDDING_MODEL", "nomic-embed-text:v1.5")
+# Matryoshka dimension to keep (e.g. 256); unset keeps the model's full dimension
+EMBEDDING_DIMENSION = int(os.getenv("PATENT_EMBEDDING_DIM", 0)) or None
+# float32, fp16 or int8
+EMBEDDING_PRECISION = os.getenv("PATENT_EMBEDDING_PRECISION", "float32")
+
+PRECISIONS = ("float32", "fp16", "int8")
+BYTES_PER_VALUE = {"float32": 4, "fp16": 2, "int8": 1}
+
+
+class EmbeddingFormatMismatch(ValueError):
+    pass
+
+
+def shape_embedding(vector, dimension=None, precision="float32"):
+    """
+    Truncate and quantize a raw embedding for storage or querying.
+
+    Follows the Matryoshka recipe for nomic-embed-text v1.5: layer-normalize the
+    full vector, keep the first `dimension` values and L2-normalize. fp16
+    rounds values to half precision; int8 scales the unit vector to [-127, 127]
+    for OpenSearch byte vectors.
+
+    Args:
+        vector (list): Raw embedding.
+        dimension (int): Number of leading dimensions to keep; None keeps all.
+        precision (str): 'float32', 'fp16' or 'int8'.
+
+    Returns:
+        list: Shaped embedding (ints for int8, floats otherwise).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported embedding precision '{precision}'; use one of {PRECISIONS}")
+    values = np.asarray(vector, dtype=np.float32)
+    if dimension and dimension < len(values):
+        values = (values - values.mean()) / np.sqrt(values.var() + 1e-5)
+        values = values[:dimension]
+    norm = np.linalg.norm(values)
+    if norm:
+        values = values / norm
+
+    if precision == "fp16":
+        return values.astype(np.float16).astype(np.float32).tolist()
+    if precision == "int8":
+        return np.clip(np.round(values * 127), -128, 127).astype(np.int8).tolist()
+    return values.tolist()
+
+
+def get_index_embedding(text, priority=None):
+    """
+    Embed text in the configured index format, used identically at ingestion and query time.
+
+    Args:
+        text (str): Text to embed.
+        priority (int): Scheduler priority class; defaults to the caller's embedding_priority context.
+
+    Returns:
+        list: Shaped embedding.
+    """
+    vector = get_embedding_scheduler().embed(text, EMBEDDING_MODEL, priority)
+    return shape_embedding(vector, EMBEDDING_DIMENSION, EMBEDDING_PRECISION)
+
+
+def get_index_embeddings(texts, priority=None):
+    """Embed many texts in the configured index format; the scheduler batches them."""
+    vectors = get_embedding_scheduler().embed_many(texts, EMBEDDING_MODEL, priority)
+    return [shape_embedding(vector, EMBEDDING_DIMENSION, EMBEDDING_PRECISION) for vector in vectors]
+
+
+def embedding_metadata(dimension, full_dimension):
+    """Index `_meta` block recording how stored vectors were produced."""
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_dimension": dimension,
+        "embedding_full_dimension": full_dimension,
+        "embedding_precision": EMBEDDING_PRECISION,
+    }
+
+
+def knn_field_mapping(dimension):
+    """
+    knn_vector mapping for the configured precision.
+
+    All precisions use an engine that supports efficient filtering (a filter
+    inside the knn clause). float32 uses Lucene HNSW with cosine similarity.
+    fp16 uses faiss scalar quantization (OpenSearch 2.13+) over unit vectors
+    with inner product. int8 uses Lucene byte vectors (OpenSearch 2.9+).
+    """
+    if EMBEDDING_PRECISION == "fp16":
+        return {
+            "type": "knn_vector",
+            "dimension": dimension,
+            "method": {
+                "name": "hnsw",
+                "engine": "faiss",
+                "space_type": "innerproduct",
+                "parameters": {"encoder": {"name": "sq", "parameters": {"type": "fp16"}}},
+            },
+        }
+    if EMBEDDING_PRECISION == "int8":
+        return {
+            "type": "knn_vector",
+            "dimension": dimension,
+            "data_type": "byte",
+            "method": {"name": "hnsw", "engine": "lucene", "space_type": "cosinesimil"},
+        }
+    return {
+        "type": "knn_vector",
+        "dimension": dimension,
+        "method": {"name": "hnsw", "engine": "lucene", "space_type": "cosinesimil"},
+    }
+
+
+_verified_indices = set()
+
+
+def check_index_embedding_format(client, index_name):
+    """
+    Reject an index whose stored vectors were produced with another model, dimension or precision.
+
+    Args:
+        client: OpenSearch client.
+        index_name (str): Index to check.
+
+    Raises:
+        EmbeddingFormatMismatch: If the index metadata disagrees with the current configuration.
+    """
+    if index_name in _verified_indices:
+        return
+    mapping = client.indices.get_mapping(index=index_name)
+    meta = next(iter(mapping.values()), {}).get("mappings", {}).get("_meta", {})
+    mismatched = embedding_format_mismatches(meta)
+    if mismatched:
+        raise EmbeddingFormatMismatch(
+            f"Index '{index_name}' was built with a different embedding format ({describe_mismatches(mismatched)}). "
+            "Re-run ingestion or change PATENT_EMBEDDING_* to match."
+        )
+    _verified_indices.add(index_name)
+
+
+def embedding_format_mismatches(meta):
+    """
+    Compare an index `_meta` block with the configured embedding format.
+
+    Args:
+        meta (dict): Metadata written by embedding_metadata; empty for indices created before it existed.
+
+    Returns:
+        dict: {key: (recorded, configured)} for every disagreeing setting; empty if compatible.
+    """
+    if not meta:
+        return {}
+    expected = {
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_precision": EMBEDDING_PRECISION,
+    }
+    if EMBEDDING_DIMENSION:
+        expected["embedding_dimension"] = EMBEDDING_DIMENSION
+    elif meta.get("embedding_full_dimension") is not None:
+        expected["embedding_dimension"] = meta["embedding_full_dimension"]
+    return {key: (meta.get(key), value) for key, value in expected.items() if meta.get(key) != value}
+
+
+def describe_mismatches(mismatched):
+    return ", ".join(f"{key}: index={found!r} configured={wanted!r}" for key, (found, wanted) in mismatched.items())
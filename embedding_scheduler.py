@@ -0,0 +1,235 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+
+from embeddings import embed_batch
+from tracing import percentile, span
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_AGENT = 1
+PRIORITY_BULK = 2
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_AGENT: "agent", PRIORITY_BULK: "bulk"}
+
+# Concurrent batch requests to Ollama from this process
+MAX_IN_FLIGHT = int(os.getenv("PATENT_EMBED_MAX_IN_FLIGHT", 4))
+# Bulk work never takes every slot, so Ollama keeps capacity for interactive callers (also in other processes)
+BULK_MAX_IN_FLIGHT = int(os.getenv("PATENT_EMBED_BULK_MAX_IN_FLIGHT", 2))
+MAX_BATCH_SIZE = int(os.getenv("PATENT_EMBED_MAX_BATCH", 32))
+# How long a request may wait for its batch to fill before it is sent anyway
+BATCH_WINDOW_MS = {PRIORITY_INTERACTIVE: 5.0, PRIORITY_AGENT: 20.0, PRIORITY_BULK: 50.0}
+# Wait-time samples kept per priority class for the percentile metrics
+WAIT_SAMPLES = 1000
+
+_current_priority = contextvars.ContextVar("embedding_priority", default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def embedding_priority(priority):
+    """Run the enclosed embedding calls at the given priority class."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority():
+    return _current_priority.get()
+
+
+class _Request:
+    __slots__ = ("text", "model", "priority", "enqueued", "deadline", "future")
+
+    def __init__(self, text, model, priority):
+        self.text = text
+        self.model = model
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.deadline = self.enqueued + BATCH_WINDOW_MS[priority] / 1000
+        self.future = Future()
+
+
+class EmbeddingScheduler:
+    """
+    Shared embedding queue with priority classes and micro-batching.
+
+    Requests wait in one FIFO per priority class. Whenever a request slot is
+    free, the dispatcher builds the next batch: interactive requests first,
+    then agent requests. Bulk requests are batched only among themselves, so
+    a query never pays the per-item cost of a large ingestion batch. A batch
+    is sent once it is full or its oldest request reaches the batch window of
+    its class, so a lone interactive query waits at most a few milliseconds
+    and then rides in the next free slot instead of queueing behind bulk work.
+    Bulk batches may use only BULK_MAX_IN_FLIGHT of the slots.
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, bulk_max_in_flight=BULK_MAX_IN_FLIGHT,
+                 max_batch_size=MAX_BATCH_SIZE, embed_fn=embed_batch):
+        self.max_in_flight = max_in_flight
+        self.bulk_max_in_flight = min(bulk_max_in_flight, max_in_flight)
+        self.max_batch_size = max_batch_size
+        self.embed_fn = embed_fn
+        self._queues = {priority: deque() for priority in PRIORITY_NAMES}
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._bulk_in_flight = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embed")
+        self._metrics = {
+            priority: {"submitted": 0, "completed": 0, "failed": 0, "waits_ms": deque(maxlen=WAIT_SAMPLES)}
+            for priority in PRIORITY_NAMES
+        }
+        self._batches = 0
+        self._batched_requests = 0
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="embed-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, text, model, priority=None):
+        """
+        Queue one text for embedding.
+
+        Args:
+            text (str): Text to embed.
+            model (str): Embedding model.
+            priority (int): PRIORITY_INTERACTIVE, PRIORITY_AGENT or PRIORITY_BULK; defaults to the current context.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the raw embedding.
+        """
+        request = _Request(text, model, current_priority() if priority is None else priority)
+        with self._cond:
+            self._queues[request.priority].append(request)
+            self._metrics[request.priority]["submitted"] += 1
+            self._cond.notify()
+        return request.future
+
+    def embed(self, text, model, priority=None, timeout=None):
+        return self.submit(text, model, priority).result(timeout)
+
+    def embed_many(self, texts, model, priority=None, timeout=None):
+        futures = [self.submit(text, model, priority) for text in texts]
+        return [future.result(timeout) for future in futures]
+
+    def _next_batch(self, now):
+        """
+        Pop the next batch if a slot is free and the batch is full or due.
+
+        Returns:
+            tuple: (batch or None, seconds until the earliest deadline or None to wait for a notify)
+        """
+        if self._in_flight >= self.max_in_flight:
+            return None, None
+        # Bulk is batched only when nothing more urgent is waiting, and only within its slot cap
+        classes = [priority for priority in PRIORITY_NAMES if priority != PRIORITY_BULK and self._queues[priority]]
+        if not classes:
+            if not self._queues[PRIORITY_BULK] or self._bulk_in_flight >= self.bulk_max_in_flight:
+                return None, None
+            classes = [PRIORITY_BULK]
+        model = self._queues[classes[0]][0].model
+        pending = 0
+        for priority in classes:
+            queue = self._queues[priority]
+            for request in queue:
+                # Only whether a full batch is waiting matters, so stop counting there
+                pending += request.model == model
+                if pending >= self.max_batch_size:
+                    break
+        earliest = min(self._queues[priority][0].deadline for priority in classes)
+        if pending < self.max_batch_size and now < earliest:
+            return None, earliest - now
+
+        batch = []
+        for priority in classes:
+            queue = self._queues[priority]
+            kept = deque()
+            while queue and len(batch) < self.max_batch_size:
+                request = queue.popleft()
+                (batch if request.model == model else kept).append(request)
+            kept.extend(queue)
+            self._queues[priority] = kept
+        return batch, None
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    batch, timeout = self._next_batch(now)
+                    if batch:
+                        break
+                    self._cond.wait(timeout)
+                bulk_only = all(request.priority == PRIORITY_BULK for request in batch)
+                self._in_flight += 1
+                self._bulk_in_flight += bulk_only
+                for request in batch:
+                    self._metrics[request.priority]["waits_ms"].append((now - request.enqueued) * 1000)
+                self._batches += 1
+                self._batched_requests += len(batch)
+            self._executor.submit(self._run_batch, batch, bulk_only)
+
+    def _run_batch(self, batch, bulk_only):
+        top_priority = min(request.priority for request in batch)
+        try:
+            with span("embedding.scheduled_batch", size=len(batch), priority=PRIORITY_NAMES[top_priority]):
+                vectors = self.embed_fn([request.text for request in batch], batch[0].model)
+            if len(vectors) != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got {len(vectors)}")
+            for request, vector in zip(batch, vectors):
+                request.future.set_result(vector)
+            outcome = "completed"
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            outcome = "failed"
+        with self._cond:
+            self._in_flight -= 1
+            self._bulk_in_flight -= bulk_only
+            for request in batch:
+                self._metrics[request.priority][outcome] += 1
+            self._cond.notify()
+
+    def stats(self):
+        """
+        Queue and latency metrics.
+
+        Returns:
+            dict: in-flight counts, batch statistics and, per priority class,
+            queue depth, request counts and queue wait percentiles in ms.
+        """
+        with self._cond:
+            classes = {}
+            for priority, name in PRIORITY_NAMES.items():
+                metrics = self._metrics[priority]
+                waits = sorted(metrics["waits_ms"])
+                classes[name] = {
+                    "queue_depth": len(self._queues[priority]),
+                    "submitted": metrics["submitted"],
+                    "completed": metrics["completed"],
+                    "failed": metrics["failed"],
+                    "wait_p50_ms": round(percentile(waits, 0.50), 2),
+                    "wait_p95_ms": round(percentile(waits, 0.95), 2),
+                    "wait_max_ms": round(waits[-1], 2) if waits else 0.0,
+                }
+            return {
+                "in_flight": self._in_flight,
+                "bulk_in_flight": self._bulk_in_flight,
+                "batches": self._batches,
+                "mean_batch_size": round(self._batched_requests / self._batches, 2) if self._batches else 0.0,
+                "classes": classes,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_embedding_scheduler():
+    """Process-wide scheduler shared by search, agents and ingestion."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = EmbeddingScheduler()
+        return _scheduler
@@ -1,4 +1,5 @@
-import requests
+from ollama_pool import get_ollama_pool
+from tracing import span
 
 def get_embedding(prompt, model="nomic-embed-text:v1.5"):
     """
@@ -12,19 +13,46 @@ def get_embedding(prompt, model="nomic-embed-text:v1.5"):
         list: The embedding vector.
     """
 
-    url="http://localhost:11434/api/embeddings"
     headers= {"Content-Type": "application/json"}
     data={"prompt": prompt, "model": model}
 
-    response=requests.post(url, headers=headers, json=data)
+    with span("embedding", model=model, prompt_chars=len(prompt)) as attributes:
+        # The pool picks the least-busy healthy Ollama host, preferring one with the model loaded
+        response=get_ollama_pool().request("POST", "/api/embeddings", model=model, headers=headers, json=data)
 
-    if response.status_code == 200:
-        return response.json().get("embedding", [])
-    else:
+        if response.status_code == 200:
+            embedding = response.json().get("embedding", [])
+            if attributes is not None:
+                attributes["dimension"] = len(embedding)
+            return embedding
         raise Exception(
             f"Error fetching embedding: {response.status_code}, {response.text}"
         )
 
+def embed_batch(prompts, model="nomic-embed-text:v1.5"):
+    """
+    Embed several prompts in one request with Ollama's batch endpoint.
+
+    Falls back to one /api/embeddings call per prompt on Ollama versions
+    without /api/embed.
+
+    Args:
+        prompts (list): Prompts to embed.
+        model (str): The model to use for embedding.
+
+    Returns:
+        list: One embedding vector per prompt, in order.
+    """
+    with span("embedding.batch_request", model=model, size=len(prompts)):
+        response = get_ollama_pool().request("POST", "/api/embed", model=model, json={"model": model, "input": prompts})
+        if response.status_code == 404 and "model" not in response.text.lower():
+            return [get_embedding(prompt, model=model) for prompt in prompts]
+        if response.status_code == 200:
+            return response.json().get("embeddings", [])
+        raise Exception(
+            f"Error fetching embeddings: {response.status_code}, {response.text}"
+        )
+
 if __name__ == "__main__":
     sample_prompt="The sky is blue because of Rayleigh Scattering"
     try:
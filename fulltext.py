@@ -0,0 +1,491 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+from embedding_format import check_index_embedding_format, get_index_embeddings
+from embedding_scheduler import PRIORITY_BULK
+from index_layout import AREA_FIELD, shard_settings
+from ingestion import chunk_text
+from opensearch_client import PATENT_INDEX, get_shared_opensearch_client, register_shared_opensearch_client
+from semantic_cache import mark_index_updated
+
+FULLTEXT_DIR = os.getenv("PATENT_FULLTEXT_DIR", "outputs/fulltext")
+# PDF downloads in flight; also the connection pool size
+PDF_DOWNLOAD_CONCURRENCY = int(os.getenv("PATENT_PDF_DOWNLOAD_CONCURRENCY", 8))
+# Text extraction processes; defaults to one per CPU
+PDF_EXTRACT_WORKERS = int(os.getenv("PATENT_PDF_EXTRACT_WORKERS", 0)) or os.cpu_count() or 1
+PDF_DOWNLOAD_TIMEOUT = float(os.getenv("PATENT_PDF_DOWNLOAD_TIMEOUT", 60))
+PDF_DOWNLOAD_RETRIES = int(os.getenv("PATENT_PDF_DOWNLOAD_RETRIES", 3))
+PDF_MAX_BYTES = int(os.getenv("PATENT_PDF_MAX_MB", 50)) * 2 ** 20
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Tokens per embedded passage, and tokens shared by neighbouring passages
+FULLTEXT_CHUNK_TOKENS = int(os.getenv("PATENT_FULLTEXT_CHUNK_TOKENS", 400))
+FULLTEXT_CHUNK_OVERLAP = int(os.getenv("PATENT_FULLTEXT_CHUNK_OVERLAP", 50))
+# Passages embedded and bulk-indexed together
+FULLTEXT_INDEX_BATCH = 256
+# A patent description runs to roughly 15k tokens; used to size the passage index's shards
+EXPECTED_CHUNKS_PER_PATENT = 40
+# Patents whose status is final; failed downloads or extractions are retried with --retry-failed
+DONE_STATUSES = ("indexed", "no_text")
+
+
+def fulltext_index_name(index_name=PATENT_INDEX):
+    """Index holding the full-text passages of the patents in index_name."""
+    return f"{index_name}-fulltext"
+
+
+def cache_paths(url):
+    """Cache files of the PDF at url and of its extracted text."""
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return (
+        os.path.join(FULLTEXT_DIR, "pdfs", digest[:2], f"{digest}.pdf"),
+        os.path.join(FULLTEXT_DIR, "text", digest[:2], f"{digest}.txt"),
+    )
+
+
+def _checkpoint_path(index_name):
+    return os.path.join(FULLTEXT_DIR, index_name, "checkpoint.jsonl")
+
+
+def load_checkpoint(index_name=PATENT_INDEX):
+    """Latest full-text status per patent id, as {patent_id: record}."""
+    records = {}
+    path = _checkpoint_path(index_name)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                # A run killed mid-write leaves a partial last line
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["patent_id"]] = record
+    return records
+
+
+_PDF_TOKEN = re.compile(rb"\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>|\[|\]|[A-Za-z'\"*]+|-?\d*\.?\d+")
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _decode_pdf_string(token):
+    if token.startswith(b"<"):
+        raw = bytes.fromhex(re.sub(rb"\s", b"", token[1:-1]).decode("ascii").ljust(2, "0"))
+    else:
+        raw = re.sub(
+            rb"\\([0-7]{1,3}|.)",
+            lambda match: bytes([int(match.group(1), 8) & 0xFF]) if match.group(1)[:1].isdigit() else _ESCAPES.get(match.group(1), match.group(1)),
+            token[1:-1],
+            flags=re.S,
+        )
+    return raw[2:].decode("utf-16-be", "replace") if raw.startswith(b"\xfe\xff") else raw.decode("latin-1")
+
+
+def _content_text(content):
+    """Text drawn by Tj, TJ, ' and " operators in one content stream; line moves become newlines."""
+    parts, operands, array = [], [], None
+    for token in _PDF_TOKEN.findall(content):
+        if token == b"[":
+            array = []
+        elif token == b"]":
+            operands.append(array or [])
+            array = None
+        elif token[:1] in b"(<":
+            (array if array is not None else operands).append(_decode_pdf_string(token))
+        elif token[:1].isdigit() or token[:1] in b"-.":
+            if array is not None:
+                # Large negative kerning inside TJ is how PDFs space words
+                if float(token) < -200:
+                    array.append(" ")
+            else:
+                operands.append(token)
+        else:
+            if token in (b"'", b'"', b"T*", b"Td", b"TD", b"Tm", b"ET"):
+                parts.append("\n")
+            if token in (b"Tj", b"'", b'"') and operands and isinstance(operands[-1], str):
+                parts.append(operands[-1])
+            elif token == b"TJ" and operands and isinstance(operands[-1], list):
+                parts.append("".join(item for item in operands[-1] if isinstance(item, str)))
+            operands = []
+    return "".join(parts)
+
+
+def _extract_text_builtin(data):
+    texts = []
+    for match in re.finditer(rb"stream\r?\n", data):
+        end = data.find(b"endstream", match.end())
+        header = data[data.rfind(b"obj", 0, match.start()):match.start()]
+        if end < 0 or (b"/Filter" in header and b"/FlateDecode" not in header) or b"/Subtype /Image" in header:
+            continue
+        raw = data[match.end():end]
+        try:
+            content = zlib.decompressobj().decompress(raw) if b"/FlateDecode" in header else raw
+        except zlib.error:
+            continue
+        if b"BT" in content:
+            texts.append(_content_text(content))
+    return "\n".join(texts)
+
+
+def extract_pdf_text(pdf_path):
+    """
+    Text layer of a PDF.
+
+    Uses pypdf when it is installed. Otherwise a built-in reader handles
+    uncompressed and Flate-compressed content streams with standard fonts;
+    PDFs with embedded CID fonts or object streams need pypdf. Scanned PDFs
+    without a text layer yield an empty string either way (OCR is not attempted).
+
+    Args:
+        pdf_path (str): PDF file.
+
+    Returns:
+        str: Extracted text with blank lines collapsed.
+    """
+    if PdfReader is not None:
+        text = "\n".join(page.extract_text() or "" for page in PdfReader(pdf_path).pages)
+    else:
+        with open(pdf_path, "rb") as f:
+            text = _extract_text_builtin(f.read())
+    lines = (re.sub(r"[ \t]+", " ", line).strip() for line in text.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(path), suffix=".partial", delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+
+
+def extract_and_chunk(pdf_path, text_path, max_tokens=FULLTEXT_CHUNK_TOKENS, overlap=FULLTEXT_CHUNK_OVERLAP):
+    """
+    Extract a downloaded PDF (or read its cached text) and split it into passages; runs in a worker process.
+
+    Returns:
+        dict: "chunks" (list of passage texts), "chars" and whether the text was "cached".
+    """
+    cached = os.path.exists(text_path)
+    if cached:
+        with open(text_path, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = extract_pdf_text(pdf_path)
+        _write_atomic(text_path, text.encode("utf-8"))
+    return {"chunks": chunk_text(text, max_tokens, overlap), "chars": len(text), "cached": cached}
+
+
+def create_fulltext_index(client, index_name=PATENT_INDEX, expected_patents=0):
+    """
+    Create the passage index next to the patent index, with the same vector mapping and embedding format.
+
+    Args:
+        client: OpenSearch client.
+        index_name (str): Patent index (or alias) the passages belong to.
+        expected_patents (int): Patents to size the shards for.
+    """
+    mapping = next(iter(client.indices.get_mapping(index=index_name).values()))["mappings"]
+    properties = mapping["properties"]
+    meta = mapping.get("_meta", {})
+    settings = shard_settings(
+        expected_patents * EXPECTED_CHUNKS_PER_PATENT, properties["embedding"].get("dimension", 0),
+        meta.get("embedding_precision", "float32"), layout="single",
+    )
+    client.indices.create(index=fulltext_index_name(index_name), body={
+        "mappings": {
+            "_meta": meta,
+            "properties": {
+                "patent_id": {"type": "keyword"},
+                "chunk": {"type": "integer"},
+                "text": {"type": "text"},
+                "title": {"type": "text"},
+                "publication_date": properties.get("publication_date", {"type": "date"}),
+                AREA_FIELD: {"type": "keyword"},
+                "embedding": properties["embedding"],
+            },
+        },
+        "settings": {"index.knn": True, **settings},
+    })
+    print(f"✅ Index '{fulltext_index_name(index_name)}' created for full-text passages.")
+
+
+class FullTextPipeline:
+    """
+    Download, extract, chunk, embed and index patent PDFs as one streaming pipeline.
+
+    Three stages run concurrently and hand work over bounded queues, so a
+    slow stage holds back the others instead of filling memory:
+    - concurrency downloads share one aiohttp connection pool, writing PDFs
+      to an on-disk cache keyed by URL;
+    - workers processes extract the text layer (cached next to the PDFs) and
+      split it into passages;
+    - one indexer embeds passages at bulk priority and writes them with bulk requests.
+    Each finished or failed patent is appended to a checkpoint file, so a
+    rerun resumes where the last one stopped and a cached PDF or text is
+    never fetched or extracted twice.
+    """
+
+    def __init__(self, client, index_name=PATENT_INDEX, concurrency=PDF_DOWNLOAD_CONCURRENCY, workers=PDF_EXTRACT_WORKERS):
+        self.client = client
+        self.index_name = index_name
+        self.fulltext_index = fulltext_index_name(index_name)
+        self.concurrency = max(concurrency, 1)
+        self.workers = max(workers, 1)
+        self.previous = {}
+        self.stats = {
+            "patents": 0, "downloaded": 0, "download_cached": 0, "download_bytes": 0, "text_cached": 0,
+            "indexed": 0, "no_text": 0, "failed": 0, "chunks": 0,
+            "busy_seconds": {"download": 0.0, "extract": 0.0, "index": 0.0},
+        }
+
+    def run(self, patents, previous=None):
+        """
+        Process patents; each needs "patent_id" and "pdf" and may carry "title", "publication_date" and AREA_FIELD.
+
+        Args:
+            patents (list): Patents to process.
+            previous (dict): Checkpoint records from earlier runs, used to delete passages a shorter text no longer has.
+
+        Returns:
+            dict: Counts per outcome, bytes downloaded and busy seconds per stage.
+        """
+        self.previous = previous or {}
+        self.stats["patents"] = len(patents)
+        started = time.perf_counter()
+        os.makedirs(os.path.dirname(_checkpoint_path(self.index_name)), exist_ok=True)
+        # One process is cheaper as a thread; extraction then competes with the event loop for the GIL
+        executor = ThreadPoolExecutor(1) if self.workers == 1 else ProcessPoolExecutor(self.workers)
+        with executor, open(_checkpoint_path(self.index_name), "a", encoding="utf-8") as checkpoint:
+            self._checkpoint = checkpoint
+            asyncio.run(self._run(patents, executor))
+        self.stats["seconds"] = round(time.perf_counter() - started, 3)
+        self.stats["busy_seconds"] = {stage: round(seconds, 3) for stage, seconds in self.stats["busy_seconds"].items()}
+        return self.stats
+
+    async def _run(self, patents, executor):
+        import aiohttp
+
+        pending = iter(patents)
+        downloaded = asyncio.Queue(maxsize=2 * self.workers)
+        extracted = asyncio.Queue(maxsize=FULLTEXT_INDEX_BATCH)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=PDF_DOWNLOAD_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            indexer = asyncio.create_task(self._index_stage(extracted))
+            extractors = [asyncio.create_task(self._extract_stage(downloaded, extracted, executor)) for _ in range(self.workers)]
+            await asyncio.gather(*(self._download_stage(session, pending, downloaded) for _ in range(self.concurrency)))
+            for _ in extractors:
+                await downloaded.put(None)
+            await asyncio.gather(*extractors)
+            await extracted.put(None)
+            await indexer
+
+    def _record(self, patent, status, **details):
+        self.stats[status] += 1
+        self._checkpoint.write(json.dumps({"patent_id": patent["patent_id"], "status": status, **details}) + "\n")
+        self._checkpoint.flush()
+
+    async def _download_stage(self, session, pending, downloaded):
+        # The download tasks share one iterator, so each patent is taken once
+        for patent in pending:
+            pdf_path, text_path = cache_paths(patent["pdf"])
+            if not os.path.exists(pdf_path) and not os.path.exists(text_path):
+                started = time.perf_counter()
+                try:
+                    size = await self._download(session, patent["pdf"], pdf_path)
+                    self.stats["download_bytes"] += size
+                    self.stats["downloaded"] += 1
+                except Exception as e:
+                    self._record(patent, "failed", stage="download", error=str(e) or type(e).__name__)
+                    continue
+                finally:
+                    self.stats["busy_seconds"]["download"] += time.perf_counter() - started
+            else:
+                self.stats["download_cached"] += 1
+            await downloaded.put((patent, pdf_path, text_path))
+
+    async def _download(self, session, url, path):
+        import aiohttp
+
+        for attempt in range(PDF_DOWNLOAD_RETRIES + 1):
+            try:
+                async with session.get(url) as response:
+                    if response.status not in RETRY_STATUSES or attempt == PDF_DOWNLOAD_RETRIES:
+                        response.raise_for_status()
+                        body = bytearray()
+                        async for block in response.content.iter_chunked(1 << 16):
+                            body += block
+                            if len(body) > PDF_MAX_BYTES:
+                                raise ValueError(f"PDF larger than {PDF_MAX_BYTES >> 20} MiB")
+                        if not body.startswith(b"%PDF"):
+                            raise ValueError("response is not a PDF")
+                        await asyncio.to_thread(_write_atomic, path, bytes(body))
+                        return len(body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == PDF_DOWNLOAD_RETRIES:
+                    raise
+            # Back off before retrying a busy or unreachable host
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def _extract_stage(self, downloaded, extracted, executor):
+        loop = asyncio.get_running_loop()
+        while (item := await downloaded.get()) is not None:
+            patent, pdf_path, text_path = item
+            started = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(executor, extract_and_chunk, pdf_path, text_path)
+            except Exception as e:
+                self._record(patent, "failed", stage="extract", error=str(e) or type(e).__name__)
+                continue
+            finally:
+                self.stats["busy_seconds"]["extract"] += time.perf_counter() - started
+            self.stats["text_cached"] += result["cached"]
+            await extracted.put((patent, result))
+
+    async def _index_stage(self, extracted):
+        while True:
+            item = await extracted.get()
+            batch, chunks = [], 0
+            # Take whatever else is ready, up to a batch, so passages are embedded in large requests
+            while item is not None:
+                batch.append(item)
+                chunks += len(item[1]["chunks"])
+                if chunks >= FULLTEXT_INDEX_BATCH or extracted.empty():
+                    break
+                item = extracted.get_nowait()
+            if batch:
+                await self._flush(batch)
+            if item is None:
+                return
+
+    async def _flush(self, batch):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._index_batch, batch)
+        except Exception as e:
+            # Recorded rather than raised, so the stages upstream never block on a dead indexer
+            for patent, _ in batch:
+                self._record(patent, "failed", stage="index", error=str(e) or type(e).__name__)
+            return
+        finally:
+            self.stats["busy_seconds"]["index"] += time.perf_counter() - started
+        for patent, result in batch:
+            status = "indexed" if result["chunks"] else "no_text"
+            self.stats["chunks"] += len(result["chunks"])
+            self._record(patent, status, chunks=len(result["chunks"]), chars=result["chars"])
+
+    def _index_batch(self, batch):
+        texts = [text for _, result in batch for text in result["chunks"]]
+        embeddings = iter(get_index_embeddings(texts, priority=PRIORITY_BULK) if texts else [])
+        actions = []
+        for patent, result in batch:
+            patent_id = patent["patent_id"]
+            for number, text in enumerate(result["chunks"]):
+                actions.append({"index": {"_index": self.fulltext_index, "_id": f"{patent_id}#{number}"}})
+                actions.append({
+                    "patent_id": patent_id,
+                    "chunk": number,
+                    "text": text,
+                    "title": patent.get("title"),
+                    "publication_date": patent.get("publication_date"),
+                    AREA_FIELD: patent.get(AREA_FIELD),
+                    "embedding": next(embeddings),
+                })
+            # Passages of an earlier, longer extraction of the same patent
+            for number in range(len(result["chunks"]), self.previous.get(patent_id, {}).get("chunks", 0)):
+                actions.append({"delete": {"_index": self.fulltext_index, "_id": f"{patent_id}#{number}"}})
+        if not actions:
+            return
+        response = self.client.bulk(body=actions, index=self.fulltext_index)
+        if response.get("errors"):
+            failed = [item for item in response["items"] if next(iter(item.values())).get("error")]
+            if any(next(iter(item.values())).get("status") != 404 for item in failed):
+                raise RuntimeError(f"{len(failed)} passages failed to index, e.g. {next(iter(failed[0].values()))['error']}")
+
+
+def extract_full_text(
+    client=None, index_name=PATENT_INDEX, concurrency=PDF_DOWNLOAD_CONCURRENCY, workers=PDF_EXTRACT_WORKERS,
+    limit=None, retry_failed=False, rebuild=False,
+):
+    """
+    Fetch and index the full text of every patent in the index that has a PDF link and has not been processed yet.
+
+    Args:
+        client: OpenSearch client; defaults to the shared client.
+        index_name (str): Patent index (or alias).
+        concurrency (int): Downloads in flight.
+        workers (int): Extraction processes.
+        limit (int): Process at most this many patents this run.
+        retry_failed (bool): Also retry patents whose download or extraction failed before.
+        rebuild (bool): Drop the passage index and checkpoint first; cached PDFs and texts are reused.
+
+    Returns:
+        dict: Pipeline statistics, plus the patents skipped as already done.
+    """
+    from patent_search_tools import stream_search_hits
+
+    client = client or get_shared_opensearch_client()
+    fulltext_index = fulltext_index_name(index_name)
+    if rebuild:
+        if client.indices.exists(index=fulltext_index):
+            print(f"⚠️ Deleting existing index: '{fulltext_index}' to rebuild it.")
+            client.indices.delete(index=fulltext_index)
+        if os.path.exists(_checkpoint_path(index_name)):
+            os.remove(_checkpoint_path(index_name))
+
+    previous = load_checkpoint(index_name)
+    finished = DONE_STATUSES if retry_failed else (*DONE_STATUSES, "failed")
+    patents, skipped = [], 0
+    for hit in stream_search_hits(source_fields=["patent_id", "pdf", "title", "publication_date", AREA_FIELD]):
+        patent = {"patent_id": hit["_id"], **hit["_source"]}
+        if not patent.get("pdf"):
+            continue
+        if previous.get(patent["patent_id"], {}).get("status") in finished:
+            skipped += 1
+            continue
+        if limit is not None and len(patents) >= limit:
+            break
+        patents.append(patent)
+
+    if not client.indices.exists(index=fulltext_index):
+        create_fulltext_index(client, index_name, len(patents) + skipped)
+    # Passages embedded with another model or format cannot be searched together; --rebuild re-embeds them
+    check_index_embedding_format(client, fulltext_index)
+    stats = FullTextPipeline(client, index_name, concurrency, workers).run(patents, previous)
+    client.indices.refresh(index=fulltext_index)
+    mark_index_updated(client, fulltext_index)
+    stats["skipped"] = skipped
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download patent PDFs, extract their full text and index it as searchable passages.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--index", default=PATENT_INDEX)
+    parser.add_argument("--concurrency", type=int, default=PDF_DOWNLOAD_CONCURRENCY, help="Downloads in flight.")
+    parser.add_argument("--workers", type=int, default=PDF_EXTRACT_WORKERS, help="Text extraction processes.")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most this many patents.")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry patents whose download or extraction failed.")
+    parser.add_argument("--rebuild", action="store_true", help="Re-embed every patent from the cached PDFs and texts.")
+    args = parser.parse_args()
+
+    client = get_shared_opensearch_client(args.host, args.port)
+    # Patents are listed through the search helpers, which use the default shared client
+    register_shared_opensearch_client(client)
+    stats = extract_full_text(client, args.index, args.concurrency, args.workers, args.limit, args.retry_failed, args.rebuild)
+    print(f"✅ {stats['indexed']} patents indexed as {stats['chunks']} passages in {stats['seconds']}s: "
+          f"{stats['downloaded']} downloaded ({stats['download_bytes'] / 2 ** 20:.1f} MiB), "
+          f"{stats['download_cached']} from cache, {stats['no_text']} without a text layer, "
+          f"{stats['failed']} failed, {stats['skipped']} already done.")
@@ -4,10 +4,21 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-api_key=os.getenv("SERP_API_KEY")
 
-if not api_key:
-    raise ValueError("SERP_API_KEY environment variable is not set.")
+def get_api_key():
+    """
+    Reads the SerpApi key when a SerpApi call is first made, so importing this module never fails.
+
+    Returns:
+        str: The SerpApi key.
+
+    Raises:
+        ValueError: If SERP_API_KEY is not set.
+    """
+    api_key = os.getenv("SERP_API_KEY")
+    if not api_key:
+        raise ValueError("SERP_API_KEY environment variable is not set.")
+    return api_key
 
 def get_serpapi_url(data):
     """
@@ -28,7 +39,7 @@ def get_serpapi_url(data):
     # Add API key to the URL if not already present
     if "api_key=" not in serapi_url:
         separator = "&" if "?" in serapi_url else "?"
-        serapi_url = f"{serapi_url}{separator}api_key={api_key}"
+        serapi_url = f"{serapi_url}{separator}api_key={get_api_key()}"
     return serapi_url
 
 
@@ -47,7 +58,7 @@ def get_data_from_serpapi(serpapi_url):
     """
 
     # Pass the API key as a parameter
-    params={"api_key": api_key}
+    params={"api_key": get_api_key()}
     response=requests.get(serpapi_url, params=params)
 
     if response.status_code == 200:
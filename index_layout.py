@@ -0,0 +1,282 @@
+import contextvars
+import math
+import os
+import re
+from contextlib import contextmanager
+
+# single: one index. routed: one index whose documents are routed to shards by research area.
+# per-area: one index per research area, all behind a read alias named after PATENT_INDEX.
+INDEX_LAYOUT = os.getenv("PATENT_INDEX_LAYOUT", "single")
+LAYOUTS = ("single", "routed", "per-area")
+AREA_FIELD = "research_area"
+# Area of patents ingested without one; in the per-area layout its index always exists, so the alias resolves
+DEFAULT_AREA = "general"
+# Documents to size shards for (per area index in the per-area layout); unset sizes for the index being replaced
+EXPECTED_DOCS = int(os.getenv("PATENT_EXPECTED_DOCS", 0))
+# Shard size to aim for; OpenSearch recommends 10-50 GB
+SHARD_TARGET_GB = float(os.getenv("PATENT_SHARD_TARGET_GB", 30))
+MAX_SHARDS = int(os.getenv("PATENT_MAX_SHARDS", 64))
+# Routing only narrows a search if areas can land on different shards
+ROUTED_MIN_SHARDS = int(os.getenv("PATENT_ROUTED_MIN_SHARDS", 8))
+# Most distinct research areas looked up when sizing per-area indices (OpenSearch's default result window)
+MAX_AREAS = 10000
+# Copies of each shard, capped by the data nodes available to hold them
+INDEX_REPLICAS = int(os.getenv("PATENT_INDEX_REPLICAS", 1))
+# Stored source, postings and doc values of one patent next to its vector
+TEXT_BYTES_PER_DOC = 6 * 1024
+# HNSW links of one vector: 2 * m (m=16) neighbours on the base layer as 4-byte ids, plus about 10% for upper layers
+GRAPH_BYTES_PER_DOC = 2 * 16 * 4 * 1.1
+
+_current_area = contextvars.ContextVar("research_area", default=None)
+
+
+@contextmanager
+def research_area_scope(research_area):
+    """Restrict the enclosed searches to one research area unless they name another."""
+    token = _current_area.set(research_area)
+    try:
+        yield
+    finally:
+        _current_area.reset(token)
+
+
+def current_research_area():
+    return _current_area.get()
+
+
+def area_key(research_area):
+    """Normalized area name stored in documents and used for routing and index names ('Lithium Battery' -> 'lithium-battery')."""
+    if not research_area:
+        return None
+    return re.sub(r"[^a-z0-9]+", "-", str(research_area).lower()).strip("-") or None
+
+
+def area_index_name(index_name, research_area):
+    return f"{index_name}-area-{area_key(research_area) or DEFAULT_AREA}"
+
+
+def _check_layout(layout):
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unsupported index layout '{layout}'; use one of {LAYOUTS}")
+
+
+def flatten_settings(settings, prefix=""):
+    """Index settings as dotted keys, e.g. {"index": {"knn": True}} -> {"index.knn": True}."""
+    flat = {}
+    for key, value in settings.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_settings(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def estimate_index_bytes(documents, dimension, precision="float32"):
+    """Rough primary-shard footprint of an index of patents with their vectors."""
+    from embedding_format import BYTES_PER_VALUE
+
+    return documents * (dimension * BYTES_PER_VALUE[precision] + GRAPH_BYTES_PER_DOC + TEXT_BYTES_PER_DOC)
+
+
+def shard_settings(documents, dimension, precision="float32", layout=INDEX_LAYOUT, data_nodes=None):
+    """
+    Shard and replica counts for an index expected to hold the given number of patents.
+
+    Args:
+        documents (int): Expected documents in the index (per area index in the per-area layout).
+        dimension (int): Stored vector dimension.
+        precision (str): Stored vector precision.
+        layout (str): Index layout; routed indices get at least ROUTED_MIN_SHARDS shards.
+        data_nodes (int): Data nodes in the cluster; replicas are capped so every copy has a node.
+
+    Returns:
+        dict: Flat index settings.
+    """
+    _check_layout(layout)
+    size_gb = estimate_index_bytes(documents, dimension, precision) / 2 ** 30
+    shards = max(1, math.ceil(size_gb / SHARD_TARGET_GB))
+    if layout == "routed":
+        shards = max(shards, ROUTED_MIN_SHARDS)
+    replicas = INDEX_REPLICAS if data_nodes is None else min(INDEX_REPLICAS, max(data_nodes - 1, 0))
+    return {"index.number_of_shards": min(shards, MAX_SHARDS), "index.number_of_replicas": replicas}
+
+
+def _data_nodes(client):
+    try:
+        return client.cluster.health()["number_of_data_nodes"]
+    except Exception:
+        return None
+
+
+def count_patents(client, index_name):
+    """Documents in an index or behind an alias; 0 if it does not exist."""
+    if not client.indices.exists(index=index_name):
+        return 0
+    return client.count(index=index_name)["count"]
+
+
+def area_counts(client, index_name):
+    """
+    Patents per research area in an index or behind an alias, in any layout.
+
+    Patents ingested without an area count toward DEFAULT_AREA, whose index they are written to.
+
+    Returns:
+        dict: Area key -> documents; empty if the index does not exist.
+    """
+    total = count_patents(client, index_name)
+    if not total:
+        return {}
+    # One hit per distinct area; there are far fewer areas than patents
+    response = client.search(index=index_name, body={
+        "size": MAX_AREAS,
+        "query": {"exists": {"field": AREA_FIELD}},
+        "collapse": {"field": AREA_FIELD},
+        "_source": [AREA_FIELD],
+    })
+    counts = {}
+    for hit in response["hits"]["hits"]:
+        area = hit["_source"][AREA_FIELD]
+        counts[area] = client.count(index=index_name, body={"query": {"term": {AREA_FIELD: area}}})["count"]
+    missing = total - sum(counts.values())
+    if missing:
+        counts[DEFAULT_AREA] = counts.get(DEFAULT_AREA, 0) + missing
+    return counts
+
+
+def index_documents(counts, layout=INDEX_LAYOUT):
+    """
+    Documents to size one index's shards for, given patents per area.
+
+    Area indices share one template and so one shard count, so in the
+    per-area layout each is sized for the largest area.
+    """
+    return max(counts.values(), default=0) if layout == "per-area" else sum(counts.values())
+
+
+def expected_index_documents(client, index_name, layout=INDEX_LAYOUT):
+    """Documents to size the shards of a replacement for index_name: EXPECTED_DOCS if set, else what it holds now."""
+    if EXPECTED_DOCS:
+        return EXPECTED_DOCS
+    if layout != "per-area":
+        return count_patents(client, index_name)
+    return index_documents(area_counts(client, index_name), layout)
+
+
+def drop_patent_index(client, index_name):
+    """Delete the index, or every area index behind the alias, and the per-area index template."""
+    if client.indices.exists_alias(name=index_name):
+        names = sorted(client.indices.get_alias(name=index_name))
+        print(f"⚠️ Deleting existing indices behind '{index_name}': {', '.join(names)}")
+        client.indices.delete(index=",".join(names))
+    elif client.indices.exists(index=index_name):
+        print(f"⚠️ Deleting existing index: '{index_name}' to recreate it.")
+        client.indices.delete(index=index_name)
+    if client.indices.exists_index_template(name=index_name):
+        client.indices.delete_index_template(name=index_name)
+
+
+def create_patent_index(client, index_name, body, expected_docs=0, layout=INDEX_LAYOUT):
+    """
+    Create the patent index in the configured layout.
+
+    Shard and replica counts are derived from expected_docs unless the body
+    sets them. In the per-area layout the mapping goes into an index template,
+    so each area index is created with it, and joins the alias, on its first
+    write; the default area's index is created right away.
+
+    Args:
+        client: OpenSearch client.
+        index_name (str): Index name, or alias name in the per-area layout.
+        body (dict): "mappings" and "settings" of the index.
+        expected_docs (int): Documents to size shards for.
+        layout (str): One of LAYOUTS.
+    """
+    _check_layout(layout)
+    from embedding_format import EMBEDDING_PRECISION
+
+    mappings = body.get("mappings", {})
+    dimension = mappings.get("properties", {}).get("embedding", {}).get("dimension", 0)
+    precision = mappings.get("_meta", {}).get("embedding_precision", EMBEDDING_PRECISION)
+    settings = {
+        **shard_settings(expected_docs, dimension, precision, layout, _data_nodes(client)),
+        **flatten_settings(body.get("settings", {})),
+    }
+    print(f"🧱 '{index_name}' layout: {layout}, {settings['index.number_of_shards']} shard(s), "
+          f"{settings['index.number_of_replicas']} replica(s)")
+
+    if layout != "per-area":
+        client.indices.create(index=index_name, body={"mappings": mappings, "settings": settings})
+        return
+    client.indices.put_index_template(name=index_name, body={
+        "index_patterns": [f"{index_name}-area-*"],
+        "template": {"settings": settings, "mappings": mappings, "aliases": {index_name: {}}},
+    })
+    client.indices.create(index=area_index_name(index_name, DEFAULT_AREA))
+
+
+def write_target(index_name, research_area=None, layout=INDEX_LAYOUT):
+    """
+    Where a patent of the given area is written.
+
+    Returns:
+        tuple: (index name, routing value or None).
+    """
+    key = area_key(research_area) or DEFAULT_AREA
+    if layout == "routed":
+        return index_name, key
+    if layout == "per-area":
+        return area_index_name(index_name, key), None
+    return index_name, None
+
+
+def search_target(index_name, research_area=None, layout=INDEX_LAYOUT):
+    """
+    Which index and shards a search scoped to the given area reads.
+
+    Unscoped searches read the whole index (or alias). Callers still filter
+    on AREA_FIELD: a routed shard also holds other areas' patents.
+
+    Returns:
+        tuple: (index name, extra keyword arguments for client.search/count).
+    """
+    key = area_key(research_area)
+    if key is None or layout == "single":
+        return index_name, {}
+    if layout == "routed":
+        return index_name, {"routing": key}
+    # An area nobody ingested has no index; that search simply finds nothing
+    return area_index_name(index_name, key), {"ignore_unavailable": True}
+
+
+def has_research_area(client, index_name, research_area, layout=INDEX_LAYOUT):
+    """Whether any patent was ingested under the area."""
+    key = area_key(research_area)
+    if key is None or not client.indices.exists(index=index_name):
+        return False
+    index, params = search_target(index_name, key, layout)
+    return client.count(index=index, body={"query": {"term": {AREA_FIELD: key}}}, **params)["count"] > 0
+
+
+def locate_documents(client, index_name, doc_ids, layout=INDEX_LAYOUT):
+    """
+    Concrete index and routing of existing documents, for updates and deletes by id.
+
+    Outside the single layout a document id alone does not say which index or
+    shard holds it, so the ids are looked up with a search, which visits every shard.
+
+    Returns:
+        dict: document id -> (index name, routing or None).
+    """
+    if layout == "single":
+        return {doc_id: (index_name, None) for doc_id in doc_ids}
+    locations = {}
+    for start in range(0, len(doc_ids), 1000):
+        batch = doc_ids[start:start + 1000]
+        response = client.search(
+            index=index_name, body={"size": len(batch), "query": {"ids": {"values": batch}}, "_source": False}
+        )
+        for hit in response["hits"]["hits"]:
+            locations[hit["_id"]] = (hit["_index"], hit.get("_routing"))
+    return locations
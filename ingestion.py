@@ -1,18 +1,172 @@
+import argparse
 import json
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import tiktoken
 
-from embeddings import get_embedding
-from opensearch_client import create_index_if_not_exists, get_opensearch_client
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
+from citation_graph import CITATION_GRAPH_DIR, build_citation_graph, load_citation_graph
+from dedup import MinHashDeduplicator
+from embedding_format import check_index_embedding_format, get_index_embeddings
+from embedding_scheduler import PRIORITY_BULK
+from index_layout import AREA_FIELD, DEFAULT_AREA, INDEX_LAYOUT, area_key, locate_documents, write_target
+from opensearch_client import PATENT_INDEX, create_index_if_not_exists, get_opensearch_client
+from semantic_cache import mark_index_updated
+from topic_clusters import get_cluster_model
+from trend_rollups import get_trend_rollups
 
-def load_patent_data(dir_path):
+# Parse/tokenize worker processes; defaults to one per CPU
+INGEST_WORKERS = int(os.getenv("PATENT_INGEST_WORKERS", 0)) or os.cpu_count() or 1
+# Files handed to a worker at a time; larger shards amortize inter-process overhead
+PARSE_SHARD_SIZE = 64
+
+_encoding = None
+
+
+def get_jurisdiction(data):
+    """Two-letter patent office code (US, EP, CN, ...) taken from the publication number."""
+    number = data.get("publication_number") or data.get("search_parameters", {}).get("patent_id", "")
+    number = number.split("/")[1] if number.startswith("patent/") else number
+    return number[:2].upper() if len(number) >= 2 and number[:2].isalpha() else None
+
+
+def get_assignees(data):
+    """Assignee names; SerpApi returns plain strings, some payloads use {'name': ...} objects."""
+    assignees = data.get("assignees") or []
+    return [a.get("name") if isinstance(a, dict) else a for a in assignees if a]
+
+
+def get_cpc_groups(data):
+    """CPC main groups (H01M10, H01M4, ...) the patent is classified in; these are the rollups' sub-technologies."""
+    groups = set()
+    for classification in data.get("classifications") or []:
+        code = classification.get("code", "") if isinstance(classification, dict) else str(classification)
+        # Section, class and subclass entries of the hierarchy have no '/' and are too broad to trend on
+        if "/" in code and (not isinstance(classification, dict) or classification.get("is_cpc", True)):
+            groups.add(code.split("/")[0].replace(" ", "").upper())
+    return sorted(groups)
+
+
+def _read_json(file_path):
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _get_encoding():
+    global _encoding
+    # Loaded once per worker process
+    if _encoding is None:
+        _encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+    return _encoding
+
+
+def _count_tokens(text):
+    return len(_get_encoding().encode(text))
+
+
+def chunk_text(text, max_tokens=400, overlap=50):
+    """
+    Split text into windows of at most max_tokens tokens for embedding.
+
+    Consecutive windows share overlap tokens, so a sentence cut at a boundary
+    is still whole in one of them.
+
+    Args:
+        text (str): Text to split.
+        max_tokens (int): Tokens per chunk.
+        overlap (int): Tokens repeated from the end of the previous chunk.
+
+    Returns:
+        list: Chunk texts, in order; empty for blank text.
+    """
+    encoding = _get_encoding()
+    tokens = encoding.encode(text)
+    step = max(max_tokens - overlap, 1)
+    chunks = []
+    for start in range(0, len(tokens), step):
+        chunk = encoding.decode(tokens[start:start + max_tokens]).strip()
+        if chunk:
+            chunks.append(chunk)
+        if start + max_tokens >= len(tokens):
+            break
+    return chunks
+
+
+def parse_patent_file(file_path):
+    """
+    Parse one SerpApi payload down to the fields that get indexed.
+
+    Citation lists and claims stay in the worker; only this compact record is
+    sent back to the parent process.
+
+    Args:
+        file_path (str): Path to a patent JSON file.
+
+    Returns:
+        dict: Compact patent record with its token count.
+    """
+    data = _read_json(file_path)
+    abstract = data.get("abstract", "")
+    return {
+        "file": os.path.basename(file_path),
+        "title": data.get("title"),
+        "pdf": data.get("pdf"),
+        "publication_date": data.get("publication_date"),
+        "patent_id": data.get("search_parameters", {}).get("patent_id", None),
+        "family_id": data.get("family_id"),
+        "assignees": get_assignees(data),
+        "jurisdiction": get_jurisdiction(data),
+        "cpc_groups": get_cpc_groups(data),
+        "abstract": abstract,
+        "token_count": _count_tokens(abstract),
+    }
+
+
+def _parse_shard(file_paths):
+    return [parse_patent_file(file_path) for file_path in file_paths]
+
+
+def parse_patent_files(dir_path, workers=None):
+    """
+    Parse and tokenize every JSON file in a directory, in parallel across processes.
+
+    Args:
+        dir_path (str): Directory containing patent JSON files.
+        workers (int): Number of worker processes; 1 parses in this process. Defaults to INGEST_WORKERS.
+
+    Returns:
+        list: Compact records in sorted file-name order, regardless of worker count.
+    """
+    file_paths = [os.path.join(dir_path, file) for file in sorted(os.listdir(dir_path)) if file.endswith(".json")]
+    shards = [file_paths[i:i + PARSE_SHARD_SIZE] for i in range(0, len(file_paths), PARSE_SHARD_SIZE)]
+    workers = min(workers or INGEST_WORKERS, len(shards)) if shards else 1
+
+    if workers <= 1:
+        return [record for shard in shards for record in _parse_shard(shard)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map yields shards in submission order, so the output order is deterministic
+        return [record for shard in executor.map(_parse_shard, shards) for record in shard]
+
+
+def load_patent_data(dir_path, workers=None):
     """
     Load patent data from JSON files in the specified directory.
 
+    Parsing and tokenization run in a process pool; deduplication and
+    embedding then run in file order. Exact duplicates are dropped before
+    embedding and near-duplicates (MinHash/LSH over the abstract) share a
+    family_key.
+
     Args:
         dir_path (str): Path to the directory containing JSON files.
+        workers (int): Parse/tokenize worker processes. Defaults to INGEST_WORKERS.
 
     Returns:
         list: A list of dictionaries containing patent data.
@@ -20,70 +174,120 @@ def load_patent_data(dir_path):
     if not os.path.exists(dir_path):
         raise FileNotFoundError(f"The directory '{dir_path}' does not exist.")
 
-    all_files = os.listdir(dir_path)
     chunks = []
+    deduplicator = MinHashDeduplicator()
+    skipped = 0
+
+    for record in parse_patent_files(dir_path, workers):
+        file = record.pop("file")
+        family_id = record.pop("family_id")
+        patent_id = record["patent_id"]
+
+        # Citations are often harvested under several parents; store one copy and skip embedding it again
+        _, duplicate_of = deduplicator.add(patent_id or file, record["title"], record["abstract"], family_id)
+        if duplicate_of is not None:
+            skipped += 1
+            continue
 
-    for file in all_files:
-        if file.endswith(".json"):
-            file_path = os.path.join(dir_path, file)
-            with open(file_path, "r") as f:
-                data = json.load(f)
-
-            title = data.get("title")
-            pdf = data.get("pdf")
-            publication_date = data.get("publication_date")
-            patent_id = data.get("search_parameters", {}).get("patent_id", None)
-            abstract = data.get("abstract", "")
-            token_count = len(
-                tiktoken.encoding_for_model("gpt-3.5-turbo").encode(abstract)
-            )
-            embedding = get_embedding(abstract)
-
-            chunks.append(
-                {
-                    "title": title,
-                    "pdf": pdf,
-                    "publication_date": publication_date,
-                    "patent_id": patent_id,
-                    "abstract": abstract,
-                    "token_count": token_count,
-                    "embedding": embedding,
-                }
-            )
+        record["_dedup_id"] = patent_id or file
+        chunks.append(record)
 
+    # Bulk priority: the scheduler batches these and keeps slots free for interactive searches
+    embeddings = get_index_embeddings([chunk["abstract"] for chunk in chunks], priority=PRIORITY_BULK)
+    for chunk, embedding in zip(chunks, embeddings):
+        chunk["embedding"] = embedding
+
+    # Families can merge as more documents arrive, so keys are assigned once everything is seen
+    for chunk in chunks:
+        chunk["family_key"] = deduplicator.family_key(chunk.pop("_dedup_id"))
+
+    if skipped:
+        print(f"Skipped {skipped} exact duplicate documents.")
     return chunks
 
 
 # Index opensearch data
-def index_patent_data(client, index_name, patent_data):
+def index_patent_data(client, index_name, patent_data, research_area=None):
     """
     Index patent data into OpenSearch.
 
     Args:
         client: OpenSearch client instance.
-        index_name (str): Name of the index to store the patent data.
+        index_name (str): Name of the index (or per-area alias) to store the patent data.
         patent_data (list): List of dictionaries containing patent data.
+        research_area (str): Research area the patents were collected for; decides their
+            shard or index outside the single layout.
     """
+    check_index_embedding_format(client, index_name)
+    # Once the index has been clustered, new patents join the nearest topic as they are written
+    cluster_model = get_cluster_model(index_name)
+    if cluster_model is not None:
+        cluster_model.assign_patents(patent_data)
+    target_index, routing = write_target(index_name, research_area)
+    if INDEX_LAYOUT != "single":
+        # A patent ingested before under another area lives in another index or shard; move it rather than copy it
+        patent_ids = [patent["patent_id"] for patent in patent_data if patent.get("patent_id")]
+        for patent_id, (index, previous_routing) in locate_documents(client, index_name, patent_ids).items():
+            if (index, previous_routing) != (target_index, routing):
+                client.delete(index=index, id=patent_id, routing=previous_routing)
+    ingested_at = time.time_ns() // 1_000_000
     for patent in patent_data:
-        client.index(index=index_name, body=patent)
+        patent["ingested_at"] = ingested_at
+        patent[AREA_FIELD] = area_key(research_area) or DEFAULT_AREA
+        # Using the patent id as document id lets citation lookups fetch documents directly with mget
+        client.index(index=target_index, body=patent, id=patent.get("patent_id"), routing=routing)
+    # Cached query results no longer reflect the index
+    mark_index_updated(client, index_name)
+    # Counted per document as it is written, so trend queries never have to scan the index
+    get_trend_rollups(index_name).upsert(patent_data)
     print(f"Indexed {len(patent_data)} patents into '{index_name}' index.")
 
 
+def delete_patent_data(client, index_name, patent_ids):
+    """
+    Delete patents from OpenSearch and from the trend rollups.
+
+    Args:
+        client: OpenSearch client instance.
+        index_name (str): Name of the index holding the patents.
+        patent_ids (list): Ids of the patents to delete.
+    """
+    deleted = 0
+    for patent_id, (index, routing) in locate_documents(client, index_name, list(patent_ids)).items():
+        response = client.delete(index=index, id=patent_id, routing=routing, ignore=[404])
+        deleted += response.get("result") == "deleted"
+    mark_index_updated(client, index_name)
+    get_trend_rollups(index_name).delete(patent_ids)
+    print(f"Deleted {deleted} patents from '{index_name}' index.")
+
+
 if __name__ == "__main__":
-    dir_path = "results"
+    parser = argparse.ArgumentParser(description="Parse, embed and index harvested SerpApi patent files.")
+    parser.add_argument("dir_path", nargs="?", default="results")
+    parser.add_argument("--area", default=None, help="Research area the files were collected for.")
+    parser.add_argument("--append", action="store_true", help="Add to the existing index instead of recreating it.")
+    args = parser.parse_args()
+    dir_path = args.dir_path
 
     host = "localhost"
     port = 9200
     client = get_opensearch_client(host, port)
-    index_name = "patents"
-    create_index_if_not_exists(client, index_name)
+    index_name = PATENT_INDEX
+    if not (args.append and client.indices.exists(index=index_name)):
+        create_index_if_not_exists(client, index_name)
 
     try:
         patent_data = load_patent_data(dir_path)
         print(f"Loaded {len(patent_data)} patents from '{dir_path}'")
 
-        index_patent_data(client, index_name, patent_data)
+        index_patent_data(client, index_name, patent_data, args.area)
         print(f"Indexed {len(patent_data)} patents into '{index_name}' index.")
+
+        # An appended area's citations join the graph of the areas ingested before it
+        base = load_citation_graph(CITATION_GRAPH_DIR) if args.append else None
+        graph = build_citation_graph(dir_path, base)
+        graph.save(CITATION_GRAPH_DIR)
+        print(f"Saved citation graph with {graph.num_nodes} patents and {graph.num_edges} citations to '{CITATION_GRAPH_DIR}'.")
     
     except Exception as e:
-        print(f"Error: {e}")
\ No newline at end of file
+        print(f"Error: {e}")
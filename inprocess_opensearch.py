@@ -0,0 +1,791 @@
+import fnmatch
+import math
+import re
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from functools import cmp_to_key
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# BM25 parameters, matching the OpenSearch defaults
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def analyze(text):
+    """Lowercase word tokenizer approximating the OpenSearch standard analyzer."""
+    return TOKEN_PATTERN.findall(str(text or "").lower())
+
+
+def _query_terms(query, terms):
+    """Collect the analyzed match terms of a query per field, for highlighting."""
+    if isinstance(query, dict):
+        for key, value in query.items():
+            if key == "match":
+                for field, spec in value.items():
+                    terms[field].update(analyze(spec.get("query") if isinstance(spec, dict) else spec))
+            elif key == "multi_match":
+                for field in value.get("fields", []):
+                    terms[field.split("^")[0]].update(analyze(value.get("query")))
+            else:
+                _query_terms(value, terms)
+    elif isinstance(query, list):
+        for item in query:
+            _query_terms(item, terms)
+    return terms
+
+
+def _normalize_date(value):
+    """Bring a date-like value into a sortable 'YYYY-MM-DD' string."""
+    if value is None:
+        return None
+    value = str(value)
+    if re.fullmatch(r"\d{4}", value):
+        return f"{value}-01-01"
+    return value[:10]
+
+
+class _InProcessIndex:
+    """One shard of an index: documents, postings and vectors."""
+
+    def __init__(self, name, body, number=0):
+        self.name = name
+        self.number = number
+        self.body = body or {}
+        properties = self.body.get("mappings", {}).get("properties", {})
+        self.text_fields = [field for field, spec in properties.items() if spec.get("type") == "text"]
+        self.date_fields = [field for field, spec in properties.items() if spec.get("type") == "date"]
+        self.vector_field = next(
+            (field for field, spec in properties.items() if spec.get("type") == "knn_vector"), None
+        )
+        self.dimension = properties.get(self.vector_field, {}).get("dimension") if self.vector_field else None
+
+        self.ids = []
+        self.id_to_row = {}
+        self.sources = []
+        self.routings = []
+        self.deleted = set()
+        self.postings = defaultdict(lambda: defaultdict(dict))  # field -> term -> {row: tf}
+        self.lengths = defaultdict(list)  # field -> [length per row]
+        self.total_length = defaultdict(int)  # field -> summed length of live rows
+        self.vectors = []
+        self._matrix = None
+
+    def put(self, doc_id, source, routing=None):
+        source = dict(source)
+        vector = source.pop(self.vector_field, None) if self.vector_field else None
+
+        if doc_id in self.id_to_row:
+            self.delete(doc_id)
+        row = len(self.ids)
+        self.ids.append(doc_id)
+        self.id_to_row[doc_id] = row
+        self.sources.append(source)
+        self.routings.append(routing)
+
+        for field in self.text_fields:
+            tokens = analyze(source.get(field))
+            self.lengths[field].append(len(tokens))
+            self.total_length[field] += len(tokens)
+            for term, tf in Counter(tokens).items():
+                self.postings[field][term][row] = tf
+
+        if self.vector_field:
+            if vector is None:
+                vector = np.zeros(self.dimension or 0, dtype=np.float32)
+            vector = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            self.vectors.append(vector / norm if norm else vector)
+            self._matrix = None
+
+    def update(self, doc_id, partial):
+        row = self.id_to_row.get(doc_id)
+        merged = self.source_of(row) if row is not None else {}
+        merged.update(partial)
+        self.put(doc_id, merged, self.routings[row] if row is not None else None)
+
+    def delete(self, doc_id):
+        row = self.id_to_row.pop(doc_id, None)
+        if row is None:
+            return False
+        self.deleted.add(row)
+        for field in self.text_fields:
+            self.total_length[field] -= self.lengths[field][row]
+        return True
+
+    def live_rows(self):
+        return [row for row in range(len(self.ids)) if row not in self.deleted]
+
+    def matrix(self):
+        if self._matrix is None:
+            self._matrix = np.vstack(self.vectors) if self.vectors else np.zeros((0, self.dimension or 0), np.float32)
+        return self._matrix
+
+    def source_of(self, row, includes=None):
+        source = self.sources[row]
+        if includes is None:
+            source = dict(source)
+            if self.vector_field:
+                source[self.vector_field] = self.vectors[row].tolist()
+            return source
+        selected = {field: source[field] for field in includes if field in source}
+        if self.vector_field in includes:
+            selected[self.vector_field] = self.vectors[row].tolist()
+        return selected
+
+
+class _ShardedIndex:
+    """
+    An index split into number_of_shards shards.
+
+    As in OpenSearch, a document lives on the shard its routing value (by
+    default its id) hashes to, so reads and writes of a routed document must
+    pass the same routing, and a routed search only visits that shard.
+    """
+
+    def __init__(self, name, body):
+        self.name = name
+        self.body = body or {}
+        count = int(_flatten_settings(self.body.get("settings", {})).get("index.number_of_shards") or 1)
+        self.shards = [_InProcessIndex(name, self.body, number) for number in range(count)]
+
+    def shard_for(self, doc_id, routing=None):
+        key = str(routing if routing is not None else doc_id)
+        return self.shards[zlib.crc32(key.encode("utf-8")) % len(self.shards)]
+
+    def routed_shards(self, routing=None):
+        if routing is None:
+            return list(self.shards)
+        values = routing.split(",") if isinstance(routing, str) else list(routing)
+        shards = []
+        for value in values:
+            shard = self.shard_for(None, value)
+            if shard not in shards:
+                shards.append(shard)
+        return shards
+
+    def doc_count(self):
+        return sum(len(shard.id_to_row) for shard in self.shards)
+
+
+def _merge_template(template, body):
+    """Index body from a matching index template with the explicit create body layered on top."""
+    template = template.get("template", {})
+    body = body or {}
+    settings = {**_flatten_settings(template.get("settings", {})), **_flatten_settings(body.get("settings", {}))}
+    mappings = dict(template.get("mappings", {}))
+    mappings.update({key: value for key, value in body.get("mappings", {}).items() if key != "properties"})
+    mappings["properties"] = {**template.get("mappings", {}).get("properties", {}), **body.get("mappings", {}).get("properties", {})}
+    return {
+        "settings": settings,
+        "mappings": mappings,
+        "aliases": {**template.get("aliases", {}), **body.get("aliases", {})},
+    }
+
+
+def _flatten_settings(settings, prefix=""):
+    """Settings as dotted keys ("index.knn"), the form OpenSearch returns with flat_settings."""
+    flat = {}
+    for key, value in settings.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten_settings(value, f"{name}."))
+        else:
+            flat[name] = value
+    return flat
+
+
+class _Indices:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def exists(self, index, **kwargs):
+        return index in self._backend._indices or index in self._backend._aliases
+
+    def create(self, index, body=None, **kwargs):
+        with self._backend._lock:
+            if index in self._backend._indices or index in self._backend._aliases:
+                raise ValueError(f"resource_already_exists_exception: index [{index}] already exists")
+            self._backend._create(index, body)
+        return {"acknowledged": True, "index": index}
+
+    def delete(self, index, **kwargs):
+        with self._backend._lock:
+            names = [name for pattern in str(index).split(",") for name in fnmatch.filter(self._backend._indices, pattern)]
+            for name in names:
+                self._backend._indices.pop(name, None)
+                for members in self._backend._aliases.values():
+                    members.discard(name)
+            self._backend._aliases = {alias: members for alias, members in self._backend._aliases.items() if members}
+        return {"acknowledged": True}
+
+    def refresh(self, index=None, **kwargs):
+        return {"_shards": {"failed": 0}}
+
+    def get_mapping(self, index, **kwargs):
+        return {target.name: {"mappings": target.body.get("mappings", {})} for target in self._backend._resolve(index)}
+
+    def put_mapping(self, body, index=None, **kwargs):
+        for target in self._backend._resolve(index):
+            mappings = target.body.setdefault("mappings", {})
+            if "_meta" in body:
+                mappings["_meta"] = body["_meta"]
+            mappings.setdefault("properties", {}).update(body.get("properties", {}))
+        return {"acknowledged": True}
+
+    def get_settings(self, index, flat_settings=False, **kwargs):
+        response = {}
+        for target in self._backend._resolve(index):
+            settings = _flatten_settings(target.body.get("settings", {}))
+            if not flat_settings:
+                nested = {}
+                for key, value in settings.items():
+                    *parents, leaf = key.split(".")
+                    branch = nested
+                    for parent in parents:
+                        branch = branch.setdefault(parent, {})
+                    branch[leaf] = value
+                settings = nested
+            response[target.name] = {"settings": settings}
+        return response
+
+    def put_settings(self, body, index=None, **kwargs):
+        for target in self._backend._resolve(index):
+            settings = _flatten_settings(target.body.get("settings", {}))
+            settings.update(_flatten_settings(body.get("settings", body)))
+            target.body["settings"] = settings
+        return {"acknowledged": True}
+
+    def put_alias(self, index, name, **kwargs):
+        with self._backend._lock:
+            for target in self._backend._resolve(index):
+                self._backend._aliases.setdefault(name, set()).add(target.name)
+        return {"acknowledged": True}
+
+    def delete_alias(self, index, name, **kwargs):
+        with self._backend._lock:
+            for target in self._backend._resolve(index):
+                self._backend._aliases.get(name, set()).discard(target.name)
+            self._backend._aliases = {alias: members for alias, members in self._backend._aliases.items() if members}
+        return {"acknowledged": True}
+
+    def exists_alias(self, name, index=None, **kwargs):
+        return name in self._backend._aliases
+
+    def get_alias(self, index=None, name=None, **kwargs):
+        aliases = self._backend._aliases
+        if name is not None and name not in aliases:
+            raise KeyError(f"alias [{name}] missing")
+        names = [target.name for target in self._backend._resolve(index)] if index else sorted(self._backend._indices)
+        return {
+            index_name: {"aliases": {alias: {} for alias, members in aliases.items()
+                                     if index_name in members and name in (None, alias)}}
+            for index_name in names
+            if name is None or index_name in aliases[name]
+        }
+
+    def put_index_template(self, name, body, **kwargs):
+        self._backend._templates[name] = body
+        return {"acknowledged": True}
+
+    def exists_index_template(self, name, **kwargs):
+        return name in self._backend._templates
+
+    def delete_index_template(self, name, **kwargs):
+        self._backend._templates.pop(name, None)
+        return {"acknowledged": True}
+
+
+class _Cat:
+    def __init__(self, backend):
+        self._backend = backend
+
+    def indices(self, format="json", **kwargs):
+        return [
+            {"index": name, "docs.count": str(index.doc_count()), "pri": str(len(index.shards))}
+            for name, index in self._backend._indices.items()
+        ]
+
+
+class InProcessOpenSearch:
+    """
+    Minimal in-memory stand-in for the opensearch-py client.
+
+    Supports the subset of the API used by this project (index, bulk, mget,
+    search with match/multi_match/term/terms/range/exists/bool/knn queries, field
+    collapsing, sort/search_after and point-in-time, plus shards with custom
+    routing, aliases and index templates) so that benchmarks and offline runs
+    can exercise the real search code paths without a running cluster.
+    Vectors are held in a NumPy matrix per shard and scored with cosine
+    similarity; text fields are scored with BM25 using per-shard statistics.
+    """
+
+    def __init__(self):
+        self._indices = {}
+        self._aliases = {}
+        self._templates = {}
+        self._pits = {}
+        self._lock = threading.RLock()
+        self.indices = _Indices(self)
+        self.cat = _Cat(self)
+
+    def ping(self, **kwargs):
+        return True
+
+    def info(self, **kwargs):
+        return {"cluster_name": "in-process", "version": {"number": "2.11.0-inprocess"}}
+
+    def _create(self, name, body=None):
+        template = self._template_for(name)
+        body = _merge_template(template, body) if template else (body or {})
+        self._indices[name] = _ShardedIndex(name, body)
+        for alias in body.get("aliases", {}):
+            self._aliases.setdefault(alias, set()).add(name)
+        return self._indices[name]
+
+    def _template_for(self, name):
+        matching = [
+            template for template in self._templates.values()
+            if any(fnmatch.fnmatchcase(name, pattern) for pattern in template.get("index_patterns", []))
+        ]
+        return max(matching, key=lambda template: template.get("priority", 0)) if matching else None
+
+    def _resolve(self, names, ignore_unavailable=False):
+        """Indices behind a comma-separated list of index names, aliases and wildcards."""
+        resolved = []
+        for name in str(names).split(","):
+            if name in self._aliases:
+                candidates = sorted(self._aliases[name])
+            elif "*" in name:
+                candidates = sorted(fnmatch.filter(self._indices, name))
+            elif name in self._indices:
+                candidates = [name]
+            elif ignore_unavailable:
+                candidates = []
+            else:
+                raise KeyError(f"index_not_found_exception: no such index [{name}]")
+            resolved.extend(self._indices[candidate] for candidate in candidates if self._indices[candidate] not in resolved)
+        return resolved
+
+    def _index(self, name):
+        """The single index a document operation targets; an alias must point at exactly one."""
+        if name in self._aliases:
+            if len(self._aliases[name]) != 1:
+                raise ValueError(
+                    f"illegal_argument_exception: alias [{name}] has more than one index associated with it, "
+                    "can't execute a single index op"
+                )
+            name = next(iter(self._aliases[name]))
+        if name not in self._indices:
+            raise KeyError(f"index_not_found_exception: no such index [{name}]")
+        return self._indices[name]
+
+    def _write_index(self, name):
+        # Like OpenSearch, writing to a missing index creates it when an index template matches
+        if name not in self._indices and name not in self._aliases and self._template_for(name):
+            return self._create(name)
+        return self._index(name)
+
+    def index(self, index, body, id=None, routing=None, **kwargs):
+        with self._lock:
+            doc_id = id or uuid.uuid4().hex
+            target = self._write_index(index)
+            target.shard_for(doc_id, routing).put(doc_id, body, routing)
+        return {"_index": target.name, "_id": doc_id, "result": "created"}
+
+    def delete(self, index, id, routing=None, **kwargs):
+        with self._lock:
+            target = self._index(index)
+            found = target.shard_for(id, routing).delete(id)
+        return {"_index": target.name, "_id": id, "result": "deleted" if found else "not_found"}
+
+    def bulk(self, body, index=None, routing=None, **kwargs):
+        """Accepts the action/source pairs produced for the bulk API (as a list of dicts)."""
+        items = []
+        lines = list(body)
+        position = 0
+        with self._lock:
+            while position < len(lines):
+                action = lines[position]
+                op, meta = next(iter(action.items()))
+                doc_routing = meta.get("routing", meta.get("_routing", routing))
+                if op == "delete":
+                    target = self._index(meta.get("_index", index))
+                    target.shard_for(meta.get("_id"), doc_routing).delete(meta.get("_id"))
+                    items.append({op: {"_index": target.name, "_id": meta.get("_id"), "status": 200}})
+                    position += 1
+                    continue
+                source = lines[position + 1]
+                doc_id = meta.get("_id") or uuid.uuid4().hex
+                target = self._write_index(meta.get("_index", index))
+                shard = target.shard_for(doc_id, doc_routing)
+                if op == "update":
+                    shard.update(doc_id, source.get("doc", source))
+                else:
+                    shard.put(doc_id, source, doc_routing)
+                items.append({op: {"_index": target.name, "_id": doc_id, "status": 201}})
+                position += 2
+        return {"took": 0, "errors": False, "items": items}
+
+    def mget(self, body, index=None, **kwargs):
+        docs = []
+        with self._lock:
+            for entry in body.get("docs") or [{"_id": doc_id} for doc_id in body.get("ids", [])]:
+                target = self._index(entry.get("_index", index))
+                shard = target.shard_for(entry["_id"], entry.get("routing", kwargs.get("routing")))
+                row = shard.id_to_row.get(entry["_id"])
+                if row is None:
+                    docs.append({"_index": target.name, "_id": entry["_id"], "found": False})
+                else:
+                    includes = entry.get("_source", kwargs.get("_source"))
+                    includes = includes.split(",") if isinstance(includes, str) else includes
+                    includes = includes if isinstance(includes, list) else None
+                    docs.append(
+                        {"_index": target.name, "_id": entry["_id"], "found": True,
+                         "_source": shard.source_of(row, includes)}
+                    )
+        return {"docs": docs}
+
+    def _shards(self, index, routing=None, ignore_unavailable=False):
+        return [
+            shard for target in self._resolve(index, ignore_unavailable) for shard in target.routed_shards(routing)
+        ]
+
+    def count(self, index, body=None, routing=None, ignore_unavailable=False, **kwargs):
+        with self._lock:
+            query = (body or {}).get("query", {"match_all": {}})
+            count = sum(len(self._evaluate(shard, query)) for shard in self._shards(index, routing, ignore_unavailable))
+        return {"count": count}
+
+    def create_pit(self, index, params=None, routing=None, **kwargs):
+        """Open a point in time; documents indexed afterwards are invisible to searches through it."""
+        routing = routing or (params or {}).get("routing")
+        with self._lock:
+            pit_id = uuid.uuid4().hex
+            self._pits[pit_id] = [(shard, len(shard.ids)) for shard in self._shards(index, routing)]
+        return {"pit_id": pit_id, "creation_time": int(time.time() * 1000)}
+
+    def delete_pit(self, body=None, **kwargs):
+        with self._lock:
+            removed = [{"pit_id": pit_id, "successful": self._pits.pop(pit_id, None) is not None}
+                       for pit_id in (body or {}).get("pit_id", [])]
+        return {"pits": removed}
+
+    def search(self, index=None, body=None, routing=None, ignore_unavailable=False, **kwargs):
+        started = time.perf_counter()
+        body = body or {}
+        with self._lock:
+            if body.get("pit"):
+                pit_id = body["pit"]["id"]
+                if pit_id not in self._pits:
+                    raise KeyError(f"search_context_missing_exception: no point in time [{pit_id}]")
+                shards = self._pits[pit_id]
+            else:
+                shards = [(shard, None) for shard in self._shards(index, routing, ignore_unavailable)]
+            size = body.get("size", 10)
+            sort = body.get("sort")
+            if sort:
+                sort = sort if isinstance(sort, list) else [sort]
+            collapse_field = body.get("collapse", {}).get("field")
+
+            # Query phase: every shard returns its own top hits, which are then merged
+            total = 0
+            candidates = []
+            for order, (shard, visible_rows) in enumerate(shards):
+                matched, ranked = self._search_shard(shard, body, visible_rows, sort, collapse_field, size)
+                total += matched
+                candidates.extend((order, shard, row, score, values) for row, score, values in ranked)
+            if sort:
+                candidates.sort(key=cmp_to_key(lambda a, b: self._compare_sort(a[4], b[4], sort) or a[0] - b[0]))
+            else:
+                candidates.sort(key=lambda item: (-item[3], item[0], item[2]))
+            if collapse_field:
+                seen = set()
+                collapsed = []
+                for candidate in candidates:
+                    value = candidate[1].sources[candidate[2]].get(collapse_field)
+                    if value is not None and value in seen:
+                        continue
+                    seen.add(value)
+                    collapsed.append(candidate)
+                candidates = collapsed
+
+            includes = body.get("_source")
+            includes = [] if includes is False else includes if isinstance(includes, list) else None
+            highlight_terms = None
+            if body.get("highlight"):
+                terms = _query_terms(body["highlight"].get("highlight_query") or body.get("query", {}), defaultdict(set))
+                highlight_terms = {
+                    field: re.compile(r"\b(?:%s)\b" % "|".join(map(re.escape, sorted(words, key=len, reverse=True))), re.IGNORECASE)
+                    for field, words in terms.items() if words
+                }
+            hits = []
+            for _, shard, row, score, values in candidates[:size]:
+                hit = {"_index": shard.name, "_id": shard.ids[row], "_score": score, "_source": shard.source_of(row, includes)}
+                if shard.routings[row] is not None:
+                    hit["_routing"] = shard.routings[row]
+                if values is not None:
+                    hit["sort"] = values
+                if highlight_terms is not None:
+                    highlight = self._highlight(shard, row, body["highlight"], highlight_terms)
+                    if highlight:
+                        hit["highlight"] = highlight
+                hits.append(hit)
+        response = {
+            "took": int((time.perf_counter() - started) * 1000),
+            "timed_out": False,
+            "_shards": {"total": len(shards), "successful": len(shards), "failed": 0},
+            "hits": {
+                "total": {"value": total, "relation": "eq"},
+                "max_score": hits[0]["_score"] if hits else None,
+                "hits": hits,
+            },
+        }
+        if body.get("pit"):
+            response["pit_id"] = body["pit"]["id"]
+        return response
+
+    def _search_shard(self, shard, body, visible_rows, sort, collapse_field, size):
+        """Match count and top (row, score, sort values) of one shard."""
+        scores = self._evaluate(shard, body.get("query", {"match_all": {}}))
+        if visible_rows is not None:
+            scores = {row: score for row, score in scores.items() if row < visible_rows}
+        if sort:
+            keyed = [(row, score, self._sort_values(shard, row, score, sort)) for row, score in scores.items()]
+            keyed.sort(key=cmp_to_key(lambda a, b: self._compare_sort(a[2], b[2], sort)))
+            if body.get("search_after") is not None:
+                after = body["search_after"]
+                keyed = [item for item in keyed if self._compare_sort(item[2], after, sort) > 0]
+        else:
+            keyed = [(row, score, None) for row, score in sorted(scores.items(), key=lambda item: (-item[1], item[0]))]
+        if collapse_field:
+            keyed = self._collapse(shard, keyed, collapse_field)
+        return len(scores), keyed[:size]
+
+    @staticmethod
+    def _sort_fields(sort):
+        for entry in sort:
+            if isinstance(entry, str):
+                yield entry, "desc" if entry == "_score" else "asc"
+            else:
+                field, spec = next(iter(entry.items()))
+                yield field, spec.get("order", "asc") if isinstance(spec, dict) else spec
+
+    def _sort_values(self, target, row, score, sort):
+        values = []
+        for field, _ in self._sort_fields(sort):
+            if field == "_score":
+                values.append(score)
+            elif field == "_id":
+                values.append(target.ids[row])
+            elif field == "_shard_doc":
+                # Unique per document within a point in time, like OpenSearch's shard and Lucene doc id
+                values.append([target.name, target.number, row])
+            else:
+                values.append(target.sources[row].get(field))
+        return values
+
+    def _compare_sort(self, first, second, sort):
+        for (_, order), a, b in zip(self._sort_fields(sort), first, second):
+            if a == b:
+                continue
+            # Missing values sort last in either direction, as in OpenSearch
+            if a is None or b is None:
+                return 1 if a is None else -1
+            result = -1 if a < b else 1
+            return result if order == "asc" else -result
+        return 0
+
+    def _highlight(self, target, row, spec, terms):
+        """Approximate the unified highlighter: one fragment around the first matching term per field."""
+        pre_tag = spec.get("pre_tags", ["<em>"])[0]
+        post_tag = spec.get("post_tags", ["</em>"])[0]
+        highlight = {}
+        for field, options in spec.get("fields", {}).items():
+            text = str(target.sources[row].get(field) or "")
+            size = options.get("fragment_size", 100)
+            pattern = terms.get(field)
+            first = pattern.search(text) if pattern else None
+            if first is None:
+                if options.get("no_match_size"):
+                    fragment = text[:options["no_match_size"]]
+                    highlight[field] = [fragment.rsplit(" ", 1)[0] if len(text) > len(fragment) else fragment]
+                continue
+            start = max(0, min(first.start() - size // 4, len(text) - size))
+            fragment = text[start:start + size]
+            # Fragments break on word boundaries
+            if start > 0 and " " in fragment:
+                fragment = fragment.split(" ", 1)[1]
+            if start + size < len(text) and " " in fragment:
+                fragment = fragment.rsplit(" ", 1)[0]
+            highlight[field] = [pattern.sub(lambda m: f"{pre_tag}{m.group()}{post_tag}", fragment)]
+        return highlight
+
+    def _collapse(self, target, ranked, field):
+        seen = set()
+        collapsed = []
+        for entry in ranked:
+            value = target.sources[entry[0]].get(field)
+            if value is not None and value in seen:
+                continue
+            seen.add(value)
+            collapsed.append(entry)
+        return collapsed
+
+    # Query evaluation: each clause returns {row: score} for the rows it matches
+
+    def _evaluate(self, target, query):
+        kind, spec = next(iter(query.items()))
+        handler = getattr(self, f"_query_{kind}", None)
+        if handler is None:
+            raise ValueError(f"Unsupported query type for in-process backend: {kind}")
+        return handler(target, spec)
+
+    def _query_match_all(self, target, spec):
+        return {row: 1.0 for row in target.live_rows()}
+
+    def _bm25(self, target, field, text):
+        postings = target.postings[field]
+        lengths = target.lengths[field]
+        live = len(target.id_to_row)
+        if not live:
+            return {}
+        average_length = target.total_length[field] / live
+        scores = defaultdict(float)
+        for term in set(analyze(text)):
+            rows = {row: tf for row, tf in postings.get(term, {}).items() if row not in target.deleted}
+            if not rows:
+                continue
+            idf = math.log(1 + (live - len(rows) + 0.5) / (len(rows) + 0.5))
+            for row, tf in rows.items():
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[row] / (average_length or 1))
+                scores[row] += idf * tf * (BM25_K1 + 1) / norm
+        return dict(scores)
+
+    def _query_match(self, target, spec):
+        field, value = next(iter(spec.items()))
+        text = value.get("query") if isinstance(value, dict) else value
+        scores = self._bm25(target, field, text)
+        if isinstance(value, dict) and str(value.get("operator", "or")).lower() == "and":
+            postings = target.postings[field]
+            terms = set(analyze(text))
+            scores = {row: score for row, score in scores.items() if all(row in postings.get(term, {}) for term in terms)}
+        return scores
+
+    def _query_multi_match(self, target, spec):
+        scores = defaultdict(float)
+        for field in spec.get("fields", target.text_fields):
+            field = field.split("^")[0]
+            for row, score in self._bm25(target, field, spec["query"]).items():
+                scores[row] = max(scores[row], score)
+        return dict(scores)
+
+    def _field_value(self, target, row, field):
+        value = target.sources[row].get(field)
+        return _normalize_date(value) if field in target.date_fields else value
+
+    def _query_term(self, target, spec):
+        field, value = next(iter(spec.items()))
+        value = value.get("value") if isinstance(value, dict) else value
+        return {row: 1.0 for row in target.live_rows() if target.sources[row].get(field) == value}
+
+    def _query_exists(self, target, spec):
+        field = spec["field"]
+        return {row: 1.0 for row in target.live_rows() if target.sources[row].get(field) not in (None, [])}
+
+    def _query_terms(self, target, spec):
+        field, values = next((key, val) for key, val in spec.items() if key != "boost")
+        wanted = set(values)
+        matched = {}
+        for row in target.live_rows():
+            value = target.sources[row].get(field)
+            candidates = value if isinstance(value, list) else [value]
+            if wanted.intersection(candidates):
+                matched[row] = 1.0
+        return matched
+
+    def _query_ids(self, target, spec):
+        return {target.id_to_row[doc_id]: 1.0 for doc_id in spec.get("values", []) if doc_id in target.id_to_row}
+
+    def _query_range(self, target, spec):
+        field, bounds = next(iter(spec.items()))
+        is_date = field in target.date_fields
+        convert = _normalize_date if is_date else (lambda v: v)
+        gte, lte = convert(bounds.get("gte")), convert(bounds.get("lte"))
+        gt, lt = convert(bounds.get("gt")), convert(bounds.get("lt"))
+        matched = {}
+        for row in target.live_rows():
+            value = self._field_value(target, row, field)
+            if value is None:
+                continue
+            if gte is not None and value < gte or lte is not None and value > lte:
+                continue
+            if gt is not None and value <= gt or lt is not None and value >= lt:
+                continue
+            matched[row] = 1.0
+        return matched
+
+    def _query_knn(self, target, spec):
+        field, params = next(iter(spec.items()))
+        if field != target.vector_field or not target.vectors:
+            return {}
+        query_vector = np.asarray(params["vector"], dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm:
+            query_vector = query_vector / norm
+
+        allowed = None
+        if params.get("filter"):
+            allowed = np.fromiter(self._evaluate(target, params["filter"]).keys(), dtype=np.int64)
+            if not len(allowed):
+                return {}
+
+        similarities = target.matrix() @ query_vector
+        if target.deleted:
+            similarities[list(target.deleted)] = -np.inf
+        if allowed is not None:
+            mask = np.full(similarities.shape, -np.inf, dtype=similarities.dtype)
+            mask[allowed] = 0
+            similarities = similarities + mask
+
+        k = min(params.get("k", 10), len(similarities))
+        top = np.argpartition(-similarities, k - 1)[:k] if k else []
+        # cosinesimil score as reported by the OpenSearch k-NN plugin
+        return {int(row): float(1 / (2 - similarities[row])) for row in top if np.isfinite(similarities[row])}
+
+    def _query_bool(self, target, spec):
+        def clauses(key):
+            value = spec.get(key, [])
+            return value if isinstance(value, list) else [value]
+
+        candidate = None
+        scores = defaultdict(float)
+        for clause in clauses("must"):
+            matched = self._evaluate(target, clause)
+            candidate = set(matched) if candidate is None else candidate & set(matched)
+            for row, score in matched.items():
+                scores[row] += score
+        for clause in clauses("filter"):
+            matched = self._evaluate(target, clause)
+            candidate = set(matched) if candidate is None else candidate & set(matched)
+
+        should_hits = defaultdict(int)
+        for clause in clauses("should"):
+            for row, score in self._evaluate(target, clause).items():
+                scores[row] += score
+                should_hits[row] += 1
+
+        minimum_should = spec.get("minimum_should_match", 0 if clauses("must") or clauses("filter") else 1)
+        if candidate is None:
+            candidate = set(should_hits) if minimum_should else set(target.live_rows())
+        if minimum_should:
+            candidate = {row for row in candidate if should_hits[row] >= int(minimum_should)}
+        for clause in clauses("must_not"):
+            candidate -= set(self._evaluate(target, clause))
+
+        return {row: scores.get(row, 0.0) for row in candidate}
@@ -0,0 +1,421 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from index_layout import current_research_area
+from ollama_pool import get_ollama_pool
+from opensearch_client import PATENT_INDEX, get_shared_opensearch_client
+from semantic_cache import index_data_version
+from tracing import set_span_attribute
+
+DEFAULT_CACHE_PATH = os.getenv("PATENT_LLM_CACHE_PATH", "outputs/cache/llm_cache.sqlite3")
+DEFAULT_TTL_SECONDS = int(os.getenv("PATENT_LLM_CACHE_TTL", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("PATENT_LLM_CACHE_MAX_ENTRIES", 20000))
+
+# Completions sampled above this temperature are not deterministic enough to reuse
+MAX_CACHEABLE_TEMPERATURE = float(os.getenv("PATENT_LLM_CACHE_MAX_TEMPERATURE", 0.3))
+
+
+def cache_disabled():
+    return os.getenv("PATENT_LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+
+def normalize_prompt(prompt):
+    """
+    Normalize a prompt so that whitespace-only differences share a cache entry.
+
+    Args:
+        prompt (str | list | dict): Prompt text or chat messages.
+
+    Returns:
+        str: Canonical prompt string.
+    """
+    if not isinstance(prompt, str):
+        prompt = json.dumps(prompt, sort_keys=True, default=str)
+    return " ".join(prompt.split())
+
+
+_model_digests = {}
+
+
+def get_model_digest(model_name):
+    """
+    Look up the digest of an Ollama model so re-pulled weights invalidate the cache.
+
+    Digests are remembered for the life of the process once Ollama has
+    answered; while no endpoint is reachable the lookup is retried next time.
+
+    Args:
+        model_name (str): Ollama model name, with or without the 'ollama/' prefix.
+
+    Returns:
+        str: The model digest, or the model name if Ollama cannot be reached or lacks the model.
+    """
+    name = model_name.split("/", 1)[1] if model_name.startswith("ollama/") else model_name
+    if name in _model_digests:
+        return _model_digests[name]
+    try:
+        models = get_ollama_pool().list_models()
+    except Exception as e:
+        print(f"⚠️ Could not fetch digest for '{name}': {e}")
+        return name
+    digest = next(
+        (model.get("digest") for model in models if model.get("name") in (name, f"{name}:latest")), None
+    ) or name
+    _model_digests[name] = digest
+    return digest
+
+
+def is_cacheable(params):
+    """
+    Check whether a completion with the given sampling params may be cached.
+
+    Args:
+        params (dict): Sampling parameters of the call.
+
+    Returns:
+        bool: False when caching is disabled or the temperature is too high.
+    """
+    if cache_disabled():
+        return False
+    temperature = (params or {}).get("temperature")
+    if temperature is None:
+        return True
+    try:
+        return float(temperature) <= MAX_CACHEABLE_TEMPERATURE
+    except (TypeError, ValueError):
+        return False
+
+
+def make_cache_key(prompt, model, params=None):
+    """
+    Build a content-addressed key from the normalized prompt, model digest and params.
+
+    Args:
+        prompt (str | list | dict): Prompt text or chat messages.
+        model (str): Model digest (or name when the digest is unknown).
+        params (dict): Sampling parameters.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    payload = json.dumps(
+        {"prompt": normalize_prompt(prompt), "model": model, "params": params or {}},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Persistent SQLite store for LLM completions and tool results with TTL and LRU eviction.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON completions(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._conn.commit()
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 100:
+                self._evict_locked()
+
+    def evict(self):
+        with self._lock:
+            self._evict_locked()
+
+    def _evict_locked(self):
+        self._writes_since_evict = 0
+        self._conn.execute("DELETE FROM completions WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._conn.execute(
+            """
+            DELETE FROM completions WHERE key IN (
+                SELECT key FROM completions ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide LLM response cache, opening it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = LLMResponseCache()
+        return _default_cache
+
+
+def tool_output_cacheable(output):
+    """Error strings are returned rather than raised by the tools; don't pin them in the cache."""
+    return isinstance(output, str) and not output.startswith("Error")
+
+
+def cached_tool_call(tool_name, arguments, compute, index_names=(PATENT_INDEX,), cacheable=tool_output_cacheable):
+    """
+    Return a cached crew tool result, computing and storing it on a miss.
+
+    The key includes the data_version of every index the tool reads, so
+    results cached before the last ingestion are never served.
+
+    Args:
+        tool_name (str): Name of the CrewAI tool.
+        arguments (dict): Keyword arguments the tool was called with.
+        compute (callable): Zero-argument function producing the tool output.
+        index_names (tuple): Indices the tool's result depends on.
+        cacheable (callable): Whether a computed result may be stored.
+
+    Returns:
+        The tool output, as computed by compute.
+    """
+    if cache_disabled():
+        return compute()
+
+    cache = get_llm_cache()
+    try:
+        client = get_shared_opensearch_client()
+        versions = {index_name: index_data_version(client, index_name) for index_name in index_names}
+    except Exception:
+        # Without the index versions a cached result may be stale; let the tool report the search error itself
+        return compute()
+    # The same call answers differently inside a research area scope
+    scope = current_research_area()
+    key = make_cache_key(
+        {"arguments": arguments, "research_area": scope, "data_versions": versions}, f"tool:{tool_name}"
+    )
+    cached = cache.get(key)
+    set_span_attribute("cache_hit", cached is not None)
+    if cached is not None:
+        return cached
+
+    result = compute()
+    if cacheable(result):
+        cache.set(key, result)
+    return result
+
+
+def _parse_llm_string(llm_string):
+    """Pull the model name and temperature out of LangChain's serialized llm_string."""
+    model = re.search(r"""['"]model['"]\s*[,:]\s*['"]([^'"]+)['"]""", llm_string)
+    temperature = re.search(r"""['"]temperature['"]\s*[,:]\s*([0-9.]+)""", llm_string)
+    return (
+        model.group(1) if model else None,
+        float(temperature.group(1)) if temperature else None,
+    )
+
+
+try:
+    from langchain_core.caches import BaseCache as _LangChainBaseCache
+    from langchain_core.outputs import Generation
+except ImportError:  # langchain_core is only needed when the crew is used
+    _LangChainBaseCache = object
+    Generation = None
+
+
+class OllamaLangChainCache(_LangChainBaseCache):
+    """
+    LangChain cache adapter so `OllamaLLM` generations are served from `LLMResponseCache`.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or get_llm_cache()
+
+    def _key(self, prompt, llm_string):
+        model, temperature = _parse_llm_string(llm_string)
+        if not is_cacheable({"temperature": temperature}):
+            return None
+        digest = get_model_digest(model) if model else "unknown"
+        return make_cache_key(prompt, digest, {"llm_string": llm_string})
+
+    def lookup(self, prompt, llm_string):
+        key = self._key(prompt, llm_string)
+        if key is None:
+            return None
+        texts = self.store.get(key)
+        if texts is None:
+            return None
+        return [Generation(text=text) for text in texts]
+
+    def update(self, prompt, llm_string, return_val):
+        key = self._key(prompt, llm_string)
+        if key is not None:
+            self.store.set(key, [generation.text for generation in return_val])
+
+    def clear(self, **kwargs):
+        self.store.clear()
+
+
+try:
+    from litellm.caching.base_cache import BaseCache as _LiteLLMBaseCache
+    from litellm.caching.caching import Cache as _LiteLLMCache
+except ImportError:  # litellm ships with crewai; fall back to a plain base otherwise
+    _LiteLLMBaseCache = object
+    _LiteLLMCache = object
+
+
+class LiteLLMCacheAdapter(_LiteLLMBaseCache):
+    """
+    LiteLLM cache backend so CrewAI agent completions are served from `LLMResponseCache`.
+    """
+
+    def __init__(self, store=None):
+        self.store = store or get_llm_cache()
+
+    def _key(self, key):
+        return make_cache_key(key, "litellm")
+
+    def set_cache(self, key, value, **kwargs):
+        self.store.set(self._key(key), value)
+
+    async def async_set_cache(self, key, value, **kwargs):
+        self.set_cache(key, value, **kwargs)
+
+    async def async_set_cache_pipeline(self, cache_list, **kwargs):
+        for key, value in cache_list:
+            self.set_cache(key, value, **kwargs)
+
+    def get_cache(self, key, **kwargs):
+        return self.store.get(self._key(key))
+
+    async def async_get_cache(self, key, **kwargs):
+        return self.get_cache(key, **kwargs)
+
+    def batch_cache_write(self, key, value, **kwargs):
+        self.set_cache(key, value, **kwargs)
+
+    async def disconnect(self):
+        pass
+
+
+class ModelDigestLiteLLMCache(_LiteLLMCache):
+    """
+    Process-wide LiteLLM cache whose keys include the Ollama digest of each call's model.
+
+    LiteLLM already derives its key from the model, messages and sampling params;
+    the digest is looked up per call, so crews on different models can share the
+    cache and re-pulled weights miss.
+    """
+
+    def get_cache_key(self, *args, **kwargs):
+        model = kwargs.get("model")
+        return make_cache_key(super().get_cache_key(*args, **kwargs), get_model_digest(model) if model else "unknown")
+
+
+def enable_llm_cache(model_name, temperature):
+    """
+    Route LangChain and CrewAI (LiteLLM) completions through the persistent cache.
+
+    Both caches are process-wide and key every completion by the digest of
+    the model it was made with, so enabling them for another model is safe.
+    A temperature too high to cache removes them again.
+
+    Args:
+        model_name (str): Ollama model name used by the crew.
+        temperature (float): Sampling temperature used by the crew.
+
+    Returns:
+        bool: True if caching was enabled.
+    """
+    from langchain_core.globals import set_llm_cache
+
+    if not is_cacheable({"temperature": temperature}):
+        # An earlier cacheable run in this process may have installed the caches; sampled outputs must bypass them
+        set_llm_cache(None)
+        try:
+            import litellm
+
+            if isinstance(litellm.cache, ModelDigestLiteLLMCache):
+                litellm.cache = None
+        except ImportError:
+            pass
+        print(f"ℹ️ LLM cache disabled (temperature={temperature}).")
+        return False
+
+    set_llm_cache(OllamaLangChainCache())
+
+    try:
+        import litellm
+
+        if not isinstance(litellm.cache, ModelDigestLiteLLMCache):
+            litellm.cache = ModelDigestLiteLLMCache(type="local")
+            litellm.cache.cache = LiteLLMCacheAdapter()
+    except Exception as e:
+        print(f"⚠️ Could not enable LiteLLM cache for crew agents: {e}")
+
+    print(f"✅ LLM response cache enabled at {get_llm_cache().path}")
+    return True
+
+
+if __name__ == "__main__":
+    cache = get_llm_cache()
+    cache.evict()
+    print(json.dumps(cache.stats(), indent=2))
@@ -0,0 +1,299 @@
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+# Comma-separated Ollama URLs, or a file with one URL per line (or a JSON list)
+OLLAMA_HOSTS = os.getenv("OLLAMA_HOSTS", "")
+OLLAMA_HOSTS_FILE = os.getenv("OLLAMA_HOSTS_FILE", "")
+
+# Seconds a request may wait for a response before the endpoint counts as failed; callers can pass their own
+OLLAMA_REQUEST_TIMEOUT = float(os.getenv("OLLAMA_REQUEST_TIMEOUT", 120))
+# Consecutive failures that open an endpoint's circuit, and how long it stays open
+FAILURE_THRESHOLD = 3
+COOLDOWN_SECONDS = 30.0
+# How often an endpoint's loaded models (/api/ps) are re-read for model affinity
+AFFINITY_REFRESH_SECONDS = 15.0
+
+
+def normalize_model_name(model_name):
+    """Strip the LiteLLM 'ollama/' prefix and add Ollama's implicit ':latest' tag."""
+    if not model_name:
+        return None
+    name = model_name.split("/", 1)[1] if model_name.startswith("ollama/") else model_name
+    return name if ":" in name else f"{name}:latest"
+
+
+def _is_connection_failure(error):
+    # requests, LiteLLM and httpx all name their transport errors this way
+    name = type(error).__name__
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)) or (
+        "Connection" in name or "Timeout" in name
+    )
+
+
+class OllamaEndpoint:
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.loaded_models = set()
+        self.models_checked_at = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def available(self, now):
+        # Once the cooldown passes the endpoint is tried again; another failure re-opens it
+        return now >= self.open_until
+
+    def snapshot(self):
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "circuit_open": time.monotonic() < self.open_until,
+            "loaded_models": sorted(self.loaded_models),
+        }
+
+
+class OllamaPool:
+    """
+    Routes Ollama requests across several hosts.
+
+    Each request goes to the healthy endpoint with the fewest requests in
+    flight, preferring endpoints that already have the requested model
+    loaded. Connection failures and 5xx responses count against an endpoint;
+    after FAILURE_THRESHOLD in a row its circuit opens and it is skipped for
+    the cooldown, then retried.
+    """
+
+    def __init__(self, urls, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN_SECONDS,
+                 affinity_refresh=AFFINITY_REFRESH_SECONDS):
+        if not urls:
+            raise ValueError("OllamaPool needs at least one endpoint URL")
+        self.endpoints = [OllamaEndpoint(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.affinity_refresh = affinity_refresh
+        self._lock = threading.Lock()
+        self._rotation = itertools.count()
+
+    @property
+    def urls(self):
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def _refresh_loaded_models(self, endpoints, now):
+        for endpoint in endpoints:
+            if now - endpoint.models_checked_at < self.affinity_refresh:
+                continue
+            endpoint.models_checked_at = now
+            try:
+                response = requests.get(f"{endpoint.url}/api/ps", timeout=2)
+                response.raise_for_status()
+                endpoint.loaded_models = {
+                    normalize_model_name(model.get("name")) for model in response.json().get("models", [])
+                }
+            except Exception:
+                # Affinity is only a preference; request failures are what open the circuit
+                pass
+
+    def choose(self, model=None, exclude=()):
+        """
+        Pick the endpoint for the next request.
+
+        Args:
+            model (str): Model the request needs, for affinity routing.
+            exclude (iterable): Endpoints already tried for this request.
+
+        Returns:
+            OllamaEndpoint: Chosen endpoint, or None if every endpoint was excluded.
+        """
+        model = normalize_model_name(model)
+        now = time.monotonic()
+        candidates = [endpoint for endpoint in self.endpoints if endpoint not in exclude]
+        if not candidates:
+            return None
+        healthy = [endpoint for endpoint in candidates if endpoint.available(now)]
+        if not healthy:
+            # Everything is open: try whichever endpoint recovers first rather than failing outright
+            healthy = [min(candidates, key=lambda endpoint: endpoint.open_until)]
+        if model:
+            self._refresh_loaded_models(healthy, now)
+            warm = [endpoint for endpoint in healthy if model in endpoint.loaded_models]
+            healthy = warm or healthy
+        with self._lock:
+            fewest = min(endpoint.outstanding for endpoint in healthy)
+            tied = [endpoint for endpoint in healthy if endpoint.outstanding == fewest]
+            return tied[next(self._rotation) % len(tied)]
+
+    def _record(self, endpoint, ok, model=None):
+        with self._lock:
+            if ok:
+                endpoint.consecutive_failures = 0
+                endpoint.open_until = 0.0
+                if model:
+                    endpoint.loaded_models.add(normalize_model_name(model))
+            else:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.failure_threshold:
+                    now = time.monotonic()
+                    if now >= endpoint.open_until:
+                        print(f"⚠️ Ollama endpoint {endpoint.url} marked unhealthy for {self.cooldown:.0f}s")
+                    endpoint.open_until = now + self.cooldown
+
+    @contextmanager
+    def lease(self, model=None, exclude=()):
+        """
+        Reserve an endpoint for work done by another client (LangChain, LiteLLM).
+
+        Yields the endpoint URL; the lease counts as one outstanding request
+        until the block exits. Connection errors raised inside the block
+        count against the endpoint.
+
+        Args:
+            model (str): Model the work needs, for affinity routing.
+            exclude (iterable): Endpoints not to use.
+        """
+        endpoint = self.choose(model, exclude)
+        if endpoint is None:
+            raise ConnectionError("No Ollama endpoint available")
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        try:
+            yield endpoint.url
+        except Exception as e:
+            self._record(endpoint, not _is_connection_failure(e), model)
+            raise
+        else:
+            self._record(endpoint, True, model)
+        finally:
+            with self._lock:
+                endpoint.outstanding -= 1
+
+    def request(self, method, path, model=None, **kwargs):
+        """
+        Send an HTTP request to the best endpoint, failing over to the others.
+
+        Args:
+            method (str): HTTP method.
+            path (str): API path such as '/api/embeddings'.
+            model (str): Model the request needs, for affinity routing.
+            **kwargs: Passed to requests.request; timeout defaults to OLLAMA_REQUEST_TIMEOUT.
+
+        Returns:
+            requests.Response: The first response that is not a connection failure or 5xx.
+        """
+        # Without a timeout a host that accepts the connection and then hangs would never fail over
+        kwargs.setdefault("timeout", OLLAMA_REQUEST_TIMEOUT)
+        tried = []
+        last_error = None
+        while len(tried) < len(self.endpoints):
+            endpoint = self.choose(model, exclude=tried)
+            tried.append(endpoint)
+            with self._lock:
+                endpoint.outstanding += 1
+                endpoint.requests += 1
+            try:
+                response = requests.request(method, f"{endpoint.url}{path}", **kwargs)
+            except Exception as e:
+                if not _is_connection_failure(e):
+                    raise
+                self._record(endpoint, False)
+                last_error = e
+                continue
+            finally:
+                with self._lock:
+                    endpoint.outstanding -= 1
+            if response.status_code >= 500:
+                self._record(endpoint, False)
+                last_error = requests.HTTPError(f"{response.status_code} from {endpoint.url}: {response.text}")
+                continue
+            self._record(endpoint, True, model if response.ok else None)
+            return response
+        raise ConnectionError(f"All Ollama endpoints failed: {last_error}")
+
+    def list_models(self, timeout=5):
+        """
+        Union of the models available on every reachable endpoint, as /api/tags entries.
+
+        Raises:
+            ConnectionError: If no endpoint answered.
+        """
+        models = {}
+        answered, last_error = False, None
+        for endpoint in self.endpoints:
+            try:
+                response = requests.get(f"{endpoint.url}/api/tags", timeout=timeout)
+                response.raise_for_status()
+            except Exception as e:
+                if _is_connection_failure(e):
+                    self._record(endpoint, False)
+                last_error = e
+                continue
+            answered = True
+            for model in response.json().get("models", []):
+                models.setdefault(model.get("name"), model)
+        if not answered:
+            raise ConnectionError(f"All Ollama endpoints failed: {last_error}")
+        return list(models.values())
+
+    def stats(self):
+        return [endpoint.snapshot() for endpoint in self.endpoints]
+
+
+def read_ollama_hosts(hosts=OLLAMA_HOSTS, hosts_file=OLLAMA_HOSTS_FILE):
+    """
+    Endpoint URLs from OLLAMA_HOSTS, OLLAMA_HOSTS_FILE or OLLAMA_BASE_URL, in that order.
+
+    Returns:
+        list: Ollama base URLs.
+    """
+    if hosts:
+        return [url.strip() for url in hosts.split(",") if url.strip()]
+    if hosts_file:
+        with open(hosts_file, "r", encoding="utf-8") as f:
+            content = f.read().strip()
+        if content.startswith("["):
+            return json.loads(content)
+        return [line.strip() for line in content.splitlines() if line.strip() and not line.startswith("#")]
+    return [os.getenv("OLLAMA_BASE_URL", DEFAULT_OLLAMA_URL)]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ollama_pool():
+    """Process-wide endpoint pool, built from the environment on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OllamaPool(read_ollama_hosts())
+        return _pool
+
+
+def set_ollama_pool(pool_or_urls):
+    """
+    Replace the process-wide pool, e.g. with local stub servers.
+
+    Args:
+        pool_or_urls: An OllamaPool, a list of URLs or a single URL.
+
+    Returns:
+        OllamaPool: The installed pool.
+    """
+    global _pool
+    if isinstance(pool_or_urls, str):
+        pool_or_urls = [pool_or_urls]
+    with _pool_lock:
+        _pool = pool_or_urls if isinstance(pool_or_urls, OllamaPool) else OllamaPool(pool_or_urls)
+        return _pool
@@ -1,12 +1,24 @@
+import os
+import threading
+
 from opensearchpy import OpenSearch
 
-def get_opensearch_client(host, port):
+# Name of the patent index; override to point tools and benchmarks at another index
+PATENT_INDEX = os.getenv("PATENT_INDEX", "patents")
+
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_opensearch_client(host, port, pool_maxsize=None):
+    extra = {"pool_maxsize": pool_maxsize} if pool_maxsize else {}
     client = OpenSearch(
         hosts=[{"host": host, "port": port}],
         http_compress=True,
         timeout=30,
         max_retries=3,
         retry_on_timeout=True,
+        **extra,
     )
 
     if client.ping():
@@ -21,6 +33,42 @@ def get_opensearch_client(host, port):
     return client
 
 
+def get_shared_opensearch_client(host="localhost", port=9200, pool_maxsize=16):
+    """
+    Return a process-wide OpenSearch client, connecting on first use.
+
+    The client is thread-safe and keeps a pool of HTTP connections, so search
+    functions and crew tools reuse warm connections instead of reconnecting
+    (and re-pinging the cluster) on every call.
+
+    Args:
+        host (str): OpenSearch host
+        port (int): OpenSearch port
+        pool_maxsize (int): Maximum number of pooled connections per host
+
+    Returns:
+        OpenSearch: Shared client instance
+    """
+    key = (host, port)
+    with _shared_clients_lock:
+        if key not in _shared_clients:
+            _shared_clients[key] = get_opensearch_client(host, port, pool_maxsize=pool_maxsize)
+        return _shared_clients[key]
+
+
+def register_shared_opensearch_client(client, host="localhost", port=9200):
+    """
+    Install a client (e.g. the in-process backend) as the shared client for host and port.
+
+    Args:
+        client: OpenSearch-compatible client
+        host (str): Host key the client is registered under
+        port (int): Port key the client is registered under
+    """
+    with _shared_clients_lock:
+        _shared_clients[(host, port)] = client
+
+
 def create_index_if_not_exists(client, index_name):
     """
     Create an OpenSearch index with proper mapping for vector search if it doesn't exist.
@@ -29,21 +77,26 @@ def create_index_if_not_exists(client, index_name):
         client: Opensearch client instance
         index_name: Name of the index to create
     """
+    from embedding_format import EMBEDDING_DIMENSION, EMBEDDING_PRECISION, embedding_metadata, knn_field_mapping, shape_embedding
     from embeddings import get_embedding
+    from index_layout import AREA_FIELD, create_patent_index, drop_patent_index, expected_index_documents
 
+    # Shards are sized for the corpus being replaced (its largest area, per area index) unless PATENT_EXPECTED_DOCS says otherwise
+    expected_docs = expected_index_documents(client, index_name)
     # Delete the index if it exists (for clean re-creation)
-    if client.indices.exists(index=index_name):
-        print(f"⚠️ Deleting existing index: '{index_name}' to recreate it.")
-        client.indices.delete(index=index_name)
+    drop_patent_index(client, index_name)
 
-    # Get embedding dimension dynamically
+    # Get embedding dimension dynamically, then apply the configured Matryoshka truncation
     sample_embedding = get_embedding("Sample text for dimension detection")
-    dimension = len(sample_embedding)
-    print(f"📏 Using embedding dimension: {dimension}")
+    full_dimension = len(sample_embedding)
+    dimension = len(shape_embedding(sample_embedding, EMBEDDING_DIMENSION, EMBEDDING_PRECISION))
+    print(f"📏 Using embedding dimension: {dimension} of {full_dimension} ({EMBEDDING_PRECISION})")
 
     # Define mapping with knn_vector field
     mapping = {
         "mappings": {
+            # Read back by check_index_embedding_format so queries never mix vector formats
+            "_meta": embedding_metadata(dimension, full_dimension),
             "properties": {
                 "title": {"type": "text"},
                 "abstract": {"type": "text"},
@@ -52,12 +105,19 @@ def create_index_if_not_exists(client, index_name):
                     "format": "yyyy-MM-dd||yyyy||epoch_millis||strict_date_optional_time||strict_date_time||epoch_second",
                 },
                 "patent_id": {"type": "keyword"},
+                "family_key": {"type": "keyword"},
+                "assignees": {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
+                "jurisdiction": {"type": "keyword"},
+                "cpc_groups": {"type": "keyword"},
+                "cluster_id": {"type": "integer"},
+                "cluster_label": {"type": "keyword"},
+                # Normalized research area the patent was ingested for; routes it to its shard or index
+                AREA_FIELD: {"type": "keyword"},
                 "pdf": {"type": "keyword"},
                 "token_count": {"type": "integer"},
-                "embedding": {
-                    "type": "knn_vector",
-                    "dimension": dimension,
-                },
+                # Epoch milliseconds; delta analyses retrieve only documents indexed after their last report
+                "ingested_at": {"type": "long"},
+                "embedding": knn_field_mapping(dimension),
             }
         },
         "settings": {
@@ -68,10 +128,27 @@ def create_index_if_not_exists(client, index_name):
         },
     }
 
-    client.indices.create(index=index_name, body=mapping)
+    create_patent_index(client, index_name, mapping, expected_docs)
+    clear_derived_index_state(index_name)
     print(f"✅ Index '{index_name}' created with vector support!")
 
 
+def clear_derived_index_state(index_name):
+    """
+    Drop state derived from an index's documents after it has been recreated.
+
+    The recreated index starts from other contents, so counts rolled up and
+    topics clustered from the old one no longer apply.
+
+    Args:
+        index_name (str): Index that was recreated
+    """
+    from topic_clusters import remove_cluster_model
+    from trend_rollups import get_trend_rollups
+    get_trend_rollups(index_name).clear()
+    remove_cluster_model(index_name)
+
+
 if __name__ == "__main__":
     host = "localhost"
     port = 9200
@@ -1,12 +1,14 @@
 import os
 from datetime import datetime
 
-import requests
 from dotenv import load_dotenv
 
+from ollama_pool import get_ollama_pool
 from opensearch_client import get_opensearch_client
-from patent_crew import run_patent_analysis
-from patent_search_tools import hybrid_search, iterative_search, semantic_search
+from patent_search_tools import hit_snippet, hybrid_search, iterative_search, semantic_search
+
+# Characters of abstract shown per result; searches return only a fragment this long
+SNIPPET_CHARS = 150
 
 
 def display_menu():
@@ -25,6 +27,9 @@ def display_menu():
 
 def run_complete_analysis():
     """Run the complete patent trend analysis using CrewAI agents"""
+    # CrewAI and LangChain take seconds to import, so only the analysis option loads them
+    from patent_crew import print_task_output, run_patent_analysis
+
     print("\nRunning comprehensive patent analysis...")
     print("This may take several minutes depending on the data volume.")
 
@@ -42,7 +47,7 @@ def run_complete_analysis():
     print("Agents are now processing the data...\n")
 
     try:
-        result = run_patent_analysis(research_area, model_name)
+        result = run_patent_analysis(research_area, model_name, on_task=print_task_output)
 
         # Ensure result is a string before writing to file
         if not isinstance(result, str):
@@ -95,10 +100,10 @@ def search_patents():
             results = response["hits"]["hits"]
         elif search_type == "2":
             # Semantic search
-            results = semantic_search(query)
+            results = semantic_search(query, highlight_chars=SNIPPET_CHARS)
         else:
             # Hybrid search (default)
-            results = hybrid_search(query)
+            results = hybrid_search(query, highlight_chars=SNIPPET_CHARS)
 
         # Display results
         print(f"\nFound {len(results)} results for '{query}':")
@@ -109,7 +114,7 @@ def search_patents():
             print(f"   Score: {hit['_score']}")
             print(f"   Date: {source.get('publication_date', 'N/A')}")
             print(f"   Patent ID: {source.get('patent_id', 'N/A')}")
-            print(f"   Abstract: {source['abstract'][:150]}...")
+            print(f"   Abstract: {hit_snippet(hit, SNIPPET_CHARS)}...")
             print("-" * 60)
 
     except Exception as e:
@@ -136,7 +141,7 @@ def iterative_exploration():
     print(f"\nExploring patents related to '{query}' with {steps} refinement steps...")
 
     try:
-        results = iterative_search(query, refinement_steps=steps)
+        results = iterative_search(query, refinement_steps=steps, highlight_chars=SNIPPET_CHARS)
 
         # Display results
         print(f"\nFound {len(results)} results through iterative exploration:")
@@ -146,7 +151,7 @@ def iterative_exploration():
             print(f"{i+1}. {source['title']}")
             print(f"   Date: {source.get('publication_date', 'N/A')}")
             print(f"   Patent ID: {source.get('patent_id', 'N/A')}")
-            print(f"   Abstract: {source['abstract'][:150]}...")
+            print(f"   Abstract: {hit_snippet(hit, SNIPPET_CHARS)}...")
             print("-" * 60)
 
     except Exception as e:
@@ -172,15 +177,18 @@ def check_system_status():
 
     # Check Ollama API availability
     try:
-        response = requests.get("http://localhost:11434/api/tags")
-        if response.status_code == 200:
-            models = response.json().get("models", [])
+        pool = get_ollama_pool()
+        models = pool.list_models()
+        if models:
             print("✅ Ollama connection: OK")
             print(
                 f"   Available models: {', '.join([m.get('name', 'unknown') for m in models])}"
             )
         else:
-            print(f"❌ Ollama connection: Failed (Status code: {response.status_code})")
+            print("❌ Ollama connection: Failed (no models on any endpoint)")
+        for endpoint in pool.stats():
+            state = "unhealthy" if endpoint["circuit_open"] else "healthy"
+            print(f"   - {endpoint['url']}: {state}")
     except Exception as e:
         print(f"❌ Ollama connection: Failed - {e}")
 
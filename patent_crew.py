@@ -1,5 +1,8 @@
+import contextvars
 import os
-import requests
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
 from datetime import datetime
 from crewai import Agent, Crew, Task, Process
 from crewai.tools import BaseTool
@@ -8,26 +11,72 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_ollama import OllamaLLM
 
-from opensearch_client import get_opensearch_client
+from analysis_checkpoint import DELTA_TASK_NAMES, TASK_NAMES, AnalysisCheckpoint, AnalysisHistory
+from citation_graph import load_citation_graph
+from embedding_scheduler import PRIORITY_AGENT, embedding_priority
+from index_layout import INDEX_LAYOUT, current_research_area, has_research_area, research_area_scope, search_target
+from llm_cache import cached_tool_call, enable_llm_cache, tool_output_cacheable
+from ollama_pool import get_ollama_pool
+from opensearch_client import PATENT_INDEX, get_shared_opensearch_client
+from patent_search_tools import (
+    build_filters, fulltext_search, hit_snippet, hybrid_search, shape_search_response, stream_search_hits,
+)
+from topic_clusters import get_cluster_model
+from tracing import record_span, span, traced
+from trend_rollups import GRANULARITIES, get_trend_rollups
+
+# Characters of abstract given to the agents per hit; searches return only a fragment this long
+SNIPPET_CHARS = 200
+# Characters of a full-text passage given to the agents per hit
+PASSAGE_CHARS = 600
+
+# Low temperature keeps agent outputs reproducible enough to serve from the LLM cache
+CREW_TEMPERATURE = 0.2
+
+# Most new patents a delta analysis reads, and how many are summarized per prompt
+DELTA_MAX_PATENTS = int(os.getenv("PATENT_DELTA_MAX_PATENTS", 200))
+DELTA_SUMMARY_BATCH = 10
+
+DELTA_SUMMARY_PROMPT = """You are a patent data analyst following {research_area}.
+Summarize what the following newly published patents add to the field: the sub-technologies they
+address, the companies filing them and any technical improvements they claim. Cite patent IDs.
+
+{patents}"""
+
+DELTA_MERGE_PROMPT = """You maintain a recurring patent trend report on {research_area}.
+Below is the previous report, followed by summaries of {count} patents indexed since it was written.
+Return the complete updated report with the same structure. Keep what still holds, revise trends,
+companies and forecasts the new patents change, and mark additions with "(new)".
+
+PREVIOUS REPORT:
+{previous_report}
+
+NEW PATENTS:
+{summaries}"""
+
+# Patents shown to the agents during the current analysis, recorded in its AnalysisHistory
+_retrieved_patents = contextvars.ContextVar("retrieved_patents", default=None)
 
 # Checking Ollama model availability
 def check_ollama_availability():
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        response.raise_for_status()
-        models = response.json().get("models", [])
+        # Models available on any host of the endpoint pool
+        models = get_ollama_pool().list_models()
         return [model.get("name") for model in models if model.get("name")]
     except Exception as e:
         print(f"Error connecting to Ollama: {e}")
         return []
 
 # Testing the model with a simple prompt
-def test_model(model_name):
+def test_model(model_name, base_url=None):
     try:
-        llm = OllamaLLM(model=model_name, temperature=0.2)
-        prompt = ChatPromptTemplate.from_template("Say Hello!")
-        chain = prompt | llm | StrOutputParser()
-        result = chain.invoke({})
+        lease = get_ollama_pool().lease(model_name) if base_url is None else nullcontext(base_url)
+        with lease as url:
+            # Never serve the health check from cache, it must hit the model
+            llm = OllamaLLM(model=model_name, temperature=0.2, cache=False, base_url=url)
+            prompt = ChatPromptTemplate.from_template("Say Hello!")
+            chain = prompt | llm | StrOutputParser()
+            result = chain.invoke({})
         return bool(result)
     except Exception as e:
         if "404" in str(e):
@@ -35,130 +84,421 @@ def test_model(model_name):
             pull_status = os.system(f"ollama pull {model_name}")
             if pull_status == 0:
                 print(f"✅ Successfully pulled '{model_name}'. Retesting...")
-                return test_model(model_name)
+                return test_model(model_name, base_url)
             else:
                 print(f"❌ Failed to pull model '{model_name}'. Please pull it manually.")
         else:
             print(f"⚠️ Error testing model '{model_name}': {e}")
         return False
 
+# Loading the model once and keeping it resident between runs
+def warm_up_model(model_name, keep_alive="30m"):
+    """
+    Load an Ollama model into memory and keep it resident.
+
+    Args:
+        model_name (str): Ollama model name, with or without the 'ollama/' prefix
+        keep_alive (str): How long Ollama should keep the model loaded after the last request
+
+    Returns:
+        bool: True if the model was loaded
+    """
+    name = model_name.split("/", 1)[1] if model_name.startswith("ollama/") else model_name
+    try:
+        response = get_ollama_pool().request(
+            "POST",
+            "/api/generate",
+            model=name,
+            json={"model": name, "keep_alive": keep_alive},
+            timeout=300,
+        )
+        response.raise_for_status()
+        return True
+    except Exception as e:
+        print(f"⚠️ Could not warm up model '{name}': {e}")
+        return False
+
+def _hit_patents(results):
+    """Patents of search hits as recorded in AnalysisHistory, keyed by patent id."""
+    return {
+        hit["_source"].get("patent_id") or hit["_id"]: {
+            "title": hit["_source"].get("title"),
+            "publication_date": hit["_source"].get("publication_date"),
+            "assignees": hit["_source"].get("assignees") or [],
+            "summary": hit_snippet(hit, SNIPPET_CHARS),
+        }
+        for hit in results
+    }
+
+def _record_patents(patents, replace=True):
+    """Add patents to those shown to the agents during the current analysis; replace=False keeps existing entries."""
+    retrieved = _retrieved_patents.get()
+    if retrieved is None:
+        return
+    for patent_id, patent in patents.items():
+        if replace or patent_id not in retrieved:
+            retrieved[patent_id] = patent
+
+def _cached_patent_search(tool_name, arguments, search, index_names=(PATENT_INDEX,), replace=True):
+    """
+    Run a search tool through the tool cache and record the patents it returned.
+
+    The patents are cached next to the formatted output, so a cached result
+    still reaches the analysis's AnalysisHistory and later delta runs do not
+    mistake those patents for new ones.
+
+    Args:
+        tool_name (str): Name of the CrewAI tool.
+        arguments (dict): Keyword arguments the tool was called with.
+        search (callable): Returns the tool output and the patents it shows, as (str, dict).
+        index_names (tuple): Indices the search reads.
+        replace (bool): Whether these patents replace entries already recorded for the run.
+
+    Returns:
+        str: The tool output.
+    """
+    result = cached_tool_call(
+        tool_name, arguments, lambda: dict(zip(("output", "patents"), search())),
+        index_names=index_names, cacheable=lambda result: tool_output_cacheable(result["output"]),
+    )
+    _record_patents(result["patents"], replace)
+    return result["output"]
+
+def _format_patent_hits(results):
+    formatted_results = []
+    for i, hit in enumerate(results):
+        source = hit["_source"]
+        formatted_results.append(
+            f"{i+1}. Title: {source.get('title', 'N/A')}\n"
+            f"   Date: {source.get('publication_date', 'N/A')}\n"
+            f"   Patent ID: {source.get('patent_id', 'N/A')}\n"
+            f"   Assignees: {', '.join(source.get('assignees') or []) or 'N/A'} ({source.get('jurisdiction') or 'N/A'})\n"
+            f"   Topic: {source.get('cluster_label') or 'N/A'}\n"
+            f"   Abstract: {hit_snippet(hit, SNIPPET_CHARS) or 'N/A'}...\n"
+        )
+    return "\n".join(formatted_results)
+
 # Custom tools by extending BaseTool from CrewAI
 class SearchPatentsTool(BaseTool):
     name: str = "search_patents"
-    description: str = "Search for patents matching a query"
+    description: str = (
+        "Search for patents matching a query. Optionally filter by start_date/end_date (YYYY-MM-DD), "
+        "assignee (company name) and jurisdiction (patent office code such as US, EP, CN)."
+    )
 
-    def _run(self, query: str = None, top_k: int = 20) -> str:
+    @traced("tool.search_patents", result_attributes=lambda output: {"output_chars": len(output)})
+    def _run(
+        self,
+        query: str = None,
+        top_k: int = 20,
+        start_date: str = None,
+        end_date: str = None,
+        assignee: str = None,
+        jurisdiction: str = None,
+    ) -> str:
         if not query:
             return "Error: No query provided to SearchPatentsTool."
-        client = get_opensearch_client("localhost", 9200)
-        index_name = "patents"
+        arguments = {
+            "query": query, "top_k": top_k, "start_date": start_date, "end_date": end_date,
+            "assignee": assignee, "jurisdiction": jurisdiction,
+        }
+        filters = build_filters(start_date, end_date, assignee, jurisdiction, research_area=current_research_area())
+        return _cached_patent_search(self.name, arguments, lambda: self._search(query, top_k, filters))
+
+    def _search(self, query, top_k, filters):
+        client = get_shared_opensearch_client()
+        index_name, search_params = search_target(PATENT_INDEX, current_research_area())
         search_query = {
             "size": top_k,
-            "query": {"bool": {"must": [{"match": {"abstract": query}}]}},
-            "_source": ["title", "abstract", "publication_date", "patent_id"],
+            "query": {"bool": {"must": [{"match": {"abstract": query}}], "filter": filters}},
+            "collapse": {"field": "family_key"},
         }
+        shape_search_response(search_query, query, highlight_chars=SNIPPET_CHARS)
         try:
-            response = client.search(index=index_name, body=search_query)
-            results = response["hits"]["hits"]
-            formatted_results = []
-            for i, hit in enumerate(results):
-                source = hit["_source"]
-                formatted_results.append(
-                    f"{i+1}. Title: {source.get('title', 'N/A')}\n"
-                    f"   Date: {source.get('publication_date', 'N/A')}\n"
-                    f"   Patent ID: {source.get('patent_id', 'N/A')}\n"
-                    f"   Abstract: {source.get('abstract', 'N/A')[:200]}...\n"
-                )
-            return "\n".join(formatted_results)
+            response = client.search(index=index_name, body=search_query, **search_params)
         except Exception as e:
-            return f"Error searching patents: {str(e)}"
+            return f"Error searching patents: {str(e)}", {}
+        return _format_patent_hits(response["hits"]["hits"]), _hit_patents(response["hits"]["hits"])
 
 class SearchPatentsByDateRangeTool(BaseTool):
     name: str = "search_patents_by_date_range"
-    description: str = "Search for patents in a specific date range"
+    description: str = (
+        "Search for patents in a specific date range. Optionally filter by assignee (company name) "
+        "and jurisdiction (patent office code such as US, EP, CN)."
+    )
 
-    def _run(self, query: str = None, start_date: str = None, end_date: str = None, top_k: int = 30) -> str:
+    @traced("tool.search_patents_by_date_range", result_attributes=lambda output: {"output_chars": len(output)})
+    def _run(
+        self,
+        query: str = None,
+        start_date: str = None,
+        end_date: str = None,
+        top_k: int = 30,
+        assignee: str = None,
+        jurisdiction: str = None,
+    ) -> str:
         if not query or not start_date or not end_date:
             return "Error: query, start_date, and end_date are required for SearchPatentsByDateRangeTool."
-        client = get_opensearch_client("localhost", 9200)
-        index_name = "patents"
-        search_query = {
-            "size": top_k,
-            "query": {
-                "bool": {
-                    "must": [{"match": {"abstract": query}}],
-                    "filter": [
-                        {
-                            "range": {
-                                "publication_date": {"gte": start_date, "lte": end_date}
-                            }
-                        }
-                    ],
-                }
-            },
-            "_source": ["title", "abstract", "publication_date", "patent_id"],
+        arguments = {
+            "query": query, "start_date": start_date, "end_date": end_date, "top_k": top_k,
+            "assignee": assignee, "jurisdiction": jurisdiction,
         }
+        return _cached_patent_search(
+            self.name, arguments, lambda: self._search(query, start_date, end_date, top_k, assignee, jurisdiction)
+        )
+
+    def _search(self, query, start_date, end_date, top_k, assignee, jurisdiction):
         try:
-            response = client.search(index=index_name, body=search_query)
-            results = response["hits"]["hits"]
-            formatted_results = []
-            for i, hit in enumerate(results):
-                source = hit["_source"]
-                formatted_results.append(
-                    f"{i+1}. Title: {source.get('title', 'N/A')}\n"
-                    f"   Date: {source.get('publication_date', 'N/A')}\n"
-                    f"   Patent ID: {source.get('patent_id', 'N/A')}\n"
-                    f"   Abstract: {source.get('abstract', 'N/A')[:200]}...\n"
+            # Hybrid search pushes the filters into the k-NN clause as well as the BM25 match
+            with embedding_priority(PRIORITY_AGENT):
+                results = hybrid_search(
+                    query, top_k=top_k, start_date=start_date, end_date=end_date,
+                    assignee=assignee, jurisdiction=jurisdiction, highlight_chars=SNIPPET_CHARS,
                 )
-            return "\n".join(formatted_results)
         except Exception as e:
-            return f"Error searching patents: {str(e)}"
+            return f"Error searching patents: {str(e)}", {}
+        return _format_patent_hits(results), _hit_patents(results)
+
+class SearchFullTextTool(BaseTool):
+    name: str = "search_patent_full_text"
+    description: str = (
+        "Search the full text (description and claims) of patents whose PDFs have been processed and return "
+        "the most relevant passage of each matching patent. Use it for technical details abstracts leave out, "
+        "such as materials, process parameters and test results. Optionally filter by start_date/end_date (YYYY-MM-DD)."
+    )
+
+    @traced("tool.search_patent_full_text", result_attributes=lambda output: {"output_chars": len(output)})
+    def _run(self, query: str = None, top_k: int = 10, start_date: str = None, end_date: str = None) -> str:
+        if not query:
+            return "Error: No query provided to SearchFullTextTool."
+        from fulltext import fulltext_index_name
+
+        arguments = {"query": query, "top_k": top_k, "start_date": start_date, "end_date": end_date}
+        # Passages only fill in patents no other search has shown the agents
+        return _cached_patent_search(
+            self.name, arguments, lambda: self._search(query, top_k, start_date, end_date),
+            index_names=(PATENT_INDEX, fulltext_index_name(PATENT_INDEX)), replace=False,
+        )
+
+    def _search(self, query, top_k, start_date, end_date):
+        with embedding_priority(PRIORITY_AGENT):
+            results = fulltext_search(query, top_k, start_date, end_date, passage_chars=PASSAGE_CHARS)
+        if not results:
+            return f"No full-text passages found for '{query}'. Full texts exist only for patents processed by fulltext.py.", {}
+        patents, lines = {}, []
+        for i, hit in enumerate(results):
+            source = hit["_source"]
+            passage = hit_snippet(hit, PASSAGE_CHARS, field="text")
+            patents.setdefault(source["patent_id"], {
+                "title": source.get("title"),
+                "publication_date": source.get("publication_date"),
+                "assignees": [],
+                "summary": passage,
+            })
+            lines.append(
+                f"{i+1}. Title: {source.get('title', 'N/A')}\n"
+                f"   Date: {source.get('publication_date', 'N/A')}\n"
+                f"   Patent ID: {source['patent_id']}\n"
+                f"   Passage {source.get('chunk', 0) + 1}: {passage}...\n"
+            )
+        return "\n".join(lines), patents
 
 class AnalyzePatentTrendsTool(BaseTool):
     name: str = "analyze_patent_trends"
-    description: str = "Analyze patent trends in patent data"
+    description: str = (
+        "Analyze patent trends in patent data. Without a query, returns precomputed patent counts per "
+        "year (or granularity='quarter') for the whole index, optionally for one sub_technology (CPC main "
+        "group such as H01M10) or assignee, with the top assignees, the largest sub-technologies and how "
+        "far the average patent moved between periods. Pass a query to count every matching patent "
+        "in the index per publication year, not just the top search results."
+    )
 
-    def _run(self, patents_data: str = None) -> str:
-        if not patents_data:
-            return "Error: No patent data provided to AnalyzePatentTrendsTool."
-        return f"Analysis of patent trends: {patents_data}"
+    @traced("tool.analyze_patent_trends", result_attributes=lambda output: {"output_chars": len(output)})
+    def _run(
+        self,
+        patents_data: str = None,
+        query: str = None,
+        sub_technology: str = None,
+        assignee: str = None,
+        granularity: str = "year",
+    ) -> str:
+        if query:
+            return cached_tool_call(self.name, {"query": query}, lambda: self._count_by_year(query))
+        if patents_data and not (sub_technology or assignee):
+            return f"Analysis of patent trends: {patents_data}"
+        return self._rollup_summary(sub_technology, assignee, granularity if granularity in GRANULARITIES else "year")
+
+    def _rollup_summary(self, sub_technology, assignee, granularity):
+        # Read from the rollups ingestion maintains, so no documents are scanned
+        try:
+            rollups = get_trend_rollups(PATENT_INDEX)
+            series = rollups.time_series(granularity, sub_technology, assignee)
+            scope = " / ".join(part for part in (sub_technology, assignee) if part) or "all patents"
+            if not series:
+                return f"No patents found for {scope}."
+            lines = [f"Patents per {granularity} for {scope} ({sum(count for _, count in series)} total):"]
+            lines.extend(f"   {period}: {count}" for period, count in series)
+            if not assignee:
+                lines.append("Top assignees:")
+                lines.extend(f"   {name}: {count}" for name, count in rollups.top_assignees(sub_technology, limit=5))
+            if not sub_technology:
+                lines.append("Largest sub-technologies (CPC main groups):")
+                lines.extend(f"   {code}: {count}" for code, count in rollups.sub_technologies(limit=8))
+            if not assignee:
+                drift = [row for row in rollups.centroid_drift(granularity, sub_technology) if row["drift"] is not None]
+                if drift:
+                    lines.append("Topic drift (cosine distance of the mean patent embedding from the previous period):")
+                    lines.extend(f"   {row['period']}: {row['drift']:.4f}" for row in drift)
+            return "\n".join(lines)
+        except Exception as e:
+            return f"Error analyzing patent trends: {str(e)}"
+
+    def _count_by_year(self, query):
+        try:
+            years = Counter()
+            for hit in stream_search_hits(query, source_fields=["publication_date"]):
+                years[str(hit["_source"].get("publication_date") or "unknown")[:4]] += 1
+        except Exception as e:
+            return f"Error analyzing patent trends: {str(e)}"
+        if not years:
+            return f"No patents found for '{query}'."
+        lines = [f"Patents matching '{query}' per publication year ({sum(years.values())} total):"]
+        lines.extend(f"   {year}: {count}" for year, count in sorted(years.items()))
+        return "\n".join(lines)
+
+class CitationGraphTool(BaseTool):
+    name: str = "citation_graph_stats"
+    description: str = (
+        "Citation statistics from the patent citation graph. Pass a patent_id to get its citation counts, "
+        "PageRank influence and citation velocity plus the patents it cites and that cite it; "
+        "omit it to list the most influential patents."
+    )
+
+    @traced("tool.citation_graph_stats", result_attributes=lambda output: {"output_chars": len(output)})
+    def _run(self, patent_id: str = None, top_n: int = 10) -> str:
+        graph = load_citation_graph()
+        if graph is None:
+            return "Error: Citation graph has not been built. Run 'python citation_graph.py <data_dir>' first."
+
+        if not patent_id:
+            lines = [f"Most influential patents ({graph.num_nodes} patents, {graph.num_edges} citations):"]
+            for i, record in enumerate(graph.top(top_n)):
+                lines.append(
+                    f"{i+1}. {record['patent_id']} - PageRank percentile: {record['pagerank_percentile']:.2f}, "
+                    f"cited by: {record['cited_by']}, citations/year: {record['citation_velocity']:.2f}"
+                )
+            return "\n".join(lines)
+
+        record = graph.scores(patent_id)
+        if record is None:
+            return f"Error: Patent '{patent_id}' is not in the citation graph."
+        return (
+            f"Patent ID: {patent_id}\n"
+            f"   Cites: {record['cites']} patents: {', '.join(graph.cites(patent_id)[:top_n])}\n"
+            f"   Cited by: {record['cited_by']} patents: {', '.join(graph.cited_by(patent_id)[:top_n])}\n"
+            f"   PageRank percentile: {record['pagerank_percentile']:.2f}\n"
+            f"   Citations per year (last 3 years): {record['citation_velocity']:.2f}\n"
+        )
+
+class PatentClustersTool(BaseTool):
+    name: str = "patent_topic_clusters"
+    description: str = (
+        "Topic clusters computed offline over every patent embedding in the index, for grouping patents "
+        "by sub-technology. Omit cluster_id to list the clusters with their label, size, share of patents "
+        "from the last 3 years and top assignees; pass a cluster_id for its patents per year and its most "
+        "representative patents."
+    )
+
+    @traced("tool.patent_topic_clusters", result_attributes=lambda output: {"output_chars": len(output)})
+    def _run(self, cluster_id: int = None, top_n: int = 10) -> str:
+        model = get_cluster_model(PATENT_INDEX)
+        if model is None:
+            return "Error: Patents have not been clustered. Run 'python topic_clusters.py' first."
+
+        if cluster_id is None:
+            clusters = sorted(model.clusters, key=lambda cluster: -cluster["size"])[:top_n]
+            lines = [f"Topic clusters ({model.meta['documents']} patents clustered, {len(model.clusters)} clusters):"]
+            for cluster in clusters:
+                top = ", ".join(name for name, _ in Counter(cluster["assignees"]).most_common(3)) or "N/A"
+                lines.append(
+                    f"{cluster['cluster_id']}. {cluster['label']} - {cluster['size']} patents, "
+                    f"{model.recent_share(cluster):.0%} from the last 3 years, top assignees: {top}"
+                )
+            return "\n".join(lines)
+
+        if not 0 <= int(cluster_id) < len(model.clusters):
+            return f"Error: Cluster '{cluster_id}' does not exist; ids run from 0 to {len(model.clusters) - 1}."
+        cluster = model.clusters[int(cluster_id)]
+        lines = [f"Cluster {cluster['cluster_id']}: {cluster['label']} ({cluster['size']} patents)", "Patents per year:"]
+        lines.extend(f"   {year}: {count}" for year, count in sorted(cluster["years"].items()))
+        lines.append("Top assignees:")
+        lines.extend(f"   {name}: {count}" for name, count in Counter(cluster["assignees"]).most_common(top_n))
+        lines.append("Most representative patents:")
+        lines.extend(f"   {patent['patent_id']}: {patent['title']}" for patent in cluster["representatives"])
+        return "\n".join(lines)
 
 
 # Agent setup
-def create_patent_analysis_crew(model_name="llama2:latest", research_area="Lithium Battery"):
+def create_patent_analysis_crew(
+    model_name="llama2:latest",
+    research_area="Lithium Battery",
+    step_callback=None,
+    task_callback=None,
+    completed_outputs=None,
+    stream=False,
+    validate_model=True,
+    base_url=None,
+):
     """
     Create a CrewAI crew for patent analysis using Ollama.
 
     Args:
         model_name (str): name of the ollama model to be used
         research_area (str): research area for analysis
-    
+        step_callback (callable): called with every agent step (thought, tool call or result)
+        task_callback (callable): called with each TaskOutput as soon as the task finishes
+        completed_outputs (list): outputs of already finished leading tasks; those tasks are skipped
+        stream (bool): ask the LLM to stream tokens so they can be relayed as they arrive
+        validate_model (bool): check availability and test the model first; batch runs do this once up front
+        base_url (str): Ollama host to run on; defaults to one chosen by the endpoint pool
+
     Returns:
         Crew: A CrewAI crew instance configured for patent analysis
     """
 
-    # Checking if the model exists in Ollama
-    available_models = check_ollama_availability()
-    if not available_models:
-        raise ValueError("No available models found in Ollama. Please ensure Ollama is running and models are installed.")
+    if validate_model:
+        # Checking if the model exists in Ollama
+        available_models = check_ollama_availability()
+        if not available_models:
+            raise ValueError("No available models found in Ollama. Please ensure Ollama is running and models are installed.")
 
-    # Testing model
-    if not test_model(model_name):
-        raise ValueError(f"Model '{model_name}' is not working. Please check the model or pull it manually.")
+        # Testing model
+        if not test_model(model_name, base_url):
+            raise ValueError(f"Model '{model_name}' is not working. Please check the model or pull it manually.")
 
-    print("Model found and tested successfully.")
+        print("Model found and tested successfully.")
 
     # Fixing the model format by adding the 'ollama/' prefix
     if not model_name.startswith("ollama/"):
         model_name = f"ollama/{model_name}"
 
-    llm = OllamaLLM(model=model_name, temperature=0.2)
+    enable_llm_cache(model_name, CREW_TEMPERATURE)
+    base_url = base_url or get_ollama_pool().choose(model_name).url
+    if stream:
+        from crewai import LLM
+
+        llm = LLM(model=model_name, temperature=CREW_TEMPERATURE, stream=True, base_url=base_url)
+    else:
+        llm = OllamaLLM(model=model_name, temperature=CREW_TEMPERATURE, base_url=base_url)
 
     # Creating tools using CrewAI's BaseTool subclasses
     tools = [
         SearchPatentsTool(),
         SearchPatentsByDateRangeTool(),
-        AnalyzePatentTrendsTool()
+        SearchFullTextTool(),
+        AnalyzePatentTrendsTool(),
+        CitationGraphTool(),
+        PatentClustersTool(),
     ]
 
     # Create agents
@@ -217,9 +557,11 @@ def create_patent_analysis_crew(model_name="llama2:latest", research_area="Lithi
     task2 = Task(
         description=f"""
         Using the research plan, retrieve patents related to {research_area} from the last 3 years.
-        Use the search_patents and search_patents_by_date_range tools to gather comprehensive data.
+        Use the search_patents and search_patents_by_date_range tools to gather comprehensive data,
+        and search_patent_full_text for technical details that abstracts leave out.
         Focus on the most relevant and innovative patents.
-        Group patents by sub-technologies within {research_area}.
+        Group patents by sub-technologies within {research_area}, using the topic clusters from the
+        patent_topic_clusters tool and the topic shown with each search result.
         Provide a summary of the retrieved patents, including:
         - Total number of patents found
         - Key companies/assignees
@@ -244,6 +586,8 @@ def create_patent_analysis_crew(model_name="llama2:latest", research_area="Lithi
         3. Identify key companies and their focus areas
         4. Determine emerging sub-technologies within {research_area}
         5. Analyze patent claims to understand technological improvements
+        6. Use the citation_graph_stats tool to identify the most influential and fastest-rising patents
+        7. Use the analyze_patent_trends tool without a query for yearly or quarterly counts per sub-technology and assignee
         
         Create a comprehensive analysis with specific trends, supported by data.
         """,
@@ -282,7 +626,21 @@ def create_patent_analysis_crew(model_name="llama2:latest", research_area="Lithi
         dependencies=[task3],
     )
 
-    # Create the crew and enabling debugging
+    tasks = [task1, task2, task3, task4]
+    for task, name in zip(tasks, TASK_NAMES):
+        task.name = name
+
+    # Resuming: drop the tasks that already finished and hand their outputs to the next one
+    completed_outputs = completed_outputs or []
+    if completed_outputs:
+        tasks = tasks[len(completed_outputs):]
+        prior_context = "\n\n".join(
+            f"Result of '{name}':\n{output}" for name, output in zip(TASK_NAMES, completed_outputs)
+        )
+        tasks[0].description += f"\n\nResults of the steps completed so far:\n{prior_context}\n"
+
+    # Create the crew and enabling debugging; cache=True lets CrewAI reuse identical tool calls within a run.
+    # Its cache lives in this Crew, so a repeated call was recorded in the run's retrieved patents the first time
     crew = Crew(
         agents=[
             research_director,
@@ -290,48 +648,294 @@ def create_patent_analysis_crew(model_name="llama2:latest", research_area="Lithi
             data_analyst,
             innovation_forecaster,
         ],
-        tasks=[task1, task2, task3, task4],
+        tasks=tasks,
         verbose=True,
         process=Process.sequential,
-        cache=False,
+        cache=True,
+        step_callback=step_callback,
+        task_callback=task_callback,
     )
 
     return crew
 
 
-def run_patent_analysis(research_area, model_name="llama2:latest"):
+def format_step(step):
+    """
+    Render a CrewAI agent step (AgentAction, AgentFinish or ToolResult) as display text.
+
+    Args:
+        step: Step object passed to a crew step_callback.
+
+    Returns:
+        str: Human-readable summary of the step.
+    """
+    parts = []
+    thought = getattr(step, "thought", None)
+    if thought:
+        parts.append(f"💭 {thought}")
+    tool = getattr(step, "tool", None)
+    if tool:
+        parts.append(f"🔧 {tool}({getattr(step, 'tool_input', '')})")
+    result = getattr(step, "result", None) or getattr(step, "output", None)
+    if result:
+        parts.append(f"📄 {str(result)[:500]}")
+    return "\n".join(parts) or str(step)
+
+
+@contextmanager
+def relay_llm_tokens(on_token):
+    """
+    Forward streamed LLM chunks from the CrewAI event bus to on_token for the duration of the block.
+
+    Args:
+        on_token (callable): Called with each text chunk; None disables relaying.
+    """
+    if on_token is None:
+        yield
+        return
+
+    from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+
+    with crewai_event_bus.scoped_handlers():
+
+        @crewai_event_bus.on(LLMStreamChunkEvent)
+        def _relay(source, event):
+            on_token(event.chunk)
+
+        yield
+
+
+def _area_scope(research_area):
+    """Keep the run's searches to the patents ingested for the area, or search everything if there are none."""
+    try:
+        ingested = has_research_area(get_shared_opensearch_client(), PATENT_INDEX, research_area)
+    except Exception as e:
+        print(f"⚠️ Could not look up patents ingested for '{research_area}': {e}")
+        ingested = False
+    if not ingested and INDEX_LAYOUT != "single":
+        print(f"🔎 No patents were ingested for '{research_area}'; searching the whole corpus.")
+    return research_area_scope(research_area if ingested else None)
+
+
+def run_patent_analysis(
+    research_area,
+    model_name="llama2:latest",
+    on_step=None,
+    on_task=None,
+    on_token=None,
+    resume=True,
+    validate_model=True,
+    usage=None,
+    delta=False,
+):
     """
     Run the patent analysis crew for the specified research area.
 
+    Every finished task is checkpointed to disk, so a run that dies part-way
+    resumes after the last completed task the next time it is started.
+    Finished reports are recorded in the area's AnalysisHistory; with delta
+    the previous report is updated from the patents indexed since instead.
+    When patents were ingested for the research area, every search the run
+    makes is restricted to them (and to their shard or index).
+
     Args:
         research_area (str): The research area to analyze
         model_name (str): Ollama model to use
+        on_step (callable): called with the text of each agent step as it happens
+        on_task (callable): called with (index, name, output) as each task finishes
+        on_token (callable): called with each streamed LLM token
+        resume (bool): reuse checkpointed task outputs from an interrupted run
+        validate_model (bool): check and test the model before building the crew
+        usage (dict): if given, filled with the crew's token usage counts
+        delta (bool): only analyze patents indexed since the last report and merge them into it;
+            runs the full crew when there is no previous report
 
     Returns:
         str: Analysis results
     """
+    run_started = time.time_ns() // 1_000_000
+    history = AnalysisHistory(research_area, model_name)
+    checkpoint = AnalysisCheckpoint(research_area, model_name)
+    if not resume:
+        checkpoint.clear()
+    completed = checkpoint.load_completed()
+    completed_outputs = [record["output"] for record in completed]
+    # A resumed run carries on the interrupted one: its patents and its watermark
+    retrieved = {}
+    for record in completed:
+        retrieved.update(record.get("patents") or {})
+    run_started = min([record["run_started"] for record in completed if record.get("run_started")] + [run_started])
+
+    previous = history.latest() if delta and not completed_outputs else None
+    if previous is not None:
+        with _area_scope(research_area):
+            return run_delta_analysis(research_area, model_name, history, previous, run_started, on_task=on_task)
+
+    if len(completed_outputs) >= len(TASK_NAMES):
+        print(f"✅ All tasks for '{research_area}' were already checkpointed; reusing them.")
+        history.record(completed_outputs[-1], retrieved, run_started, "full")
+        checkpoint.clear()
+        return completed_outputs[-1]
+    if completed_outputs:
+        print(f"🔁 Resuming '{research_area}' after {len(completed_outputs)} completed task(s).")
+        if on_task:
+            for record in completed:
+                on_task(record["index"], record["name"], record["output"])
+
+    finished = [len(completed_outputs)]
+    task_started = [time.time()]
+
+    def task_callback(task_output):
+        index = finished[0]
+        name = TASK_NAMES[index]
+        output = getattr(task_output, "raw", None) or str(task_output)
+        now = time.time()
+        record_span(f"task.{name}", task_started[0], now, research_area=research_area, output_chars=len(output))
+        task_started[0] = now
+        checkpoint.save_task(index, name, output, retrieved, run_started)
+        finished[0] += 1
+        if on_task:
+            on_task(index, name, output)
+
+    def step_callback(step):
+        if on_step:
+            on_step(format_step(step))
+
+    retrieved_token = _retrieved_patents.set(retrieved)
     try:
-        crew = create_patent_analysis_crew(model_name, research_area)
-        result = crew.kickoff(inputs={"research_area": research_area})
+        # One Ollama host serves the whole run, so the model stays loaded where it started
+        with get_ollama_pool().lease(model_name) as base_url, _area_scope(research_area):
+            crew = create_patent_analysis_crew(
+                model_name,
+                research_area,
+                step_callback=step_callback,
+                task_callback=task_callback,
+                completed_outputs=completed_outputs,
+                stream=on_token is not None,
+                validate_model=validate_model,
+                base_url=base_url,
+            )
+            task_started[0] = time.time()
+            with span("crew.kickoff", research_area=research_area, model=model_name) as attributes:
+                with relay_llm_tokens(on_token):
+                    result = crew.kickoff(inputs={"research_area": research_area})
+                metrics = getattr(result, "token_usage", None) or getattr(crew, "usage_metrics", None)
+                token_usage = {}
+                if metrics is not None:
+                    token_usage = metrics.model_dump() if hasattr(metrics, "model_dump") else dict(metrics)
+                if attributes is not None:
+                    attributes.update({f"tokens.{key}": value for key, value in token_usage.items()})
+        checkpoint.clear()
+
+        if usage is not None:
+            usage.update(token_usage)
 
         # Extract the string output from the CrewOutput object
         if hasattr(result, "output"):
             # CrewAI storing results in the 'output' attribute
-            return result.output
+            report = result.output
         elif hasattr(result, "result"):
             # Some versions might are using 'result'
-            return result.result
+            report = result.result
         else:
             # Converting to string
-            return str(result)
+            report = str(result)
+        history.record(str(report), retrieved, run_started, "full")
+        return report
     except Exception as e:
         return (
             f"Analysis failed: {str(e)}\n\nTroubleshooting tips:\n"
             + "1. Make sure Ollama is running: 'ollama serve'\n"
             + "2. Pull a compatible model: 'ollama pull llama2:latest' or 'ollama pull mistral'\n"
             + "3. Check Ollama logs for errors\n"
-            + "4. Try a simpler model or reduce task complexity"
+            + "4. Try a simpler model or reduce task complexity\n"
+            + f"5. Completed steps were checkpointed in '{checkpoint.dir_path}'; re-run to resume"
         )
+    finally:
+        _retrieved_patents.reset(retrieved_token)
+
+
+def run_delta_analysis(research_area, model_name, history, previous, run_started, on_task=None):
+    """
+    Update the previous report with the patents indexed since it was written.
+
+    The new patents are summarized a batch at a time and the summaries are
+    merged into the previous report in one more prompt, so the cost follows
+    the amount of new data rather than the size of the corpus.
+
+    Args:
+        research_area (str): The research area to analyze
+        model_name (str): Ollama model to use
+        history (AnalysisHistory): History of the area's reports
+        previous (dict): Latest run from the history
+        run_started (int): Epoch milliseconds when this run started; the next watermark
+        on_task (callable): called with (index, name, output) as each step finishes
+
+    Returns:
+        str: The updated report, or the previous one when nothing new was indexed
+    """
+    known = history.known_patent_ids()
+    with embedding_priority(PRIORITY_AGENT):
+        hits = hybrid_search(
+            research_area, top_k=DELTA_MAX_PATENTS, ingested_after=previous["watermark"], highlight_chars=SNIPPET_CHARS
+        )
+    # Re-ingested patents get a new ingested_at but were already part of the report
+    hits = [hit for hit in hits if (hit["_source"].get("patent_id") or hit["_id"]) not in known]
+    if not hits:
+        print(f"✅ No new patents for '{research_area}' since {previous['completed_at']}; the last report is current.")
+        history.record(previous["report"], {}, run_started, "delta")
+        return previous["report"]
+
+    print(f"🔁 Updating the '{research_area}' report with {len(hits)} new patents.")
+    retrieved = {}
+    retrieved_token = _retrieved_patents.set(retrieved)
+    try:
+        with get_ollama_pool().lease(model_name) as base_url:
+            llm = OllamaLLM(model=model_name, temperature=CREW_TEMPERATURE, base_url=base_url)
+            summarize = ChatPromptTemplate.from_template(DELTA_SUMMARY_PROMPT) | llm | StrOutputParser()
+            merge = ChatPromptTemplate.from_template(DELTA_MERGE_PROMPT) | llm | StrOutputParser()
+
+            summaries = []
+            for start in range(0, len(hits), DELTA_SUMMARY_BATCH):
+                batch = hits[start:start + DELTA_SUMMARY_BATCH]
+                _record_patents(_hit_patents(batch))
+                with span("delta.summarize", research_area=research_area, patents=len(batch)):
+                    summaries.append(summarize.invoke({
+                        "research_area": research_area, "patents": _format_patent_hits(batch),
+                    }))
+            if on_task:
+                on_task(0, DELTA_TASK_NAMES[0], "\n\n".join(summaries))
+
+            with span("delta.merge", research_area=research_area, patents=len(hits)):
+                report = merge.invoke({
+                    "research_area": research_area,
+                    "count": len(hits),
+                    "previous_report": previous["report"],
+                    "summaries": "\n\n".join(summaries),
+                })
+            if on_task:
+                on_task(1, DELTA_TASK_NAMES[1], report)
+    except Exception as e:
+        return (
+            f"Analysis failed: {str(e)}\n\nThe previous report is unchanged; "
+            + "make sure Ollama is running ('ollama serve') and re-run the delta analysis."
+        )
+    finally:
+        _retrieved_patents.reset(retrieved_token)
+
+    history.record(report, retrieved, run_started, "delta", summaries)
+    return report
+
+
+def print_task_output(index, name, output):
+    """CLI on_task callback: print each task's output as soon as it is finished."""
+    print("\n" + "=" * 60)
+    total = len(DELTA_TASK_NAMES) if name in DELTA_TASK_NAMES else len(TASK_NAMES)
+    print(f"✅ Task {index + 1}/{total} complete: {name}")
+    print("-" * 60)
+    print(output)
+    print("=" * 60 + "\n")
+
 
 if __name__ == "__main__":
     print("\n============================")
@@ -361,8 +965,8 @@ if __name__ == "__main__":
     else:
         model_name = models[int(selected_index) - 1]
 
-    # 4. Run the crew-based analysis
-    result = run_patent_analysis(research_area, model_name)
+    # 4. Run the crew-based analysis, printing each task as it finishes
+    result = run_patent_analysis(research_area, model_name, on_task=print_task_output)
 
     # 5. Save results in organized folder
     from pathlib import Path
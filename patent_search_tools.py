@@ -1,80 +1,277 @@
-from embeddings import get_embedding
-from opensearch_client import get_opensearch_client
+import re
+import time
 
-def keyword_search(query_text, top_k=20):
+import numpy as np
+
+from citation_graph import apply_citation_boost, load_citation_graph
+from dedup import collapse_by_family
+from embedding_format import check_index_embedding_format, get_index_embedding
+from index_layout import AREA_FIELD, INDEX_LAYOUT, area_key, current_research_area, search_target
+from opensearch_client import PATENT_INDEX, get_shared_opensearch_client
+from semantic_cache import SemanticQueryCache, get_semantic_cache
+from tracing import payload_size, span, traced
+
+
+SOURCE_FIELDS = ["title", "abstract", "publication_date", "patent_id", "family_key", "assignees", "jurisdiction", "cluster_label"]
+
+# Near-duplicate documents and family members share a family_key; only the best one is returned
+COLLAPSE = {"field": "family_key"}
+
+HIGHLIGHT_TAGS = re.compile(r"</?em>")
+
+
+def _hit_attributes(hits):
+    return {"hits": len(hits), "payload_bytes": payload_size(hits)}
+
+
+def build_filters(start_date=None, end_date=None, assignee=None, jurisdiction=None, ingested_after=None, research_area=None):
+    """
+    Filter clauses shared by every search mode.
+
+    Args:
+        start_date (str): Earliest publication date, inclusive (YYYY-MM-DD or YYYY).
+        end_date (str): Latest publication date, inclusive.
+        assignee (str): Assignee name; every word must appear (e.g. 'Samsung' matches 'Samsung SDI').
+        jurisdiction (str or list): Patent office code(s) such as 'US' or ['EP', 'WO'].
+        ingested_after (int): Only documents indexed after this time, in epoch milliseconds.
+        research_area (str): Only patents ingested for this research area.
+
+    Returns:
+        list: Clauses for a bool filter; empty when no filter is set.
+    """
+    filters = []
+    bounds = {}
+    if start_date:
+        bounds["gte"] = start_date
+    if end_date:
+        bounds["lte"] = end_date
+    if bounds:
+        filters.append({"range": {"publication_date": bounds}})
+    if assignee:
+        filters.append({"match": {"assignees": {"query": assignee, "operator": "and"}}})
+    if jurisdiction:
+        codes = [jurisdiction] if isinstance(jurisdiction, str) else list(jurisdiction)
+        filters.append({"terms": {"jurisdiction": [code.upper() for code in codes]}})
+    if ingested_after is not None:
+        filters.append({"range": {"ingested_at": {"gt": int(ingested_after)}}})
+    if area_key(research_area):
+        filters.append({"term": {AREA_FIELD: area_key(research_area)}})
+    return filters
+
+
+def shape_search_response(search_query, query_text, source_fields=None, highlight_chars=None):
+    """
+    Trim what a search returns to what the caller shows.
+
+    With highlight_chars the abstract is left out of _source and replaced by
+    one highlight fragment of about that many characters around the query
+    terms (or the start of the abstract when none match). Full documents can
+    be fetched later with fetch_patents.
+
+    Args:
+        search_query (dict): Request body, modified in place.
+        query_text (str): Query the fragment is chosen for.
+        source_fields (list): _source fields to return; defaults to SOURCE_FIELDS.
+        highlight_chars (int): Fragment size; None returns the full abstract.
+
+    Returns:
+        dict: The request body.
+    """
+    fields = list(source_fields or SOURCE_FIELDS)
+    if highlight_chars:
+        fields = [field for field in fields if field != "abstract"]
+        search_query["highlight"] = {
+            "fields": {
+                "abstract": {"fragment_size": highlight_chars, "number_of_fragments": 1, "no_match_size": highlight_chars}
+            },
+            # k-NN clauses carry no terms, so fragments are picked by the query text
+            "highlight_query": {"match": {"abstract": query_text}},
+        }
+    search_query["_source"] = fields
+    return search_query
+
+
+def hit_snippet(hit, max_chars=None, field="abstract"):
+    """
+    Abstract text to show for a hit: its highlight fragment, or the abstract cut to max_chars.
+
+    Args:
+        hit (dict): Search hit.
+        max_chars (int): Length limit for full abstracts.
+        field (str): Text field to show; "text" for full-text passages.
+
+    Returns:
+        str: Snippet without highlight tags.
+    """
+    fragments = hit.get("highlight", {}).get(field)
+    if fragments:
+        return HIGHLIGHT_TAGS.sub("", fragments[0])
+    text = hit.get("_source", {}).get(field, "")
+    return text[:max_chars] if max_chars else text
+
+
+def _get_documents(client, index_name, patent_ids, source_fields):
+    """
+    Documents for one batch of ids, as {id: hit}.
+
+    Outside the single layout an id does not say which area index or routed
+    shard holds the document, so an ids query, which visits every shard,
+    replaces mget.
+    """
+    if INDEX_LAYOUT == "single":
+        response = client.mget(index=index_name, body={"ids": patent_ids}, _source=source_fields)
+        return {doc["_id"]: doc for doc in response["docs"] if doc.get("found")}
+    response = client.search(
+        index=index_name, body={"size": len(patent_ids), "query": {"ids": {"values": patent_ids}}, "_source": source_fields}
+    )
+    return {hit["_id"]: hit for hit in response["hits"]["hits"]}
+
+
+def fetch_patents(patent_ids, source_fields=None, batch_size=100):
+    """
+    Fetch full documents by patent id, e.g. when a user expands a highlighted result.
+
+    Args:
+        patent_ids (list): Patent ids (document ids).
+        source_fields (list): Fields to return; defaults to SOURCE_FIELDS.
+        batch_size (int): Ids per request.
+
+    Returns:
+        dict: patent id -> _source for the ids that exist.
+    """
+    client = get_shared_opensearch_client()
+    documents = {}
+    for start in range(0, len(patent_ids), batch_size):
+        batch = _get_documents(client, PATENT_INDEX, patent_ids[start:start + batch_size], source_fields or SOURCE_FIELDS)
+        documents.update({doc_id: doc["_source"] for doc_id, doc in batch.items()})
+    return documents
+
+
+def _knn_clause(query_embedding, k, filters):
+    # A filter inside the knn clause is applied during graph traversal, so k hits come back even for narrow filters
+    params = {"vector": query_embedding, "k": k}
+    if filters:
+        params["filter"] = {"bool": {"filter": filters}}
+    return {"knn": {"embedding": params}}
+
+
+def _keyword_query(query_text, filters):
+    return {"bool": {"must": [{"match": {"abstract": query_text}}], "filter": filters}}
+
+
+@traced("search.keyword", result_attributes=_hit_attributes)
+def keyword_search(
+    query_text, top_k=20, citation_boost=0.0, start_date=None, end_date=None, assignee=None, jurisdiction=None,
+    source_fields=None, highlight_chars=None, ingested_after=None, research_area=None,
+):
     if not query_text:
         print("Keyword search error: query_text is empty.")
         return []
-    client = get_opensearch_client("localhost", 9200)
-    index_name = "patents"
+    client = get_shared_opensearch_client()
+    research_area = research_area or current_research_area()
+    index_name, search_params = search_target(PATENT_INDEX, research_area)
+    filters = build_filters(start_date, end_date, assignee, jurisdiction, ingested_after, research_area)
 
     try:
         search_query = {
             "size": top_k,
-            "query": {"match": {"abstract": query_text}},
-            "_source": ["title", "abstract", "publication_date", "patent_id"],
+            "query": _keyword_query(query_text, filters),
+            "collapse": COLLAPSE,
         }
+        shape_search_response(search_query, query_text, source_fields, highlight_chars)
 
-        response = client.search(index=index_name, body=search_query)
-        return response["hits"]["hits"] or []
+        response = client.search(index=index_name, body=search_query, **search_params)
+        return apply_citation_boost(response["hits"]["hits"] or [], citation_boost)
     except Exception as e:
         print(f"Keyword search error: {e}")
         return []
 
-def semantic_search(query_text, top_k=20):
+@traced("search.semantic", result_attributes=_hit_attributes)
+def semantic_search(
+    query_text, top_k=20, citation_boost=0.0, start_date=None, end_date=None, assignee=None, jurisdiction=None,
+    source_fields=None, highlight_chars=None, ingested_after=None, research_area=None,
+):
     if not query_text:
         print("Semantic search error: query_text is empty.")
         return []
-    client = get_opensearch_client("localhost", 9200)
-    index_name = "patents"
+    client = get_shared_opensearch_client()
+    index_name = PATENT_INDEX
+    research_area = research_area or current_research_area()
+    search_index, search_params = search_target(index_name, research_area)
+    filters = build_filters(start_date, end_date, assignee, jurisdiction, ingested_after, research_area)
 
     try:
-        query_embedding = get_embedding(query_text)
+        check_index_embedding_format(client, index_name)
+        cache = get_semantic_cache()
+        params_key = SemanticQueryCache.params_key(
+            "semantic", top_k=top_k, citation_boost=citation_boost, filters=filters,
+            source_fields=source_fields, highlight_chars=highlight_chars,
+        )
+        cached, query_embedding = cache.lookup(client, index_name, params_key, query_text, lambda: get_index_embedding(query_text))
+        if cached is not None:
+            return cached
 
         search_query = {
             "size": top_k,
-            "query": {
-                "knn": {
-                    "embedding": {
-                        "vector": query_embedding,
-                        "k": top_k,
-                    }
-                }
-            },
-            "_source": ["title", "abstract", "publication_date", "patent_id"],
+            "query": _knn_clause(query_embedding, top_k, filters),
+            "collapse": COLLAPSE,
         }
+        shape_search_response(search_query, query_text, source_fields, highlight_chars)
 
-        response = client.search(index=index_name, body=search_query)
-        return response["hits"]["hits"] or []
+        response = client.search(index=search_index, body=search_query, **search_params)
+        hits = apply_citation_boost(response["hits"]["hits"] or [], citation_boost)
+        cache.store(index_name, params_key, query_text, query_embedding, hits)
+        return hits
     except Exception as e:
         print(f"Semantic search error: {e}")
         return []
 
-def hybrid_search(query_text, top_k=20):
+@traced("search.hybrid", result_attributes=_hit_attributes)
+def hybrid_search(
+    query_text, top_k=20, citation_boost=0.0, start_date=None, end_date=None, assignee=None, jurisdiction=None,
+    source_fields=None, highlight_chars=None, ingested_after=None, research_area=None,
+):
     if not query_text:
         print("Hybrid search error: query_text is empty.")
         return []
-    client = get_opensearch_client("localhost", 9200)
-    index_name = "patents"
+    client = get_shared_opensearch_client()
+    index_name = PATENT_INDEX
+    research_area = research_area or current_research_area()
+    search_index, search_params = search_target(index_name, research_area)
+    filters = build_filters(start_date, end_date, assignee, jurisdiction, ingested_after, research_area)
 
     try:
-        query_embedding = get_embedding(query_text)
+        check_index_embedding_format(client, index_name)
+        # Near-identical queries reuse results; the BM25 half differs little when the embeddings are this close
+        cache = get_semantic_cache()
+        params_key = SemanticQueryCache.params_key(
+            "hybrid", top_k=top_k, citation_boost=citation_boost, filters=filters,
+            source_fields=source_fields, highlight_chars=highlight_chars,
+        )
+        cached, query_embedding = cache.lookup(client, index_name, params_key, query_text, lambda: get_index_embedding(query_text))
+        if cached is not None:
+            return cached
 
         search_query = {
             "size": top_k,
             "query": {
                 "bool": {
                     "should": [
-                        {"knn": {"embedding": {"vector": query_embedding, "k": top_k}}},
+                        _knn_clause(query_embedding, top_k, filters),
                         {"match": {"abstract": query_text}},
-                    ]
+                    ],
+                    "filter": filters,
+                    "minimum_should_match": 1,
                 }
             },
-            "_source": ["title", "abstract", "publication_date", "patent_id"],
+            "collapse": COLLAPSE,
         }
+        shape_search_response(search_query, query_text, source_fields, highlight_chars)
 
-        response = client.search(index=index_name, body=search_query)
-        return response["hits"]["hits"] or []
+        response = client.search(index=search_index, body=search_query, **search_params)
+        hits = apply_citation_boost(response["hits"]["hits"] or [], citation_boost)
+        cache.store(index_name, params_key, query_text, query_embedding, hits)
+        return hits
 
     except Exception as e:
         print(f"Hybrid search error: {e}")
@@ -82,21 +279,84 @@ def hybrid_search(query_text, top_k=20):
         try:
             fallback_query = {
                 "size": top_k,
-                "query": {"match": {"abstract": query_text}},
-                "_source": ["title", "abstract", "publication_date", "patent_id"],
+                "query": _keyword_query(query_text, filters),
+                "collapse": COLLAPSE,
             }
-            response = client.search(index=index_name, body=fallback_query)
+            shape_search_response(fallback_query, query_text, source_fields, highlight_chars)
+            response = client.search(index=search_index, body=fallback_query, **search_params)
             return response["hits"]["hits"] or []
         except Exception as e2:
             print(f"Fallback search error: {e2}")
             return []
 
-def iterative_search(query_text, refinement_steps=3, top_k=20):
+@traced("search.fulltext", result_attributes=_hit_attributes)
+def fulltext_search(query_text, top_k=10, start_date=None, end_date=None, research_area=None, passage_chars=None):
+    """
+    Hybrid search over passages of patent full texts, returning the best passage per patent.
+
+    Only patents whose PDFs fulltext.py has processed are found. Each hit's
+    _source holds patent_id, title, publication_date and the passage text
+    (chunk is its position in the document).
+
+    Args:
+        query_text (str): Query.
+        top_k (int): Patents to return.
+        start_date (str): Earliest publication date, inclusive.
+        end_date (str): Latest publication date, inclusive.
+        research_area (str): Only patents ingested for this research area; defaults to the current scope.
+        passage_chars (int): Return a highlight fragment of about this many characters instead of the whole passage.
+
+    Returns:
+        list: Hits in the usual OpenSearch format.
+    """
+    from fulltext import fulltext_index_name
+
+    if not query_text:
+        print("Full-text search error: query_text is empty.")
+        return []
+    client = get_shared_opensearch_client()
+    index_name = fulltext_index_name(PATENT_INDEX)
+    filters = build_filters(start_date, end_date, research_area=research_area or current_research_area())
+    try:
+        if not client.indices.exists(index=index_name):
+            print(f"Full-text search error: '{index_name}' does not exist; run 'python fulltext.py' first.")
+            return []
+        check_index_embedding_format(client, index_name)
+        search_query = {
+            "size": top_k,
+            "query": {
+                "bool": {
+                    # Several passages of one patent can match; extra candidates leave top_k patents after collapsing
+                    "should": [_knn_clause(get_index_embedding(query_text), top_k * 5, filters), {"match": {"text": query_text}}],
+                    "filter": filters,
+                    "minimum_should_match": 1,
+                }
+            },
+            "collapse": {"field": "patent_id"},
+            "_source": ["patent_id", "title", "publication_date", "chunk"] + ([] if passage_chars else ["text"]),
+        }
+        if passage_chars:
+            search_query["highlight"] = {
+                "fields": {"text": {"fragment_size": passage_chars, "number_of_fragments": 1, "no_match_size": passage_chars}},
+                "highlight_query": {"match": {"text": query_text}},
+            }
+        return client.search(index=index_name, body=search_query)["hits"]["hits"] or []
+    except Exception as e:
+        print(f"Full-text search error: {e}")
+        return []
+
+@traced("search.iterative", result_attributes=_hit_attributes)
+def iterative_search(
+    query_text, refinement_steps=3, top_k=20, start_date=None, end_date=None, assignee=None, jurisdiction=None,
+    source_fields=None, highlight_chars=None, research_area=None,
+):
     if not query_text:
         print("Iterative search error: query_text is empty.")
         return []
-    client = get_opensearch_client("localhost", 9200)
-    index_name = "patents"
+    client = get_shared_opensearch_client()
+    research_area = research_area or current_research_area()
+    index_name, search_params = search_target(PATENT_INDEX, research_area)
+    filters = build_filters(start_date, end_date, assignee, jurisdiction, research_area=research_area)
 
     all_results = []
     current_query = query_text
@@ -105,16 +365,15 @@ def iterative_search(query_text, refinement_steps=3, top_k=20):
         try:
             search_query = {
                 "size": top_k,
-                "query": {"match": {"abstract": current_query}},
-                "_source": ["title", "abstract", "publication_date", "patent_id"],
+                "query": _keyword_query(current_query, filters),
+                "collapse": COLLAPSE,
             }
+            shape_search_response(search_query, query_text, source_fields, highlight_chars)
 
-            response = client.search(index=index_name, body=search_query)
+            response = client.search(index=index_name, body=search_query, **search_params)
             results = response["hits"]["hits"] or []
 
-            for result in results:
-                if result not in all_results:
-                    all_results.append(result)
+            all_results = collapse_by_family(all_results + results)
 
             if not results:
                 break
@@ -127,4 +386,253 @@ def iterative_search(query_text, refinement_steps=3, top_k=20):
             print(f"Iterative search error at step {i}: {e}")
             break
 
-    return all_results or []
\ No newline at end of file
+    return all_results or []
+
+
+def _fetch_with_embeddings(client, index_name, patent_ids, batch_size=100):
+    """Fetch documents by patent id in batches, including their embeddings and research area."""
+    documents = {}
+    for start in range(0, len(patent_ids), batch_size):
+        documents.update(
+            _get_documents(client, index_name, patent_ids[start:start + batch_size], SOURCE_FIELDS + [AREA_FIELD, "embedding"])
+        )
+    return documents
+
+
+def _cosine_scores(query_vector, documents):
+    ids = [doc_id for doc_id, doc in documents.items() if doc["_source"].get("embedding")]
+    if not ids:
+        return {}
+    matrix = np.asarray([documents[doc_id]["_source"]["embedding"] for doc_id in ids], dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query_vector) or 1.0)
+    similarities = matrix @ query_vector / np.where(norms == 0, 1.0, norms)
+    return dict(zip(ids, similarities.tolist()))
+
+
+def _matches_filters(source, start_date=None, end_date=None, assignee=None, jurisdiction=None, research_area=None):
+    """Client-side equivalent of build_filters for documents fetched by id."""
+    published = str(source.get("publication_date") or "")
+    if start_date and (not published or published < start_date):
+        return False
+    if end_date and (not published or published[:len(end_date)] > end_date):
+        return False
+    if assignee:
+        names = " ".join(source.get("assignees") or []).lower().split()
+        if not all(word in names for word in assignee.lower().split()):
+            return False
+    if jurisdiction:
+        codes = [jurisdiction] if isinstance(jurisdiction, str) else list(jurisdiction)
+        if source.get("jurisdiction") not in {code.upper() for code in codes}:
+            return False
+    if area_key(research_area) and source.get(AREA_FIELD) != area_key(research_area):
+        return False
+    return True
+
+
+@traced("search.citation_graph", result_attributes=_hit_attributes)
+def citation_graph_search(
+    query_text,
+    top_k=20,
+    seed_k=10,
+    max_hops=2,
+    beam_width=20,
+    node_budget=300,
+    time_budget=5.0,
+    start_date=None,
+    end_date=None,
+    assignee=None,
+    jurisdiction=None,
+    research_area=None,
+):
+    """
+    Explore prior art by following citation links out from hybrid-search seeds.
+
+    Each hop expands the best-scoring frontier through cited and citing
+    patents, fetches them by id in batches and scores them by cosine
+    similarity to the query embedding, until the hop, node or time budget is spent.
+    Filters apply to the seeds and the returned hits, but the walk may pass
+    through non-matching patents to reach matching ones.
+
+    Args:
+        query_text (str): Search query.
+        top_k (int): Number of hits to return.
+        seed_k (int): Number of hybrid-search seeds.
+        max_hops (int): Maximum citation hops from the seeds.
+        beam_width (int): Best-scoring nodes expanded at each hop.
+        node_budget (int): Maximum number of documents fetched.
+        time_budget (float): Maximum seconds spent expanding.
+        start_date, end_date, assignee, jurisdiction, research_area: Filters, see build_filters.
+
+    Returns:
+        list: Hits in the usual OpenSearch format, scored by query similarity, with the hop count in '_hop'.
+    """
+    if not query_text:
+        print("Citation graph search error: query_text is empty.")
+        return []
+    deadline = time.monotonic() + time_budget
+    client = get_shared_opensearch_client()
+    index_name = PATENT_INDEX
+
+    filter_args = {
+        "start_date": start_date, "end_date": end_date, "assignee": assignee, "jurisdiction": jurisdiction,
+        "research_area": research_area or current_research_area(),
+    }
+    seeds = hybrid_search(query_text, top_k=seed_k, **filter_args)
+    graph = load_citation_graph()
+    if graph is None:
+        print("Citation graph search: no citation graph found, returning hybrid results.")
+        return seeds[:top_k]
+
+    try:
+        query_vector = np.asarray(get_index_embedding(query_text), dtype=np.float32)
+        frontier = [hit["_source"].get("patent_id") for hit in seeds if hit["_source"].get("patent_id")]
+        documents = _fetch_with_embeddings(client, index_name, frontier)
+        scores = _cosine_scores(query_vector, documents)
+        hops = {doc_id: 0 for doc_id in documents}
+
+        for hop in range(1, max_hops + 1):
+            if time.monotonic() > deadline or len(documents) >= node_budget:
+                break
+            beam = sorted((doc_id for doc_id in frontier if doc_id in scores), key=scores.get, reverse=True)[:beam_width]
+            neighbors = graph.k_hop(beam, k=1)
+            frontier = [doc_id for doc_id in neighbors if doc_id not in hops][: node_budget - len(documents)]
+            if not frontier:
+                break
+            fetched = _fetch_with_embeddings(client, index_name, frontier)
+            documents.update(fetched)
+            scores.update(_cosine_scores(query_vector, fetched))
+            for doc_id in fetched:
+                hops[doc_id] = hop
+            # Citations to patents we never ingested can't be scored; don't revisit them
+            for doc_id in frontier:
+                hops.setdefault(doc_id, hop)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        results = []
+        for doc_id in ranked:
+            if not _matches_filters(documents[doc_id]["_source"], **filter_args):
+                continue
+            source = dict(documents[doc_id]["_source"])
+            source.pop("embedding", None)
+            source.pop(AREA_FIELD, None)
+            results.append({"_index": index_name, "_id": doc_id, "_score": scores[doc_id], "_hop": hops[doc_id], "_source": source})
+        return collapse_by_family(results)[:top_k]
+    except Exception as e:
+        print(f"Citation graph search error: {e}")
+        return seeds[:top_k]
+
+
+# Score first, then a tie-breaker unique per document so search_after never skips or repeats hits:
+# the shard and doc position inside a point in time, the document id without one
+STREAM_SORT = [{"_score": "desc"}, {"_shard_doc": "asc"}]
+STREAM_SORT_WITHOUT_PIT = [{"_score": "desc"}, {"_id": "asc"}]
+# k-NN returns at most k neighbours; this is the OpenSearch limit for k
+MAX_KNN_K = 10000
+
+
+def _stream_query(query_text, mode, filters, max_hits):
+    if mode == "semantic":
+        if not query_text:
+            raise ValueError("semantic streaming needs a query_text")
+        k = min(max_hits or MAX_KNN_K, MAX_KNN_K)
+        return _knn_clause(get_index_embedding(query_text), k, filters)
+    if mode == "keyword":
+        must = [{"match": {"abstract": query_text}}] if query_text else [{"match_all": {}}]
+        return {"bool": {"must": must, "filter": filters}}
+    raise ValueError(f"Unsupported streaming mode '{mode}'; use 'keyword' or 'semantic'")
+
+
+def _open_pit(client, index_name, keep_alive, routing=None):
+    params = {"keep_alive": keep_alive}
+    if routing:
+        params["routing"] = routing
+    try:
+        return client.create_pit(index=index_name, params=params)["pit_id"]
+    except Exception as e:
+        # Older clusters and clients without PIT still page consistently enough with plain search_after
+        print(f"Point in time unavailable, paging without it: {e}")
+        return None
+
+
+def stream_search_hits(
+    query_text=None,
+    mode="keyword",
+    start_date=None,
+    end_date=None,
+    assignee=None,
+    jurisdiction=None,
+    page_size=500,
+    source_fields=None,
+    max_hits=None,
+    keep_alive="2m",
+    research_area=None,
+):
+    """
+    Yield every hit for a query, one page at a time, using point-in-time and search_after.
+
+    Pages are fetched lazily with a trimmed _source, so memory stays flat no
+    matter how many documents match. Family collapsing is not applied; each
+    hit carries its family_key.
+
+    Args:
+        query_text (str): Query; keyword mode without a query matches every document.
+        mode (str): 'keyword' (BM25 on the abstract) or 'semantic' (k-NN, at most 10,000 hits).
+        start_date (str): Earliest publication date, inclusive.
+        end_date (str): Latest publication date, inclusive.
+        assignee (str): Assignee name filter, see build_filters.
+        jurisdiction (str or list): Patent office code filter.
+        page_size (int): Hits per request.
+        source_fields (list): Fields to return; defaults to SOURCE_FIELDS.
+        max_hits (int): Stop after this many hits.
+        keep_alive (str): How long the point in time stays open between pages.
+        research_area (str): Only patents ingested for this research area; defaults to the current scope.
+
+    Yields:
+        dict: Hits in the usual OpenSearch format.
+    """
+    client = get_shared_opensearch_client()
+    if mode == "semantic":
+        check_index_embedding_format(client, PATENT_INDEX)
+    research_area = research_area or current_research_area()
+    index_name, search_params = search_target(PATENT_INDEX, research_area)
+    filters = build_filters(start_date, end_date, assignee, jurisdiction, research_area=research_area)
+    query = _stream_query(query_text, mode, filters, max_hits)
+
+    pit_id = _open_pit(client, index_name, keep_alive, search_params.get("routing"))
+    yielded = 0
+    search_after = None
+    try:
+        while True:
+            body = {
+                "size": page_size if max_hits is None else min(page_size, max_hits - yielded),
+                "query": query,
+                "_source": source_fields or SOURCE_FIELDS,
+                "sort": STREAM_SORT if pit_id else STREAM_SORT_WITHOUT_PIT,
+                "track_total_hits": False,
+            }
+            if search_after is not None:
+                body["search_after"] = search_after
+            with span("search.stream_page", mode=mode, page_size=body["size"]) as attributes:
+                if pit_id:
+                    body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+                    response = client.search(body=body)
+                    # The cluster may hand back a new id for the next page
+                    pit_id = response.get("pit_id", pit_id)
+                else:
+                    response = client.search(index=index_name, body=body, **search_params)
+                hits = response["hits"]["hits"]
+                if attributes is not None:
+                    attributes["hits"] = len(hits)
+
+            for hit in hits:
+                yield hit
+            yielded += len(hits)
+            if len(hits) < body["size"] or (max_hits is not None and yielded >= max_hits):
+                return
+            search_after = hits[-1]["sort"]
+    finally:
+        if pit_id:
+            try:
+                client.delete_pit(body={"pit_id": [pit_id]})
+            except Exception as e:
+                print(f"Could not close point in time: {e}")
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+
+from patent_search_tools import SOURCE_FIELDS, stream_search_hits
+
+EXPORT_FORMATS = ("jsonl", "parquet")
+
+
+def _row(hit, fields):
+    source = hit.get("_source", {})
+    row = {"_id": hit.get("_id"), "_score": hit.get("_score")}
+    row.update({field: source.get(field) for field in fields})
+    return row
+
+
+def export_jsonl(hits, path, fields):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for hit in hits:
+            f.write(json.dumps(_row(hit, fields), ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def export_parquet(hits, path, fields, batch_size=1000):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from e
+
+    # Fixed schema so every batch is written without re-inferring types
+    schema = pa.schema(
+        [("_id", pa.string()), ("_score", pa.float64())]
+        + [(field, pa.int64() if field == "token_count" else pa.string()) for field in fields]
+    )
+    count = 0
+    batch = []
+    with pq.ParquetWriter(path, schema) as writer:
+        for hit in hits:
+            row = _row(hit, fields)
+            for field in fields:
+                if isinstance(row[field], list):
+                    row[field] = "; ".join(str(value) for value in row[field])
+                elif row[field] is not None and field != "token_count":
+                    row[field] = str(row[field])
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def export_search_results(output_path, query_text=None, mode="keyword", start_date=None, end_date=None,
+                          assignee=None, jurisdiction=None, fields=None, page_size=500, max_hits=None,
+                          export_format=None):
+    """
+    Stream every hit of a search to a JSONL or Parquet file.
+
+    Hits are written as each page arrives, so memory use does not grow with
+    the number of matches.
+
+    Args:
+        output_path (str): Destination file.
+        query_text (str): Query; keyword mode without a query exports the whole index.
+        mode (str): 'keyword' or 'semantic'.
+        start_date (str): Earliest publication date, inclusive.
+        end_date (str): Latest publication date, inclusive.
+        assignee (str): Assignee name filter.
+        jurisdiction (str or list): Patent office code filter.
+        fields (list): _source fields to export; defaults to SOURCE_FIELDS.
+        page_size (int): Hits fetched per request.
+        max_hits (int): Stop after this many hits.
+        export_format (str): 'jsonl' or 'parquet'; inferred from the file extension if omitted.
+
+    Returns:
+        int: Number of hits written.
+    """
+    fields = fields or SOURCE_FIELDS
+    export_format = export_format or ("parquet" if output_path.endswith(".parquet") else "jsonl")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{export_format}'; use one of {EXPORT_FORMATS}")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    hits = stream_search_hits(
+        query_text, mode=mode, start_date=start_date, end_date=end_date,
+        assignee=assignee, jurisdiction=jurisdiction, page_size=page_size, source_fields=fields, max_hits=max_hits,
+    )
+    if export_format == "parquet":
+        return export_parquet(hits, output_path, fields, batch_size=page_size)
+    return export_jsonl(hits, output_path, fields)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export all hits of a patent search to JSONL or Parquet.")
+    parser.add_argument("output", help="Output file (.jsonl or .parquet).")
+    parser.add_argument("--query", default=None, help="Search query; omit to export every patent.")
+    parser.add_argument("--mode", choices=["keyword", "semantic"], default="keyword")
+    parser.add_argument("--start-date", default=None, help="Earliest publication date (YYYY-MM-DD).")
+    parser.add_argument("--end-date", default=None, help="Latest publication date (YYYY-MM-DD).")
+    parser.add_argument("--assignee", default=None, help="Assignee name filter.")
+    parser.add_argument("--jurisdiction", nargs="+", default=None, help="Patent office codes, e.g. US EP.")
+    parser.add_argument("--fields", nargs="+", default=None, help="_source fields to export.")
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--max-hits", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        written = export_search_results(
+            args.output, args.query, mode=args.mode, start_date=args.start_date, end_date=args.end_date,
+            assignee=args.assignee, jurisdiction=args.jurisdiction, fields=args.fields, page_size=args.page_size, max_hits=args.max_hits,
+        )
+        print(f"✅ Exported {written} patents to '{args.output}'")
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
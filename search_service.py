@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from aiohttp import web
+
+from embedding_scheduler import get_embedding_scheduler
+from ollama_pool import get_ollama_pool
+from opensearch_client import get_shared_opensearch_client
+from patent_search_tools import fetch_patents, hybrid_search, iterative_search, keyword_search, semantic_search, stream_search_hits
+from semantic_cache import get_semantic_cache
+
+SERVICE_HOST = os.getenv("PATENT_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("PATENT_SERVICE_PORT", 8080))
+# Threads running the blocking search calls; also the size of the shared OpenSearch connection pool
+SERVICE_WORKERS = int(os.getenv("PATENT_SERVICE_WORKERS", 16))
+# Hits serialized per write when streaming a response
+STREAM_CHUNK_HITS = 50
+MAX_TOP_K = 1000
+
+
+def date_range_search(
+    query_text, start_date=None, end_date=None, top_k=20, citation_boost=0.0, assignee=None, jurisdiction=None,
+    research_area=None,
+):
+    """Hybrid search restricted to a publication date range, as used by the crew's date-range tool."""
+    if not start_date and not end_date:
+        raise ValueError("date-range search needs start_date or end_date")
+    return hybrid_search(
+        query_text, top_k=top_k, citation_boost=citation_boost, start_date=start_date, end_date=end_date,
+        assignee=assignee, jurisdiction=jurisdiction, research_area=research_area,
+    )
+
+
+SEARCH_MODES = {
+    "keyword": keyword_search,
+    "semantic": semantic_search,
+    "hybrid": hybrid_search,
+    "iterative": iterative_search,
+    "date-range": date_range_search,
+}
+STREAM_MODES = ("keyword", "semantic")
+
+INT_PARAMS = {"top_k", "refinement_steps", "page_size", "max_hits", "highlight_chars"}
+FLOAT_PARAMS = {"citation_boost"}
+LIST_PARAMS = {"jurisdiction", "source_fields", "id"}
+
+COALESCER_KEY = web.AppKey("coalescer", object)
+EXECUTOR_KEY = web.AppKey("executor", ThreadPoolExecutor)
+
+
+class RequestCoalescer:
+    """
+    Shares one in-flight execution between identical concurrent requests.
+
+    The first request for a key starts the work; requests with the same key
+    that arrive before it finishes await the same result instead of running
+    the search again. Nothing is kept once the work completes, so this is not
+    a cache: a request arriving afterwards runs a fresh search.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._in_flight = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def run(self, key, start):
+        """
+        Args:
+            key (hashable): Identity of the request.
+            start (callable): Returns an awaitable doing the work.
+
+        Returns:
+            The result of the shared execution.
+        """
+        future = self._in_flight.get(key) if self.enabled else None
+        if future is None:
+            future = asyncio.ensure_future(start())
+            self.executed += 1
+            if self.enabled:
+                self._in_flight[key] = future
+                future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # A client that disconnects must not cancel the search for the others waiting on it
+        return await asyncio.shield(future)
+
+    def stats(self):
+        return {"enabled": self.enabled, "executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+
+def _bad_request(message):
+    return web.HTTPBadRequest(text=json.dumps({"error": message}), content_type="application/json")
+
+
+async def _read_params(request):
+    """Merge query-string and JSON-body parameters and convert them to the search functions' types."""
+    params = dict(request.query)
+    for name in LIST_PARAMS & request.query.keys():
+        params[name] = request.query.getall(name)
+    if request.can_read_body:
+        try:
+            body = await request.json()
+        except ValueError:
+            raise _bad_request("Request body must be a JSON object")
+        if not isinstance(body, dict):
+            raise _bad_request("Request body must be a JSON object")
+        params.update(body)
+
+    if "q" in params:
+        params["query_text"] = params.pop("q")
+    try:
+        for name in INT_PARAMS & params.keys():
+            params[name] = int(params[name])
+        for name in FLOAT_PARAMS & params.keys():
+            params[name] = float(params[name])
+    except (TypeError, ValueError) as e:
+        raise _bad_request(f"Invalid numeric parameter: {e}")
+    for name in LIST_PARAMS & params.keys():
+        value = params[name]
+        values = value if isinstance(value, list) else [value]
+        params[name] = [code.strip() for item in values for code in str(item).split(",") if code.strip()]
+    if not 0 < params.get("top_k", 1) <= MAX_TOP_K:
+        raise _bad_request(f"top_k must be between 1 and {MAX_TOP_K}")
+    return params
+
+
+def _check_params(func, params):
+    accepted = inspect.signature(func).parameters
+    unknown = sorted(name for name in params if name not in accepted)
+    if unknown:
+        raise _bad_request(f"Unknown parameters: {', '.join(unknown)}")
+
+
+async def _write_json_stream(request, header, hits):
+    """
+    Send {header..., "results": [...]} as a chunked response, a few hits per write.
+
+    The full response body is never built in memory, and the client starts
+    receiving hits while the rest are still being serialized.
+    """
+    response = web.StreamResponse(headers={"Content-Type": "application/json"})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    await response.write(json.dumps(header)[:-1].encode("utf-8") + b', "results": [')
+    for start in range(0, len(hits), STREAM_CHUNK_HITS):
+        chunk = ", ".join(json.dumps(hit) for hit in hits[start:start + STREAM_CHUNK_HITS])
+        await response.write(((", " if start else "") + chunk).encode("utf-8"))
+    await response.write(b"]}")
+    await response.write_eof()
+    return response
+
+
+async def handle_search(request):
+    mode = request.match_info["mode"]
+    search = SEARCH_MODES.get(mode)
+    if search is None:
+        raise web.HTTPNotFound(text=json.dumps({"error": f"Unknown search mode '{mode}'"}), content_type="application/json")
+    params = await _read_params(request)
+    _check_params(search, params)
+    if not params.get("query_text"):
+        raise _bad_request("Missing query parameter 'q'")
+
+    loop = asyncio.get_running_loop()
+    executor = request.app[EXECUTOR_KEY]
+    key = (mode, json.dumps(params, sort_keys=True))
+    try:
+        hits = await request.app[COALESCER_KEY].run(key, lambda: loop.run_in_executor(executor, partial(search, **params)))
+    except ValueError as e:
+        raise _bad_request(str(e))
+    return await _write_json_stream(request, {"mode": mode, "count": len(hits)}, hits)
+
+
+def _next_page(iterator, size):
+    return list(itertools.islice(iterator, size))
+
+
+async def handle_stream(request):
+    """Every hit of a keyword or semantic query as newline-delimited JSON, paged with a point in time."""
+    params = await _read_params(request)
+    _check_params(stream_search_hits, params)
+    if params.get("mode", "keyword") not in STREAM_MODES:
+        raise _bad_request(f"Streaming supports the modes {', '.join(STREAM_MODES)}")
+
+    loop = asyncio.get_running_loop()
+    executor = request.app[EXECUTOR_KEY]
+    hits = stream_search_hits(**params)
+    page_size = params.get("page_size", 500)
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    response.enable_chunked_encoding()
+    try:
+        # Pages are pulled one at a time, so a slow client holds back the search instead of filling memory
+        page = await loop.run_in_executor(executor, _next_page, hits, page_size)
+        await response.prepare(request)
+        while page:
+            await response.write("".join(json.dumps(hit) + "\n" for hit in page).encode("utf-8"))
+            page = await loop.run_in_executor(executor, _next_page, hits, page_size)
+        await response.write_eof()
+    finally:
+        # Closes the point in time even when the client disconnects mid-stream
+        await loop.run_in_executor(executor, hits.close)
+    return response
+
+
+async def handle_patents(request):
+    """Full documents by id, for clients that searched with highlight_chars and expand a result."""
+    params = await _read_params(request)
+    patent_ids = params.get("id")
+    if not patent_ids:
+        raise _bad_request("Missing parameter 'id'")
+    loop = asyncio.get_running_loop()
+    documents = await loop.run_in_executor(
+        request.app[EXECUTOR_KEY], partial(fetch_patents, patent_ids, source_fields=params.get("source_fields"))
+    )
+    return web.json_response({"patents": documents})
+
+
+async def handle_health(request):
+    return web.json_response({
+        "status": "ok",
+        "coalescing": request.app[COALESCER_KEY].stats(),
+        "ollama_endpoints": get_ollama_pool().stats(),
+        "embedding_queue": get_embedding_scheduler().stats(),
+        "semantic_cache": get_semantic_cache().stats(),
+    })
+
+
+async def _start_executor(app):
+    app[EXECUTOR_KEY] = ThreadPoolExecutor(max_workers=app["workers"], thread_name_prefix="search")
+
+
+async def _stop_executor(app):
+    app[EXECUTOR_KEY].shutdown(wait=False)
+
+
+def create_app(workers=SERVICE_WORKERS, coalesce=True):
+    """
+    Build the search service application.
+
+    Searches run on a thread pool against the process-wide OpenSearch client,
+    Ollama endpoint pool and embedding scheduler, so every request reuses
+    warm connections.
+
+    Args:
+        workers (int): Threads running blocking search calls.
+        coalesce (bool): Share results between identical concurrent requests.
+
+    Returns:
+        web.Application: The application.
+    """
+    app = web.Application()
+    app["workers"] = workers
+    app[COALESCER_KEY] = RequestCoalescer(enabled=coalesce)
+    app.on_startup.append(_start_executor)
+    app.on_cleanup.append(_stop_executor)
+    app.router.add_route("*", "/search/{mode}", handle_search)
+    app.router.add_route("*", "/stream", handle_stream)
+    app.router.add_route("*", "/patents", handle_patents)
+    app.router.add_get("/health", handle_health)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve patent search over HTTP.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="Threads running blocking search calls.")
+    parser.add_argument("--no-coalesce", action="store_true", help="Run every request even if an identical one is in flight.")
+    args = parser.parse_args()
+
+    # Connect once up front, with one pooled connection per worker thread
+    get_shared_opensearch_client(pool_maxsize=args.workers)
+    print(f"🔎 Patent search service on http://{args.host}:{args.port}")
+    web.run_app(create_app(args.workers, not args.no_coalesce), host=args.host, port=args.port, print=None)
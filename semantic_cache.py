@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Cosine similarity above which a cached query's results are reused
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("PATENT_SEMANTIC_CACHE_THRESHOLD", 0.95))
+# Cached queries kept per process; 0 disables the cache
+SEMANTIC_CACHE_SIZE = int(os.getenv("PATENT_SEMANTIC_CACHE_SIZE", 512))
+# How often the index's data_version is re-read to notice ingestion by other processes
+VERSION_CHECK_SECONDS = float(os.getenv("PATENT_SEMANTIC_CACHE_VERSION_CHECK_SECONDS", 5))
+
+
+def _index_meta(client, index_name):
+    mapping = client.indices.get_mapping(index=index_name)
+    return next(iter(mapping.values()), {}).get("mappings", {}).get("_meta", {})
+
+
+def mark_index_updated(client, index_name):
+    """
+    Record that an index's documents changed, so every process drops its cached results for it.
+
+    The version is kept in the mapping _meta next to the embedding format.
+
+    Args:
+        client: OpenSearch client.
+        index_name (str): Index that was written to.
+    """
+    meta = dict(_index_meta(client, index_name))
+    # _meta is replaced as a whole, so the embedding format keys are written back with the new version
+    meta["data_version"] = time.time_ns()
+    client.indices.put_mapping(index=index_name, body={"_meta": meta})
+    get_semantic_cache().invalidate(index_name, meta["data_version"])
+
+
+def index_data_version(client, index_name):
+    """
+    Version mark_index_updated last recorded for an index.
+
+    Args:
+        client: OpenSearch client.
+        index_name (str): Index or alias.
+
+    Returns:
+        int: The data_version, or None if the index was never marked.
+
+    Raises:
+        Exception: The client's error if the index is missing or OpenSearch cannot be reached.
+    """
+    return _index_meta(client, index_name).get("data_version")
+
+
+class _Entry:
+    __slots__ = ("slot", "index_name", "params_key", "query_text", "hits")
+
+    def __init__(self, slot, index_name, params_key, query_text, hits):
+        self.slot = slot
+        self.index_name = index_name
+        self.params_key = params_key
+        self.query_text = query_text
+        self.hits = hits
+
+
+class SemanticQueryCache:
+    """
+    LRU cache of search results keyed by query embedding.
+
+    Query embeddings are stored normalized in one matrix, so a lookup is a
+    single matrix-vector product. A cached result is reused only for the same
+    index, search mode, top_k and filters, and only when the new query's
+    cosine similarity to a cached query reaches the threshold. A repeat of the
+    exact query text is answered before it is embedded at all.
+    """
+
+    def __init__(self, capacity=SEMANTIC_CACHE_SIZE, threshold=SEMANTIC_CACHE_THRESHOLD,
+                 version_check_seconds=VERSION_CHECK_SECONDS):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.version_check_seconds = version_check_seconds
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (index, params_key, query_text) -> _Entry, oldest first
+        self._matrix = None
+        self._free_slots = list(range(capacity - 1, -1, -1))
+        self._versions = {}  # index -> (data_version, checked at)
+        self._metrics = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        self._similarity_sum = 0.0
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    @staticmethod
+    def params_key(mode, **params):
+        """Canonical form of everything besides the query that determines the results."""
+        return json.dumps({"mode": mode, **params}, sort_keys=True, default=str)
+
+    def _refresh_version(self, client, index_name):
+        now = time.monotonic()
+        _, checked_at = self._versions.get(index_name, (None, -float("inf")))
+        if now - checked_at < self.version_check_seconds:
+            return
+        try:
+            current = _index_meta(client, index_name).get("data_version")
+        except Exception:
+            return
+        self.invalidate(index_name, current, only_if_changed=True)
+
+    def invalidate(self, index_name=None, data_version=None, only_if_changed=False):
+        """
+        Drop cached results for one index, or for all indices.
+
+        Args:
+            index_name (str): Index whose entries are dropped; None clears everything.
+            data_version: Version the index is now at.
+            only_if_changed (bool): Keep the entries if the index is still at data_version.
+        """
+        with self._lock:
+            if index_name is not None:
+                known = self._versions.get(index_name, (None, 0))[0]
+                self._versions[index_name] = (data_version, time.monotonic())
+                if only_if_changed and known == data_version:
+                    return
+            stale = [key for key, entry in self._entries.items() if index_name is None or entry.index_name == index_name]
+            for key in stale:
+                self._remove(key)
+            if stale:
+                self._metrics["invalidations"] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._free_slots.append(entry.slot)
+
+    def lookup(self, client, index_name, params_key, query_text, embed):
+        """
+        Find cached results for a query.
+
+        Args:
+            client: OpenSearch client, used to notice index updates from other processes.
+            index_name (str): Index searched.
+            params_key (str): Result of params_key() for the search.
+            query_text (str): Query text.
+            embed (callable): Returns the query embedding; only called if the exact text is not cached.
+
+        Returns:
+            tuple: (cached hits or None, query embedding or None). Pass the embedding to store() on a miss.
+        """
+        if not self.enabled:
+            return None, embed()
+        self._refresh_version(client, index_name)
+        key = (index_name, params_key, query_text)
+        with self._lock:
+            self._metrics["lookups"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._metrics["exact_hits"] += 1
+                return list(entry.hits), None
+
+        embedding = embed()
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            candidates = [entry for entry in self._entries.values()
+                          if entry.index_name == index_name and entry.params_key == params_key]
+            if candidates and self._matrix is not None and self._matrix.shape[1] == len(query):
+                slots = np.fromiter((entry.slot for entry in candidates), dtype=np.int64, count=len(candidates))
+                similarities = self._matrix[slots] @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry = candidates[best]
+                    self._entries.move_to_end((entry.index_name, entry.params_key, entry.query_text))
+                    self._metrics["semantic_hits"] += 1
+                    self._similarity_sum += float(similarities[best])
+                    return list(entry.hits), embedding
+            self._metrics["misses"] += 1
+        return None, embedding
+
+    def store(self, index_name, params_key, query_text, embedding, hits):
+        """Cache the results of a search that missed, evicting the least recently used entry if full."""
+        if not self.enabled or embedding is None:
+            return
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        key = (index_name, params_key, query_text)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != len(vector):
+                # First entry, or the embedding format changed: start over at the new dimension
+                self._matrix = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+                for stale in list(self._entries):
+                    self._remove(stale)
+            if key in self._entries:
+                self._remove(key)
+            if not self._free_slots:
+                self._remove(next(iter(self._entries)))
+                self._metrics["evictions"] += 1
+            slot = self._free_slots.pop()
+            self._matrix[slot] = vector
+            self._entries[key] = _Entry(slot, index_name, params_key, query_text, list(hits))
+
+    def stats(self):
+        """
+        Hit-rate metrics for tuning the threshold and capacity.
+
+        Returns:
+            dict: entry count, lookups, exact and semantic hits, misses, hit rate,
+            mean similarity of semantic hits, evictions and invalidations.
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            hits = metrics["exact_hits"] + metrics["semantic_hits"]
+            metrics.update({
+                "entries": len(self._entries),
+                "capacity": self.capacity,
+                "threshold": self.threshold,
+                "hit_rate": round(hits / metrics["lookups"], 4) if metrics["lookups"] else 0.0,
+                "mean_semantic_similarity": (
+                    round(self._similarity_sum / metrics["semantic_hits"], 4) if metrics["semantic_hits"] else 0.0
+                ),
+            })
+            return metrics
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """Process-wide semantic query cache used by semantic and hybrid search."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SemanticQueryCache()
+        return _cache
+
+
+def set_semantic_cache(cache):
+    """Replace the process-wide cache, e.g. with one using another threshold."""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+        return _cache
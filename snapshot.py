@@ -0,0 +1,341 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from embedding_format import EmbeddingFormatMismatch, describe_mismatches, embedding_format_mismatches
+from index_layout import (
+    AREA_FIELD, DEFAULT_AREA, INDEX_LAYOUT, area_key, create_patent_index, drop_patent_index,
+    index_documents, write_target,
+)
+from opensearch_client import PATENT_INDEX, clear_derived_index_state, get_shared_opensearch_client, register_shared_opensearch_client
+
+SNAPSHOT_DIR = os.getenv("PATENT_SNAPSHOT_DIR", "outputs/snapshots")
+SNAPSHOT_FORMAT = "patent-index-snapshot"
+SNAPSHOT_VERSION = 1
+# Documents per metadata block on export and per bulk request on import
+SNAPSHOT_BLOCK_SIZE = int(os.getenv("PATENT_SNAPSHOT_BLOCK_SIZE", 1000))
+# Bulk requests in flight while importing
+SNAPSHOT_BULK_WORKERS = int(os.getenv("PATENT_SNAPSHOT_BULK_WORKERS", 4))
+VECTOR_FIELD = "embedding"
+# Index settings carried to the restored index; the rest (uuid, creation date, routing) belongs to the source cluster
+PORTABLE_SETTINGS = (
+    "index.knn",
+    "index.number_of_shards",
+    "index.number_of_replicas",
+    "index.refresh_interval",
+    "index.analysis",
+)
+
+MANIFEST_MEMBER = "manifest.json"
+METADATA_MEMBER = "metadata.jsonl"
+VECTORS_MEMBER = "vectors.bin"
+VECTOR_DTYPES = {"float32": np.float32, "fp16": np.float16, "int8": np.int8}
+
+
+def _index_profile(client, index_name):
+    mapping = next(iter(client.indices.get_mapping(index=index_name).values()))["mappings"]
+    settings = next(iter(client.indices.get_settings(index=index_name, flat_settings=True).values()))["settings"]
+    portable = {
+        key: value for key, value in settings.items()
+        if any(key == prefix or key.startswith(prefix + ".") for prefix in PORTABLE_SETTINGS)
+    }
+    return mapping, portable
+
+
+def _vector_dtype(meta, precision):
+    if precision == "auto":
+        # Stored values are already rounded to the index precision, so this is lossless
+        return {"int8": "int8", "fp16": "fp16"}.get(meta.get("embedding_precision"), "float32")
+    if precision not in VECTOR_DTYPES:
+        raise ValueError(f"Unsupported snapshot precision '{precision}'; use auto or one of {tuple(VECTOR_DTYPES)}")
+    if meta.get("embedding_precision") == "int8" and precision != "int8":
+        # Byte vectors are exact in any of the formats, but keep them as bytes
+        return "int8"
+    return precision
+
+
+def export_snapshot(path=None, precision="auto", block_size=SNAPSHOT_BLOCK_SIZE):
+    """
+    Write the whole patent index to a single portable snapshot file.
+
+    The file is a zip archive holding a manifest (mapping, embedding format
+    and portable index settings), the document fields as compressed
+    column-oriented JSON blocks, and every embedding as one uncompressed
+    row-major array in index order. Importing it needs neither the source
+    documents nor Ollama.
+
+    Args:
+        path (str): Output file; defaults to a timestamped file under SNAPSHOT_DIR.
+        precision (str): Vector storage, 'auto' (the index precision), 'float32', 'fp16' or 'int8'.
+            fp16 halves the file size of a float32 index at a small loss of accuracy.
+        block_size (int): Documents per metadata block.
+
+    Returns:
+        dict: The manifest written to the file, with its path.
+    """
+    from patent_search_tools import stream_search_hits
+
+    client = get_shared_opensearch_client()
+    mapping, settings = _index_profile(client, PATENT_INDEX)
+    meta = mapping.get("_meta", {})
+    fields = [field for field in mapping.get("properties", {}) if field != VECTOR_FIELD]
+    dtype = _vector_dtype(meta, precision)
+    dimension = mapping.get("properties", {}).get(VECTOR_FIELD, {}).get("dimension") or meta.get("embedding_dimension")
+
+    path = path or os.path.join(SNAPSHOT_DIR, f"{PATENT_INDEX}-{time.strftime('%Y%m%d-%H%M%S')}.zip")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    started = time.perf_counter()
+    documents = 0
+    blocks = 0
+    areas = {}
+    # Both members grow in one pass over the index, so they are staged next to the output and zipped at the end
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(path) or ".") as staging:
+        metadata_path = os.path.join(staging, METADATA_MEMBER)
+        vectors_path = os.path.join(staging, VECTORS_MEMBER)
+        with open(metadata_path, "w", encoding="utf-8") as metadata, open(vectors_path, "wb") as vectors:
+            def write_block(hits):
+                for hit in hits:
+                    area = area_key(hit["_source"].get(AREA_FIELD)) or DEFAULT_AREA
+                    areas[area] = areas.get(area, 0) + 1
+                block = {"ids": [hit["_id"] for hit in hits], "columns": {}}
+                for field in fields:
+                    block["columns"][field] = [hit["_source"].get(field) for hit in hits]
+                metadata.write(json.dumps(block, separators=(",", ":")) + "\n")
+                matrix = np.zeros((len(hits), dimension), dtype=VECTOR_DTYPES[dtype])
+                for row, hit in enumerate(hits):
+                    vector = hit["_source"].get(VECTOR_FIELD)
+                    if vector is not None:
+                        matrix[row] = vector
+                vectors.write(matrix.astype(matrix.dtype.newbyteorder("<"), copy=False).tobytes())
+
+            hits = []
+            for hit in stream_search_hits(page_size=block_size, source_fields=fields + [VECTOR_FIELD]):
+                hits.append(hit)
+                if len(hits) == block_size:
+                    write_block(hits)
+                    documents += len(hits)
+                    blocks += 1
+                    hits = []
+            if hits:
+                write_block(hits)
+                documents += len(hits)
+                blocks += 1
+
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "source_index": PATENT_INDEX,
+            "layout": INDEX_LAYOUT,
+            "documents": documents,
+            # Sizes the area indices when the snapshot is restored in the per-area layout
+            "areas": areas,
+            "blocks": blocks,
+            "fields": fields,
+            "vectors": {"field": VECTOR_FIELD, "dtype": dtype, "dimension": dimension, "byte_order": "little"},
+            "mapping": mapping,
+            "settings": settings,
+        }
+        partial_path = path + ".partial"
+        with zipfile.ZipFile(partial_path, "w", allowZip64=True) as archive:
+            archive.writestr(MANIFEST_MEMBER, json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+            archive.write(metadata_path, METADATA_MEMBER, compress_type=zipfile.ZIP_DEFLATED)
+            # Vectors barely compress, and stored bytes can be read straight into arrays
+            archive.write(vectors_path, VECTORS_MEMBER, compress_type=zipfile.ZIP_STORED)
+        os.replace(partial_path, path)
+
+    manifest["path"] = path
+    manifest["seconds"] = round(time.perf_counter() - started, 2)
+    return manifest
+
+
+def read_manifest(path):
+    """Read a snapshot's manifest without loading its documents."""
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read(MANIFEST_MEMBER))
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"'{path}' is not a patent index snapshot")
+    if manifest.get("version", 0) > SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot format version {manifest['version']} is newer than this reader ({SNAPSHOT_VERSION})")
+    return manifest
+
+
+def check_snapshot_compatibility(manifest):
+    """
+    Reject a snapshot whose vectors cannot be searched with the configured embedding format.
+
+    Args:
+        manifest (dict): Snapshot manifest.
+
+    Raises:
+        EmbeddingFormatMismatch: If the embedding model, dimension or precision differ from
+            PATENT_EMBEDDING_*, or the stored vectors disagree with the snapshot's own mapping.
+    """
+    meta = manifest["mapping"].get("_meta", {})
+    if not meta:
+        raise EmbeddingFormatMismatch(
+            "Snapshot has no embedding format metadata, so its vectors cannot be verified. "
+            "Re-export it from an index created by this version."
+        )
+    mismatched = embedding_format_mismatches(meta)
+    if mismatched:
+        raise EmbeddingFormatMismatch(
+            f"Snapshot was built with a different embedding format ({describe_mismatches(mismatched)}). "
+            "Re-run ingestion or change PATENT_EMBEDDING_* to match."
+        )
+    vectors = manifest["vectors"]
+    mapped_dimension = manifest["mapping"].get("properties", {}).get(vectors["field"], {}).get("dimension")
+    if not vectors["dimension"] == mapped_dimension == meta.get("embedding_dimension"):
+        raise EmbeddingFormatMismatch(
+            f"Snapshot vectors have dimension {vectors['dimension']} but its mapping declares "
+            f"{mapped_dimension} and its metadata {meta.get('embedding_dimension')}"
+        )
+    if meta.get("embedding_precision") == "int8" and vectors["dtype"] != "int8":
+        raise EmbeddingFormatMismatch("Snapshot of an int8 index must store int8 vectors")
+
+
+def _read_blocks(archive, manifest):
+    """Yield each metadata block with its vectors as a (rows, dimension) array."""
+    vectors = manifest["vectors"]
+    dtype = np.dtype(VECTOR_DTYPES[vectors["dtype"]]).newbyteorder("<")
+    row_bytes = dtype.itemsize * vectors["dimension"]
+    with archive.open(METADATA_MEMBER) as metadata, archive.open(VECTORS_MEMBER) as blob:
+        for line in metadata:
+            block = json.loads(line)
+            data = blob.read(row_bytes * len(block["ids"]))
+            if len(data) != row_bytes * len(block["ids"]):
+                raise ValueError("Snapshot vector data is shorter than its metadata; the file is truncated")
+            block["vectors"] = np.frombuffer(data, dtype=dtype).reshape(len(block["ids"]), vectors["dimension"])
+            yield block
+
+
+def _bulk_load(client, index_name, actions):
+    response = client.bulk(body=actions, index=index_name)
+    if response.get("errors"):
+        failed = [item for item in response["items"] if next(iter(item.values())).get("error")]
+        raise RuntimeError(f"{len(failed)} documents failed to import, e.g. {next(iter(failed[0].values()))['error']}")
+    return len(actions) // 2
+
+
+def import_snapshot(path, client=None, index_name=PATENT_INDEX, replace=False, workers=SNAPSHOT_BULK_WORKERS):
+    """
+    Load a snapshot into an index with bulk requests, without re-embedding anything.
+
+    The index is created in the configured layout from the snapshot's mapping
+    and settings, with refreshes and replicas turned off while loading and
+    restored afterwards. Shard counts are re-derived when the snapshot was
+    taken in another layout.
+    Trend rollups are rebuilt from the loaded documents; the topic cluster
+    model is not part of the snapshot, so documents keep their cluster ids
+    but new patents are only assigned once topic_clusters.py has run again.
+
+    Args:
+        path (str): Snapshot file written by export_snapshot.
+        client: OpenSearch client; defaults to the shared client.
+        index_name (str): Index (or alias in the per-area layout) to create.
+        replace (bool): Delete the index first if it exists.
+        workers (int): Bulk requests in flight.
+
+    Returns:
+        dict: Documents loaded, seconds taken and the source manifest.
+
+    Raises:
+        EmbeddingFormatMismatch: If the snapshot is incompatible with the configured embedding format.
+        ValueError: If the index exists and replace is False.
+    """
+    from semantic_cache import mark_index_updated
+    from trend_rollups import get_trend_rollups
+
+    manifest = read_manifest(path)
+    # Everything is checked before the target index is touched
+    check_snapshot_compatibility(manifest)
+    client = client or get_shared_opensearch_client()
+    if client.indices.exists(index=index_name):
+        if not replace:
+            raise ValueError(f"Index '{index_name}' already exists; pass replace=True (--replace) to overwrite it")
+        drop_patent_index(client, index_name)
+
+    settings = dict(manifest["settings"])
+    if manifest.get("layout", "single") != INDEX_LAYOUT:
+        settings.pop("index.number_of_shards", None)
+    mapping = dict(manifest["mapping"])
+    # Snapshots of indices from before research areas still restore with the keyword field areas are filtered on
+    mapping["properties"] = {AREA_FIELD: {"type": "keyword"}, **mapping.get("properties", {})}
+    # Older snapshots have no area counts; their patents all go to the default area
+    expected_docs = index_documents(manifest.get("areas") or {DEFAULT_AREA: manifest["documents"]})
+    create_patent_index(client, index_name, {"mappings": mapping, "settings": settings}, expected_docs)
+    client.indices.put_settings(index=index_name, body={"index": {"refresh_interval": "-1", "number_of_replicas": 0}})
+    clear_derived_index_state(index_name)
+    rollups = get_trend_rollups(index_name)
+
+    to_values = (lambda row: row.astype(np.int32).tolist()) if manifest["vectors"]["dtype"] == "int8" else (lambda row: row.astype(np.float32).tolist())
+    started = time.perf_counter()
+    loaded = 0
+    with zipfile.ZipFile(path) as archive, ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        pending = []
+        for block in _read_blocks(archive, manifest):
+            columns = block["columns"]
+            documents = []
+            actions = []
+            for row, doc_id in enumerate(block["ids"]):
+                document = {field: values[row] for field, values in columns.items() if values[row] is not None}
+                document[manifest["vectors"]["field"]] = to_values(block["vectors"][row])
+                documents.append(document)
+                target, routing = write_target(index_name, document.get(AREA_FIELD))
+                actions.append({"index": {"_index": target, "_id": doc_id, **({"routing": routing} if routing else {})}})
+                actions.append(document)
+            pending.append(executor.submit(_bulk_load, client, index_name, actions))
+            rollups.upsert(documents)
+            # Bounded, so a large snapshot never sits in memory as queued requests
+            while len(pending) >= 2 * max(workers, 1):
+                loaded += pending.pop(0).result()
+        for future in pending:
+            loaded += future.result()
+
+    # None puts a setting the source index never changed back to the cluster default
+    client.indices.put_settings(index=index_name, body={"index": {
+        "refresh_interval": settings.get("index.refresh_interval"),
+        "number_of_replicas": settings.get("index.number_of_replicas"),
+    }})
+    client.indices.refresh(index=index_name)
+    mark_index_updated(client, index_name)
+    count = client.count(index=index_name)["count"]
+    if count != manifest["documents"]:
+        raise RuntimeError(f"Imported {count} documents but the snapshot holds {manifest['documents']}")
+    return {"documents": loaded, "seconds": round(time.perf_counter() - started, 2), "manifest": manifest}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the patent index to a portable snapshot file, or import one.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=9200)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write the index to a snapshot file.")
+    export_parser.add_argument("path", nargs="?", default=None)
+    export_parser.add_argument("--precision", default="auto", choices=["auto", *VECTOR_DTYPES])
+    export_parser.add_argument("--block-size", type=int, default=SNAPSHOT_BLOCK_SIZE)
+    import_parser = commands.add_parser("import", help="Bulk-load a snapshot file into the index.")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--index", default=PATENT_INDEX)
+    import_parser.add_argument("--replace", action="store_true", help="Overwrite the index if it exists.")
+    import_parser.add_argument("--workers", type=int, default=SNAPSHOT_BULK_WORKERS)
+    args = parser.parse_args()
+
+    client = get_shared_opensearch_client(args.host, args.port)
+    # Export streams through the search helpers, which use the default shared client
+    register_shared_opensearch_client(client)
+    if args.command == "export":
+        manifest = export_snapshot(args.path, args.precision, args.block_size)
+        size_mb = os.path.getsize(manifest["path"]) / 2 ** 20
+        print(f"✅ Exported {manifest['documents']} patents ({manifest['vectors']['dtype']} vectors) "
+              f"to '{manifest['path']}' ({size_mb:.1f} MiB, {manifest['seconds']}s)")
+    else:
+        result = import_snapshot(args.path, client, args.index, args.replace, args.workers)
+        print(f"✅ Imported {result['documents']} patents into '{args.index}' in {result['seconds']}s "
+              f"({result['documents'] / max(result['seconds'], 1e-9):.0f} docs/s)")
@@ -2,14 +2,27 @@ import streamlit as st
 from datetime import datetime
 import os
 import logging
-import requests
+import queue
+import threading
 from dotenv import load_dotenv
 
-from patent_crew import run_patent_analysis, test_model
-from patent_search_tools import keyword_search, semantic_search, hybrid_search, iterative_search
-from opensearch_client import get_opensearch_client
+from analysis_checkpoint import DELTA_TASK_NAMES, TASK_NAMES
+from patent_search_tools import keyword_search, semantic_search, hybrid_search, iterative_search, citation_graph_search, fetch_patents, hit_snippet
+from embedding_scheduler import get_embedding_scheduler
+from ollama_pool import get_ollama_pool
+from semantic_cache import get_semantic_cache
+from trend_rollups import get_trend_rollups
+from opensearch_client import get_shared_opensearch_client
 from embeddings import get_embedding
 
+# Seconds before cached health checks and model lists are refreshed
+STATUS_TTL_SECONDS = 60
+RESULTS_PER_PAGE = 20
+# Number of distinct queries whose results are kept in session state
+MAX_CACHED_SEARCHES = 20
+# Characters of abstract returned per hit; the full abstract is fetched when expanded
+SNIPPET_CHARS = 300
+
 # Setup directories
 os.makedirs("outputs/patent_analysis", exist_ok=True)
 os.makedirs("outputs/logs", exist_ok=True)
@@ -24,16 +37,79 @@ logging.basicConfig(
 load_dotenv()
 st.set_page_config(page_title="Patent Innovation Predictor", page_icon="🔬", layout="centered")
 
+# Resources below survive Streamlit reruns and are refreshed on a TTL
+@st.cache_resource(ttl=3600, show_spinner=False)
+def get_search_client():
+    return get_shared_opensearch_client()
+
+
+@st.cache_data(ttl=STATUS_TTL_SECONDS, show_spinner=False)
+def get_ollama_tags():
+    return get_ollama_pool().list_models()
+
+
 # Fetch Ollama models for dropdowns
 def get_ollama_models():
     try:
-        response = requests.get("http://localhost:11434/api/tags")
-        if response.status_code == 200:
-            models = response.json().get("models", [])
-            return [m.get("name") for m in models if m.get("name")]
-    except:
-        pass
-    return []
+        return [m.get("name") for m in get_ollama_tags() if m.get("name")]
+    except Exception:
+        return []
+
+
+@st.cache_data(ttl=STATUS_TTL_SECONDS, show_spinner=False)
+def get_index_stats():
+    return get_search_client().cat.indices(format="json")
+
+
+@st.cache_data(ttl=STATUS_TTL_SECONDS * 5, show_spinner=False)
+def get_embedding_health():
+    try:
+        return {"ok": True, "dimension": len(get_embedding("test"))}
+    except Exception as e:
+        logging.exception("Embedding error")
+        return {"ok": False, "error": str(e)}
+
+
+def cached_search(kind, query, search, **kwargs):
+    """Run a search once per (kind, query, params) and keep the hits in session state."""
+    cache = st.session_state.setdefault("search_cache", {})
+    key = (kind, query, tuple(sorted(kwargs.items())))
+    if key not in cache:
+        cache[key] = search(query, **kwargs)
+        while len(cache) > MAX_CACHED_SEARCHES:
+            cache.pop(next(iter(cache)))
+    return cache[key]
+
+
+@st.cache_data(ttl=STATUS_TTL_SECONDS * 5, show_spinner=False)
+def get_full_patent(patent_id):
+    return fetch_patents([patent_id]).get(patent_id, {})
+
+
+def render_results_page(results, key):
+    """Render one page of hits; only the visible page is turned into markdown."""
+    st.success(f"Found {len(results)} results")
+    if not results:
+        return
+    pages = (len(results) - 1) // RESULTS_PER_PAGE + 1
+    page_number = st.number_input("Page", min_value=1, max_value=pages, value=1, key=f"{key}_page") if pages > 1 else 1
+    start = (page_number - 1) * RESULTS_PER_PAGE
+    st.caption(f"Showing {start + 1}-{min(start + RESULTS_PER_PAGE, len(results))} of {len(results)}")
+    expanded = st.session_state.setdefault("expanded_patents", set())
+    for r in results[start:start + RESULTS_PER_PAGE]:
+        src = r.get("_source", {})
+        patent_id = src.get("patent_id") or r.get("_id")
+        st.markdown(f"**{src.get('title', 'No Title')}**")
+        if patent_id in expanded:
+            # Fetched by id only when asked for, so result pages carry fragments rather than full abstracts
+            abstract = src.get("abstract") or get_full_patent(patent_id).get("abstract", "")
+        else:
+            abstract = hit_snippet(r, SNIPPET_CHARS) + "..."
+        st.markdown(f"- 📅 Date: {src.get('publication_date', 'N/A')}\n- 🆔 ID: {patent_id or 'N/A'}\n- 📄 Abstract: {abstract}")
+        if patent_id not in expanded and st.button("Show full abstract", key=f"{key}_full_{patent_id}"):
+            expanded.add(patent_id)
+            st.rerun()
+        st.markdown("---")
 
 ollama_models = get_ollama_models() or ["llama2:latest", "deepseek-r1:1.5b"]
 
@@ -50,6 +126,7 @@ st.markdown("""
 # Sidebar Navigation
 page = st.sidebar.selectbox("Choose Operation", [
     "Patent Trend Analysis",
+    "Patent Trends",
     "Search Patents",
     "Iterative Exploration",
     "System Status",
@@ -60,51 +137,156 @@ if page == "Patent Trend Analysis":
     st.subheader("📊 Comprehensive Patent Trend Analysis")
     research_area = st.text_input("Enter research area:", "", placeholder="Lithium Battery")
     model_name = st.selectbox("Select Ollama model:", ollama_models)
+    delta = st.checkbox(
+        "Only analyze patents new since the last report",
+        help="Updates the previous report for this area and model; runs the full analysis if there is none.",
+    )
     if st.button("Run Analysis"):
+        # CrewAI and LangChain take seconds to import, so the search and status pages never load them
+        from patent_crew import run_patent_analysis, test_model
+
         if not test_model(model_name):
             st.error(f"Model '{model_name}' failed validation. Please try another.")
         else:
-            with st.spinner("Analyzing patents..."):
-                result = run_patent_analysis(research_area, model_name)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"outputs/patent_analysis/patent_analysis_{timestamp}.txt"
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(result)
-                st.success("Analysis completed!")
-                st.download_button("📄 Download Analysis Report", data=result, file_name=os.path.basename(filename))
-                
-                # Display each main point if result is structured, else fallback to text area
-                import re
-                sections = re.split(r"\n\s*\d+\.\s+\*\*", result)
-                if len(sections) > 1:
-                    # Print the introduction/summary
-                    st.markdown(sections[0].strip())
-                    # Print each numbered section
-                    for i, sec in enumerate(sections[1:], 1):
-                        sec = sec.strip()
-                        if sec:
-                            st.markdown(f"**{i}. {sec}")
+            events = queue.Queue()
+
+            def _analysis_worker():
+                # The page blocks on events.get(), so a final event is posted however the run ends
+                kind, output = "error", "The analysis stopped unexpectedly."
+                try:
+                    output = run_patent_analysis(
+                        research_area,
+                        model_name,
+                        on_step=lambda text: events.put(("step", text)),
+                        on_task=lambda index, name, output: events.put(("task", (index, name, output))),
+                        on_token=lambda chunk: events.put(("token", chunk)),
+                        delta=delta,
+                    )
+                    kind = "done"
+                except Exception as e:
+                    logging.exception("Analysis error")
+                    output = str(e)
+                finally:
+                    events.put((kind, output))
+
+            def _stream_until_boundary(pending):
+                # Yield tokens/steps until a task finishes or the run ends, then hand that event back
+                while True:
+                    kind, payload = events.get()
+                    if kind == "token":
+                        yield payload
+                    elif kind == "step":
+                        yield f"\n\n{payload}\n\n"
+                    else:
+                        pending.append((kind, payload))
+                        return
+
+            threading.Thread(target=_analysis_worker, daemon=True).start()
+            status = st.status("Analyzing patents...", expanded=True)
+            kind, result = "task", None
+            while kind == "task":
+                pending = []
+                with status:
+                    st.write_stream(_stream_until_boundary(pending))
+                kind, payload = pending[0]
+                if kind == "task":
+                    index, name, output = payload
+                    total = len(DELTA_TASK_NAMES) if name in DELTA_TASK_NAMES else len(TASK_NAMES)
+                    status.update(label=f"Completed {name} ({index + 1}/{total})")
+                    with st.expander(f"✅ {name}", expanded=False):
+                        st.markdown(output)
                 else:
-                    st.text_area("Analysis Summary", result, height=500)
+                    result = payload
+            if kind == "error":
+                status.update(label="Analysis failed", state="error", expanded=False)
+                st.error(f"Analysis failed: {result}")
+                st.stop()
+            status.update(label="Analysis finished", state="complete", expanded=False)
+
+            result = str(result)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"outputs/patent_analysis/patent_analysis_{timestamp}.txt"
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write(result)
+            st.success("Analysis completed!")
+            st.download_button("📄 Download Analysis Report", data=result, file_name=os.path.basename(filename))
+
+            # Display each main point if result is structured, else fallback to text area
+            import re
+            sections = re.split(r"\n\s*\d+\.\s+\*\*", result)
+            if len(sections) > 1:
+                # Print the introduction/summary
+                st.markdown(sections[0].strip())
+                # Print each numbered section
+                for i, sec in enumerate(sections[1:], 1):
+                    sec = sec.strip()
+                    if sec:
+                        st.markdown(f"**{i}. {sec}")
+            else:
+                st.text_area("Analysis Summary", result, height=500)
+elif page == "Patent Trends":
+    st.subheader("📈 Patent Trends")
+    import pandas as pd
+
+    # Precomputed at ingestion, so every filter change is a few indexed SQLite reads
+    rollups = get_trend_rollups()
+    sub_technologies = rollups.sub_technologies()
+    if not sub_technologies:
+        st.warning("No trend rollups yet. Ingest patents, or run 'python trend_rollups.py --rebuild' for an existing index.")
+    else:
+        granularity = st.radio("Granularity", ["year", "quarter"], horizontal=True)
+        sub_technology = st.selectbox(
+            "Sub-technology (CPC main group)", ["All"] + [f"{code} ({count})" for code, count in sub_technologies]
+        )
+        sub_technology = None if sub_technology == "All" else sub_technology.split(" ")[0]
+        top_assignees = rollups.top_assignees(sub_technology, limit=20)
+        assignee = st.selectbox("Assignee", ["All"] + [name for name, _ in top_assignees])
+        assignee = None if assignee == "All" else assignee
+
+        series = rollups.time_series(granularity, sub_technology, assignee)
+        if series:
+            st.markdown(f"**Patents per {granularity}** ({sum(count for _, count in series)} total)")
+            st.line_chart(pd.DataFrame({"patents": [count for _, count in series]}, index=[period for period, _ in series]))
+        else:
+            st.info("No dated patents for this selection.")
+
+        if not assignee:
+            st.markdown("**Top assignees**")
+            st.bar_chart(pd.DataFrame({"patents": [count for _, count in top_assignees[:10]]},
+                                      index=[name for name, _ in top_assignees[:10]]))
+            drift = [row for row in rollups.centroid_drift(granularity, sub_technology) if row["drift"] is not None]
+            if drift:
+                st.markdown("**Topic drift** (cosine distance of the mean patent embedding from the previous period)")
+                st.line_chart(pd.DataFrame({"drift": [row["drift"] for row in drift]}, index=[row["period"] for row in drift]))
+        st.caption(f"Rollups cover {rollups.stats()['documents']} patents.")
+
 elif page == "Search Patents":
     st.subheader("🔍 Search Patents")
     query = st.text_input("Enter search query:")
     search_type = st.selectbox("Search type", ["Keyword", "Semantic", "Hybrid"])
+    top_k = st.number_input("Maximum results", min_value=10, max_value=500, value=20, step=10)
+    with st.expander("Filters"):
+        date_range = st.date_input("Publication date range", value=(), help="Leave empty for all dates")
+        assignee = st.text_input("Assignee", placeholder="Samsung SDI")
+        jurisdiction = st.multiselect("Jurisdiction", ["US", "EP", "WO", "CN", "JP", "KR"])
     if st.button("Search") and query:
+        filters = {
+            "start_date": date_range[0].isoformat() if len(date_range) > 0 else None,
+            "end_date": date_range[1].isoformat() if len(date_range) > 1 else None,
+            "assignee": assignee or None,
+            "jurisdiction": tuple(jurisdiction) or None,
+        }
+        st.session_state["active_search"] = (search_type, query, int(top_k), filters)
+
+    # Results stay in session state, so paging reruns don't re-query OpenSearch
+    if st.session_state.get("active_search"):
+        search_type, active_query, active_top_k, active_filters = st.session_state["active_search"]
+        search = {"Keyword": keyword_search, "Semantic": semantic_search}.get(search_type, hybrid_search)
         try:
-            if search_type == "Keyword":
-                results = keyword_search(query)
-            elif search_type == "Semantic":
-                results = semantic_search(query)
-            else:
-                results = hybrid_search(query)
-
-            st.success(f"Found {len(results)} results")
-            for r in results:
-                src = r.get("_source", {})
-                st.markdown(f"**{src.get('title', 'No Title')}**")
-                st.markdown(f"- 📅 Date: {src.get('publication_date', 'N/A')}\n- 🆔 ID: {src.get('patent_id', 'N/A')}\n- 📄 Abstract: {src.get('abstract', '')}...")
-                st.markdown("---")
+            results = cached_search(
+                search_type, active_query, search, top_k=active_top_k, highlight_chars=SNIPPET_CHARS, **active_filters
+            )
+            render_results_page(results, "search")
         except Exception as e:
             logging.exception("Search error")
             st.error(f"Search error: {e}")
@@ -112,26 +294,35 @@ elif page == "Search Patents":
 elif page == "Iterative Exploration":
     st.subheader("🔁 Iterative Patent Exploration")
     query = st.text_input("Enter initial query:")
-    steps = st.number_input("Number of refinement steps", min_value=1, max_value=10, value=3)
+    mode = st.radio("Exploration mode", ["Query refinement", "Citation graph"], horizontal=True)
+    steps = st.number_input("Number of refinement steps / citation hops", min_value=1, max_value=10, value=3)
     if st.button("Explore") and query:
+        st.session_state["active_exploration"] = (mode, query, int(steps))
+
+    if st.session_state.get("active_exploration"):
+        active_mode, active_query, active_steps = st.session_state["active_exploration"]
         with st.spinner("Running iterative search..."):
             try:
-                results = iterative_search(query, refinement_steps=steps)
-                st.success(f"Found {len(results)} results")
-                for r in results:
-                    src = r.get("_source", {})
-                    st.markdown(f"**{src.get('title', 'No Title')}**")
-                    st.markdown(f"- 📅 Date: {src.get('publication_date', 'N/A')}\n- 🆔 ID: {src.get('patent_id', 'N/A')}\n- 📄 Abstract: {src.get('abstract', '')}...")
-                    st.markdown("---")
+                if active_mode == "Citation graph":
+                    results = cached_search("Citation graph", active_query, citation_graph_search, max_hops=active_steps)
+                else:
+                    results = cached_search(
+                        "Iterative", active_query, iterative_search, refinement_steps=active_steps, highlight_chars=SNIPPET_CHARS
+                    )
+                render_results_page(results, "iterative")
             except Exception as e:
                 logging.exception("Iterative exploration error")
                 st.error(f"Exploration error: {e}")
 
 elif page == "System Status":
     st.subheader("🛠 System Status")
+    if st.button("Refresh status"):
+        get_index_stats.clear()
+        get_ollama_tags.clear()
+        get_embedding_health.clear()
+
     try:
-        client = get_opensearch_client("localhost", 9200)
-        indices = client.cat.indices(format="json")
+        indices = get_index_stats()
         st.success("OpenSearch Connection: OK")
         for index in indices:
             st.markdown(f"- **{index['index']}**: {index['docs.count']} documents")
@@ -140,25 +331,40 @@ elif page == "System Status":
         st.error(f"OpenSearch Connection Failed: {e}")
 
     try:
-        response = requests.get("http://localhost:11434/api/tags")
-        if response.status_code == 200:
-            models = response.json().get("models", [])
-            st.success("Ollama Connection: OK")
-            st.markdown("**Available Models:**")
-            for m in models:
-                st.markdown(f"- {m.get('name', 'unknown')}")
-        else:
-            st.error(f"Ollama connection failed: {response.status_code}")
+        models = get_ollama_tags()
+        if not models:
+            raise ConnectionError("Ollama answered but has no models installed; pull one with 'ollama pull <model>'")
+        st.success("Ollama Connection: OK")
+        st.markdown("**Available Models:**")
+        for m in models:
+            st.markdown(f"- {m.get('name', 'unknown')}")
     except Exception as e:
         logging.exception("Ollama error")
         st.error(f"Ollama Connection Failed: {e}")
 
-    try:
-        emb = get_embedding("test")
-        st.success(f"Embedding Model: OK (dimension: {len(emb)})")
-    except Exception as e:
-        logging.exception("Embedding error")
-        st.error(f"Embedding Model Failed: {e}")
+    health = get_embedding_health()
+    if health["ok"]:
+        st.success(f"Embedding Model: OK (dimension: {health['dimension']})")
+    else:
+        st.error(f"Embedding Model Failed: {health['error']}")
+
+    scheduler_stats = get_embedding_scheduler().stats()
+    st.markdown(
+        f"**Embedding Queue:** {scheduler_stats['in_flight']} batches in flight, "
+        f"{scheduler_stats['batches']} sent (mean size {scheduler_stats['mean_batch_size']})"
+    )
+    for name, row in scheduler_stats["classes"].items():
+        st.markdown(
+            f"- **{name}**: {row['queue_depth']} queued, {row['completed']} done, {row['failed']} failed, "
+            f"wait p50 {row['wait_p50_ms']} ms / p95 {row['wait_p95_ms']} ms"
+        )
+
+    cache_stats = get_semantic_cache().stats()
+    st.markdown(
+        f"**Semantic Query Cache:** {cache_stats['entries']}/{cache_stats['capacity']} queries, "
+        f"hit rate {cache_stats['hit_rate']:.1%} ({cache_stats['exact_hits']} exact, {cache_stats['semantic_hits']} similar, "
+        f"{cache_stats['misses']} misses) at threshold {cache_stats['threshold']}"
+    )
 
 elif page == "Ollama Models":
     st.subheader("📦 Available Ollama Models")
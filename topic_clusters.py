@@ -0,0 +1,502 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from opensearch_client import PATENT_INDEX, get_shared_opensearch_client
+
+CLUSTER_DIR = os.getenv("PATENT_CLUSTER_DIR", "outputs/clusters")
+CLUSTER_COUNT = int(os.getenv("PATENT_CLUSTER_COUNT", 24))
+# Vectors per mini-batch step, and per chunk read from the memory-mapped matrix when assigning
+CLUSTER_BATCH_SIZE = int(os.getenv("PATENT_CLUSTER_BATCH_SIZE", 4096))
+# Patents nearest each centroid; their titles name the cluster
+LABEL_SAMPLE = 25
+LABEL_TERMS = 3
+REPRESENTATIVES = 5
+# Assignee counts kept per cluster
+MAX_ASSIGNEES = 50
+# Documents per bulk request when writing cluster ids back to the index
+WRITE_BATCH_SIZE = 1000
+
+_STOPWORDS = {
+    "and", "for", "the", "with", "method", "methods", "system", "systems", "device", "devices", "apparatus",
+    "same", "thereof", "using", "having", "based", "comprising", "improved", "use", "its", "from", "into",
+}
+
+
+def _model_dir(index_name):
+    return os.path.join(CLUSTER_DIR, index_name)
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class MiniBatchKMeans:
+    """
+    Spherical mini-batch k-means over unit-length embeddings.
+
+    Each step reads one random mini-batch from the (possibly memory-mapped)
+    matrix, so memory use depends on the batch size and not on the corpus.
+    Centroids move towards the batch means with a per-centroid learning rate
+    of 1 / (vectors assigned so far), as in Sculley's web-scale k-means.
+    """
+
+    def __init__(self, n_clusters=CLUSTER_COUNT, batch_size=CLUSTER_BATCH_SIZE, max_iter=300, tol=1e-5, seed=42):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+        self.tol = tol
+        self.seed = seed
+        self.centroids = None
+        self.n_iter = 0
+
+    def _sample(self, vectors, size, rng):
+        rows = np.unique(rng.integers(0, len(vectors), size=min(size, len(vectors))))
+        # Sorted row order turns the memory-mapped read into forward page reads
+        return np.asarray(vectors[rows], dtype=np.float32)
+
+    def _init_centroids(self, sample, k, rng):
+        # k-means++ seeding on a sample, with cosine distance
+        centroids = [sample[rng.integers(len(sample))]]
+        distance = np.maximum(1.0 - sample @ centroids[0], 0.0)
+        for _ in range(1, k):
+            weights = distance ** 2
+            total = float(weights.sum())
+            chosen = rng.choice(len(sample), p=weights / total) if total > 0 else rng.integers(len(sample))
+            centroids.append(sample[chosen])
+            distance = np.minimum(distance, np.maximum(1.0 - sample @ sample[chosen], 0.0))
+        return np.stack(centroids).astype(np.float32)
+
+    def fit(self, vectors):
+        """
+        Args:
+            vectors (np.ndarray): Unit-length embeddings, one per row; a memmap works.
+
+        Returns:
+            MiniBatchKMeans: self, with centroids set.
+        """
+        rng = np.random.default_rng(self.seed)
+        k = min(self.n_clusters, len(vectors))
+        self.centroids = self._init_centroids(self._sample(vectors, max(20 * k, self.batch_size), rng), k, rng)
+        assigned = np.zeros(k)
+        quiet_steps = 0
+        for step in range(self.max_iter):
+            batch = self._sample(vectors, self.batch_size, rng)
+            labels = np.argmax(batch @ self.centroids.T, axis=1)
+            # One-hot product sums every cluster's vectors in a single matrix multiply
+            one_hot = np.zeros((len(batch), k), dtype=np.float32)
+            one_hot[np.arange(len(batch)), labels] = 1.0
+            sums = one_hot.T @ batch
+            counts = one_hot.sum(axis=0)
+            assigned += counts
+
+            moved = counts > 0
+            rate = (counts[moved] / assigned[moved])[:, None]
+            previous = self.centroids.copy()
+            self.centroids[moved] = (1 - rate) * self.centroids[moved] + rate * sums[moved] / counts[moved, None]
+            self.centroids = _normalize(self.centroids).astype(np.float32)
+
+            shift = float(np.max(1.0 - np.sum(previous * self.centroids, axis=1)))
+            quiet_steps = quiet_steps + 1 if shift < self.tol else 0
+            if quiet_steps >= 10:
+                break
+        self.n_iter = step + 1
+        return self
+
+    def predict(self, vectors):
+        """Nearest centroid and cosine similarity to it for each row of an in-memory chunk."""
+        similarities = np.asarray(vectors, dtype=np.float32) @ self.centroids.T
+        labels = np.argmax(similarities, axis=1)
+        return labels, similarities[np.arange(len(labels)), labels]
+
+
+def export_embeddings(directory, page_size=1000):
+    """
+    Stream every embedding in the patent index into a memory-mapped matrix.
+
+    Writes vectors.npy (unit-length float32 rows), years.npy, assignees.npy
+    (index into assignee_names.json, -1 for none), ids.txt (one patent id
+    per row) and locations.txt (the concrete index and routing of each row,
+    for writing cluster ids back) to the directory.
+
+    Args:
+        directory (str): Output directory.
+        page_size (int): Hits per search request, and rows written at a time.
+
+    Returns:
+        int: Number of rows written.
+    """
+    from patent_search_tools import stream_search_hits
+
+    os.makedirs(directory, exist_ok=True)
+    client = get_shared_opensearch_client()
+    capacity = client.count(index=PATENT_INDEX)["count"]
+    years = np.zeros(capacity, dtype=np.int16)
+    assignees = np.full(capacity, -1, dtype=np.int32)
+    assignee_names = {}
+    vectors = None
+    rows = 0
+    pending = []
+
+    def flush():
+        block = _normalize(np.asarray(pending, dtype=np.float32))
+        vectors[rows - len(pending):rows] = block
+        pending.clear()
+
+    hits = stream_search_hits(
+        source_fields=["embedding", "publication_date", "assignees"], page_size=page_size, max_hits=capacity
+    )
+    with open(os.path.join(directory, "ids.txt"), "w", encoding="utf-8") as ids_file, \
+            open(os.path.join(directory, "locations.txt"), "w", encoding="utf-8") as locations_file:
+        for hit in hits:
+            source = hit["_source"]
+            embedding = source.get("embedding")
+            if not embedding:
+                continue
+            if vectors is None:
+                vectors = np.lib.format.open_memmap(
+                    os.path.join(directory, "vectors.npy"), mode="w+", dtype=np.float32, shape=(capacity, len(embedding))
+                )
+            year = str(source.get("publication_date") or "")[:4]
+            years[rows] = int(year) if year.isdigit() else 0
+            names = source.get("assignees") or []
+            if names:
+                assignees[rows] = assignee_names.setdefault(names[0], len(assignee_names))
+            ids_file.write(f"{hit['_id']}\n")
+            locations_file.write(f"{hit.get('_index', PATENT_INDEX)}\t{hit.get('_routing') or ''}\n")
+            pending.append(embedding)
+            rows += 1
+            if len(pending) >= page_size:
+                flush()
+    if pending:
+        flush()
+    if vectors is not None:
+        vectors.flush()
+    np.save(os.path.join(directory, "years.npy"), years[:rows])
+    np.save(os.path.join(directory, "assignees.npy"), assignees[:rows])
+    with open(os.path.join(directory, "assignee_names.json"), "w", encoding="utf-8") as f:
+        json.dump(sorted(assignee_names, key=assignee_names.get), f)
+    return rows
+
+
+def label_clusters(titles_by_cluster, terms=LABEL_TERMS):
+    """
+    Name each cluster after the title words of its most central patents.
+
+    Words are weighted down by the number of clusters they appear in, so
+    words common to the whole corpus ("battery", "lithium") do not win.
+
+    Args:
+        titles_by_cluster (dict): cluster id -> titles of the patents nearest its centroid.
+        terms (int): Words per label.
+
+    Returns:
+        dict: cluster id -> label such as 'silicon / anode / binder'.
+    """
+    counts = {
+        cluster_id: Counter(
+            word for title in titles for word in re.findall(r"[a-z][a-z\-]{2,}", (title or "").lower())
+            if word not in _STOPWORDS
+        )
+        for cluster_id, titles in titles_by_cluster.items()
+    }
+    spread = Counter(word for words in counts.values() for word in words)
+    labels = {}
+    for cluster_id, words in counts.items():
+        ranked = sorted(words, key=lambda word: (-words[word] / spread[word], -words[word], word))
+        labels[cluster_id] = " / ".join(ranked[:terms]) or f"cluster {cluster_id}"
+    return labels
+
+
+class ClusterModel:
+    """
+    Centroids and per-cluster statistics of a clustered index.
+
+    New patents are assigned to the nearest centroid at ingestion, so the
+    index and the statistics stay current between full clustering runs.
+    Centroids themselves only move when build_topic_clusters runs again.
+    """
+
+    def __init__(self, index_name, centroids, clusters, meta=None):
+        self.index_name = index_name
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.clusters = clusters
+        self.meta = meta or {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, index_name):
+        directory = _model_dir(index_name)
+        with open(os.path.join(directory, "clusters.json"), encoding="utf-8") as f:
+            payload = json.load(f)
+        return cls(index_name, np.load(os.path.join(directory, "centroids.npy")), payload["clusters"], payload["meta"])
+
+    def save(self):
+        directory = _model_dir(self.index_name)
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "centroids.npy"), self.centroids)
+        # Written to a temporary file first so readers never see a half-written model
+        path = os.path.join(directory, "clusters.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"meta": self.meta, "clusters": self.clusters}, f)
+        os.replace(path + ".tmp", path)
+
+    @property
+    def dimension(self):
+        return self.centroids.shape[1]
+
+    def label(self, cluster_id):
+        return self.clusters[cluster_id]["label"]
+
+    def assign(self, embeddings):
+        """
+        Args:
+            embeddings (list): Document embeddings in the index's format.
+
+        Returns:
+            tuple: (cluster ids, cosine similarities to the assigned centroids) as arrays.
+        """
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        similarities = vectors @ self.centroids.T
+        labels = np.argmax(similarities, axis=1)
+        return labels, similarities[np.arange(len(labels)), labels]
+
+    def assign_patents(self, patents):
+        """
+        Set cluster_id and cluster_label on patents about to be indexed and count them in the statistics.
+
+        Args:
+            patents (list): Patent documents with embeddings.
+
+        Returns:
+            int: Number of patents assigned; 0 if their embedding format does not match the model.
+        """
+        patents = [patent for patent in patents if patent.get("embedding") is not None]
+        if not patents or len(patents[0]["embedding"]) != self.dimension:
+            return 0
+        labels, _ = self.assign([patent["embedding"] for patent in patents])
+        with self._lock:
+            for patent, cluster_id in zip(patents, labels.tolist()):
+                cluster = self.clusters[cluster_id]
+                patent["cluster_id"] = cluster_id
+                patent["cluster_label"] = cluster["label"]
+                cluster["size"] += 1
+                year = str(patent.get("publication_date") or "")[:4]
+                if year.isdigit():
+                    cluster["years"][year] = cluster["years"].get(year, 0) + 1
+                for name in (patent.get("assignees") or [])[:1]:
+                    cluster["assignees"][name] = cluster["assignees"].get(name, 0) + 1
+                if len(cluster["assignees"]) > MAX_ASSIGNEES:
+                    cluster["assignees"] = dict(Counter(cluster["assignees"]).most_common(MAX_ASSIGNEES))
+            self.meta["assigned_since_build"] = self.meta.get("assigned_since_build", 0) + len(patents)
+            self.save()
+        return len(patents)
+
+    def recent_share(self, cluster, recent_years=3):
+        """Share of a cluster's dated patents published in the last recent_years years of the corpus."""
+        latest = self.meta.get("latest_year") or 0
+        dated = sum(cluster["years"].values())
+        recent = sum(count for year, count in cluster["years"].items() if int(year) > latest - recent_years)
+        return recent / dated if dated else 0.0
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def remove_cluster_model(index_name=PATENT_INDEX):
+    """Delete an index's clustering model and working files, e.g. when the index is recreated."""
+    with _models_lock:
+        _models.pop(index_name, None)
+        shutil.rmtree(_model_dir(index_name), ignore_errors=True)
+
+
+def get_cluster_model(index_name=PATENT_INDEX):
+    """
+    The clustering model of an index, or None if build_topic_clusters has not run for it.
+
+    Reloaded when another process saves a newer model.
+    """
+    path = os.path.join(_model_dir(index_name), "clusters.json")
+    try:
+        modified = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _models_lock:
+        cached = _models.get(index_name)
+        if cached is None or cached[0] != modified:
+            cached = (modified, ClusterModel.load(index_name))
+            _models[index_name] = cached
+        return cached[1]
+
+
+def _nearest_rows(best_rows, best_similarities, labels, similarities, offset):
+    """Fold one chunk's rows into the running LABEL_SAMPLE nearest rows per cluster."""
+    for cluster_id in np.unique(labels):
+        members = np.flatnonzero(labels == cluster_id)
+        candidates_rows = np.concatenate([best_rows[cluster_id], members + offset])
+        candidates = np.concatenate([best_similarities[cluster_id], similarities[members]])
+        keep = np.argsort(-candidates)[:LABEL_SAMPLE]
+        best_rows[cluster_id], best_similarities[cluster_id] = candidates_rows[keep], candidates[keep]
+
+
+def _read_ids(path, rows):
+    """Patent ids at the given row numbers of ids.txt."""
+    wanted = set(rows)
+    with open(path, encoding="utf-8") as f:
+        return {row: line.rstrip("\n") for row, line in enumerate(f) if row in wanted}
+
+
+def _write_back(client, work_dir, labels, model):
+    from semantic_cache import mark_index_updated
+
+    written = 0
+    with open(os.path.join(work_dir, "ids.txt"), encoding="utf-8") as f, \
+            open(os.path.join(work_dir, "locations.txt"), encoding="utf-8") as locations:
+        actions = []
+        for row, (line, location) in enumerate(zip(f, locations)):
+            cluster_id = int(labels[row])
+            # Area indices and routed shards are addressed explicitly; the alias or index name alone may not reach them
+            index, routing = location.rstrip("\n").split("\t")
+            action = {"_index": index, "_id": line.rstrip("\n")}
+            if routing:
+                action["routing"] = routing
+            actions.append({"update": action})
+            actions.append({"doc": {"cluster_id": cluster_id, "cluster_label": model.label(cluster_id)}})
+            if len(actions) >= 2 * WRITE_BATCH_SIZE:
+                client.bulk(body=actions)
+                written += len(actions) // 2
+                actions = []
+        if actions:
+            client.bulk(body=actions)
+            written += len(actions) // 2
+    mark_index_updated(client, PATENT_INDEX)
+    return written
+
+
+def build_topic_clusters(n_clusters=CLUSTER_COUNT, batch_size=CLUSTER_BATCH_SIZE, max_iter=300, seed=42, write_back=True):
+    """
+    Cluster every patent embedding in the index and store the model.
+
+    The embeddings are streamed into a memory-mapped matrix, then k-means,
+    assignment and statistics each read it in chunks of batch_size rows, so
+    peak memory stays at a few chunks regardless of the corpus size.
+
+    Args:
+        n_clusters (int): Number of clusters.
+        batch_size (int): Rows per mini-batch and per assignment chunk.
+        max_iter (int): Maximum mini-batch steps.
+        seed (int): Random seed for sampling and initialization.
+        write_back (bool): Store cluster_id and cluster_label on every document.
+
+    Returns:
+        ClusterModel: The saved model.
+    """
+    from patent_search_tools import fetch_patents
+
+    client = get_shared_opensearch_client()
+    work_dir = os.path.join(_model_dir(PATENT_INDEX), "work")
+    started = time.perf_counter()
+    rows = export_embeddings(work_dir)
+    if rows == 0:
+        raise ValueError(f"Index '{PATENT_INDEX}' has no embeddings to cluster.")
+    vectors = np.load(os.path.join(work_dir, "vectors.npy"), mmap_mode="r")[:rows]
+    exported = time.perf_counter()
+
+    kmeans = MiniBatchKMeans(n_clusters, batch_size, max_iter, seed=seed).fit(vectors)
+    k = len(kmeans.centroids)
+    labels = np.lib.format.open_memmap(os.path.join(work_dir, "labels.npy"), mode="w+", dtype=np.int32, shape=(rows,))
+    best_rows = [np.empty(0, dtype=np.int64)] * k
+    best_similarities = [np.empty(0, dtype=np.float32)] * k
+    for start in range(0, rows, batch_size):
+        chunk_labels, similarities = kmeans.predict(vectors[start:start + batch_size])
+        labels[start:start + len(chunk_labels)] = chunk_labels
+        _nearest_rows(best_rows, best_similarities, chunk_labels, similarities, start)
+    labels.flush()
+    fitted = time.perf_counter()
+
+    # Per-cluster counts by year and by assignee, from one pass over compact integer arrays
+    years = np.load(os.path.join(work_dir, "years.npy"))
+    assignees = np.load(os.path.join(work_dir, "assignees.npy"))
+    with open(os.path.join(work_dir, "assignee_names.json"), encoding="utf-8") as f:
+        assignee_names = json.load(f)
+    sizes = np.bincount(labels, minlength=k)
+    year_counts = [dict() for _ in range(k)]
+    pairs, counts = np.unique(labels.astype(np.int64) * 10000 + years, return_counts=True)
+    for pair, count in zip(pairs.tolist(), counts.tolist()):
+        if pair % 10000:
+            year_counts[pair // 10000][str(pair % 10000)] = count
+    assignee_counts = [Counter() for _ in range(k)]
+    named = assignees >= 0
+    vocabulary = max(len(assignee_names), 1)
+    pairs, counts = np.unique(labels[named].astype(np.int64) * vocabulary + assignees[named], return_counts=True)
+    for pair, count in zip(pairs.tolist(), counts.tolist()):
+        assignee_counts[pair // vocabulary][assignee_names[pair % vocabulary]] = count
+
+    central_rows = {int(row) for cluster_rows in best_rows for row in cluster_rows}
+    ids = _read_ids(os.path.join(work_dir, "ids.txt"), central_rows)
+    titles = {
+        patent_id: source.get("title")
+        for patent_id, source in fetch_patents(list(ids.values()), source_fields=["title"]).items()
+    }
+    names = label_clusters({
+        cluster_id: [titles.get(ids[int(row)]) for row in best_rows[cluster_id]] for cluster_id in range(k)
+    })
+
+    clusters = [
+        {
+            "cluster_id": cluster_id,
+            "label": names[cluster_id],
+            "size": int(sizes[cluster_id]),
+            "years": year_counts[cluster_id],
+            "assignees": dict(assignee_counts[cluster_id].most_common(MAX_ASSIGNEES)),
+            "representatives": [
+                {"patent_id": ids[int(row)], "title": titles.get(ids[int(row)])}
+                for row in best_rows[cluster_id][:REPRESENTATIVES]
+            ],
+        }
+        for cluster_id in range(k)
+    ]
+    dated_years = years[years > 0]
+    model = ClusterModel(PATENT_INDEX, kmeans.centroids, clusters, {
+        "documents": rows,
+        "n_clusters": k,
+        "iterations": kmeans.n_iter,
+        "latest_year": int(dated_years.max()) if len(dated_years) else None,
+        "built_at": time.time(),
+        "assigned_since_build": 0,
+    })
+    model.save()
+    if write_back:
+        _write_back(client, work_dir, labels, model)
+    model.meta["timings_s"] = {
+        "export": round(exported - started, 2),
+        "fit_and_assign": round(fitted - exported, 2),
+        "label_and_write": round(time.perf_counter() - fitted, 2),
+    }
+    model.save()
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster the patent index into topics and write the cluster ids back.")
+    parser.add_argument("--clusters", type=int, default=CLUSTER_COUNT)
+    parser.add_argument("--batch-size", type=int, default=CLUSTER_BATCH_SIZE)
+    parser.add_argument("--max-iter", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-write-back", action="store_true", help="Only save the model; leave the documents as they are.")
+    args = parser.parse_args()
+
+    model = build_topic_clusters(args.clusters, args.batch_size, args.max_iter, args.seed, not args.no_write_back)
+    print(f"✅ Clustered {model.meta['documents']} patents into {model.meta['n_clusters']} topics "
+          f"({model.meta['iterations']} mini-batch steps, {model.meta['timings_s']})")
+    for cluster in sorted(model.clusters, key=lambda c: -c["size"]):
+        print(f"   {cluster['cluster_id']:>3} {cluster['size']:>8}  {cluster['label']}")
@@ -0,0 +1,221 @@
+import contextvars
+import functools
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+TRACE_DIR = "outputs/traces"
+
+# Spans kept in memory for the summary report, newest last
+MAX_BUFFERED_SPANS = 20000
+
+_enabled = os.getenv("PATENT_TRACE", "").lower() in ("1", "true", "yes")
+_trace_file = os.getenv("PATENT_TRACE_FILE")
+_buffer = deque(maxlen=MAX_BUFFERED_SPANS)
+_write_lock = threading.Lock()
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def enable_tracing(trace_file=None):
+    """
+    Turn tracing on for this process.
+
+    Args:
+        trace_file (str): JSONL file to append finished spans to; defaults to a timestamped file in outputs/traces.
+
+    Returns:
+        str: Path of the trace file.
+    """
+    global _enabled, _trace_file
+    _enabled = True
+    if trace_file is None and _trace_file is None:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        trace_file = os.path.join(TRACE_DIR, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.jsonl")
+    if trace_file is not None:
+        _trace_file = trace_file
+    return _trace_file
+
+
+def tracing_enabled():
+    return _enabled
+
+
+def payload_size(obj):
+    """Approximate serialized size of a payload in bytes."""
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    return len(json.dumps(obj, default=str))
+
+
+def _export(span):
+    _buffer.append(span)
+    if _trace_file:
+        with _write_lock:
+            with open(_trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(span, default=str) + "\n")
+
+
+def _new_span(name, attributes, start_ns):
+    parent = _current_span.get()
+    return {
+        "name": name,
+        "trace_id": parent["trace_id"] if parent else secrets.token_hex(16),
+        "span_id": secrets.token_hex(8),
+        "parent_span_id": parent["span_id"] if parent else None,
+        "start_time_unix_nano": start_ns,
+        "end_time_unix_nano": None,
+        "attributes": dict(attributes),
+        "status": "OK",
+    }
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Time a block of work as a span (OpenTelemetry field names) and export it when it ends.
+
+    Args:
+        name (str): Stage name, e.g. 'embedding' or 'search.hybrid'.
+        **attributes: Initial span attributes.
+
+    Yields:
+        dict: The span's attribute dict, so the block can record sizes, counts and cache hits;
+        None when tracing is disabled.
+    """
+    if not _enabled:
+        yield None
+        return
+
+    current = _new_span(name, attributes, time.time_ns())
+    token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current["attributes"]
+    except BaseException as e:
+        current["status"] = "ERROR"
+        current["attributes"]["error"] = repr(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current["duration_ms"] = (time.perf_counter() - started) * 1000
+        current["end_time_unix_nano"] = current["start_time_unix_nano"] + int(current["duration_ms"] * 1e6)
+        _export(current)
+
+
+def traced(name, result_attributes=None):
+    """
+    Decorator wrapping every call of a function in a span.
+
+    Args:
+        name (str): Stage name for the span.
+        result_attributes (callable): Optional function mapping the return value to extra attributes.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with span(name) as attributes:
+                result = func(*args, **kwargs)
+                if result_attributes is not None:
+                    attributes.update(result_attributes(result))
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def set_span_attribute(key, value):
+    """Set an attribute on the innermost active span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current["attributes"][key] = value
+
+
+def record_span(name, start_time, end_time, **attributes):
+    """
+    Export a span for work timed elsewhere, such as a crew task reported through a callback.
+
+    Args:
+        name (str): Stage name.
+        start_time (float): Start as a time.time() timestamp.
+        end_time (float): End as a time.time() timestamp.
+        **attributes: Span attributes.
+    """
+    if not _enabled:
+        return
+    recorded = _new_span(name, attributes, int(start_time * 1e9))
+    recorded["end_time_unix_nano"] = int(end_time * 1e9)
+    recorded["duration_ms"] = (end_time - start_time) * 1000
+    _export(recorded)
+
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of an ascending list; fraction is between 0 and 1."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(spans=None):
+    """
+    Aggregate span durations per stage.
+
+    Args:
+        spans (iterable): Spans to summarize; defaults to the in-memory buffer.
+
+    Returns:
+        dict: Stage name mapped to count, p50/p95/max/total milliseconds and cache hit count.
+    """
+    durations = defaultdict(list)
+    cache_hits = defaultdict(int)
+    for recorded in _buffer if spans is None else spans:
+        durations[recorded["name"]].append(recorded["duration_ms"])
+        if recorded.get("attributes", {}).get("cache_hit"):
+            cache_hits[recorded["name"]] += 1
+
+    summary = {}
+    for name, values in sorted(durations.items()):
+        values.sort()
+        summary[name] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50), 2),
+            "p95_ms": round(percentile(values, 0.95), 2),
+            "max_ms": round(values[-1], 2),
+            "total_ms": round(sum(values), 2),
+            "cache_hits": cache_hits[name],
+        }
+    return summary
+
+
+def load_trace_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def print_summary(summary=None):
+    summary = summarize() if summary is None else summary
+    print(f"{'Stage':<40}{'Count':>8}{'p50 ms':>12}{'p95 ms':>12}{'Max ms':>12}{'Hits':>8}")
+    print("-" * 92)
+    for name, stats in summary.items():
+        print(
+            f"{name:<40}{stats['count']:>8}{stats['p50_ms']:>12.1f}"
+            f"{stats['p95_ms']:>12.1f}{stats['max_ms']:>12.1f}{stats['cache_hits']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python tracing.py <trace_file.jsonl>")
+        sys.exit(1)
+    print_summary(summarize(load_trace_file(sys.argv[1])))
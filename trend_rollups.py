@@ -0,0 +1,382 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from opensearch_client import PATENT_INDEX
+
+# One SQLite file per index, so benchmark and production rollups never mix
+ROLLUP_DIR = os.getenv("PATENT_ROLLUP_DIR", "outputs/rollups")
+GRANULARITIES = ("year", "quarter")
+# Bucket value meaning "all sub-technologies" or "all assignees"
+ALL = "*"
+UNKNOWN_PERIOD = "unknown"
+UNCLASSIFIED = "unclassified"
+# Documents read per query when loading their previous contribution
+_LOOKUP_BATCH = 500
+
+
+def period_of(publication_date, granularity="year"):
+    """
+    Bucket a publication date.
+
+    Args:
+        publication_date (str): Date as stored in the index, e.g. '2021-03-04'.
+        granularity (str): 'year' or 'quarter'.
+
+    Returns:
+        str: '2021' or '2021-Q1', or UNKNOWN_PERIOD if the date cannot be read.
+    """
+    text = str(publication_date or "")
+    if len(text) < 4 or not text[:4].isdigit():
+        return UNKNOWN_PERIOD
+    if granularity == "year":
+        return text[:4]
+    month = text[5:7]
+    if not month.isdigit() or not 1 <= int(month) <= 12:
+        return UNKNOWN_PERIOD
+    return f"{text[:4]}-Q{(int(month) - 1) // 3 + 1}"
+
+
+def _record(patent):
+    """The fields of an indexed patent that the rollups depend on."""
+    embedding = patent.get("embedding")
+    return {
+        "publication_date": patent.get("publication_date"),
+        "sub_technologies": sorted(set(patent.get("cpc_groups") or [])) or [UNCLASSIFIED],
+        "assignees": sorted({a for a in patent.get("assignees") or [] if a}),
+        "embedding": None if embedding is None else np.asarray(embedding, dtype=np.float32),
+    }
+
+
+class TrendRollups:
+    """
+    Patent counts and embedding centroids per publication period, kept up to date at ingestion.
+
+    Counts are kept per period x sub-technology (CPC main group) x assignee,
+    with ALL rows for the marginals, so a time series for any combination is
+    a single indexed read instead of a scan of the index. Centroids (running
+    sums of the document embeddings) are kept per period x sub-technology.
+
+    Every document's last contribution is stored alongside, so re-ingesting
+    a patent moves it between buckets and deleting it removes it exactly.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rollup_docs (
+                patent_id TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                embedding BLOB
+            );
+            CREATE TABLE IF NOT EXISTS rollup_counts (
+                granularity TEXT NOT NULL,
+                period TEXT NOT NULL,
+                sub_technology TEXT NOT NULL,
+                assignee TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (granularity, sub_technology, assignee, period)
+            );
+            CREATE TABLE IF NOT EXISTS rollup_centroids (
+                granularity TEXT NOT NULL,
+                period TEXT NOT NULL,
+                sub_technology TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                vector_sum BLOB NOT NULL,
+                PRIMARY KEY (granularity, sub_technology, period)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def upsert(self, patents):
+        """
+        Add patents to the rollups, replacing the contribution of any already counted.
+
+        Args:
+            patents (list): Indexed patent documents with patent_id, publication_date,
+                assignees, cpc_groups and embedding.
+        """
+        records = {patent["patent_id"]: _record(patent) for patent in patents if patent.get("patent_id")}
+        self._apply(records)
+
+    def delete(self, patent_ids):
+        """Remove patents from the rollups; ids that were never counted are ignored."""
+        self._apply({patent_id: None for patent_id in patent_ids})
+
+    def _apply(self, records):
+        if not records:
+            return
+        counts = Counter()
+        centroids = defaultdict(lambda: [0, None])
+        with self._lock, self._conn:
+            previous = self._load_records(list(records))
+            for patent_id, record in records.items():
+                if patent_id in previous:
+                    self._accumulate(previous[patent_id], -1, counts, centroids)
+                if record is not None:
+                    self._accumulate(record, 1, counts, centroids)
+
+            self._conn.executemany(
+                "DELETE FROM rollup_docs WHERE patent_id = ?",
+                [(patent_id,) for patent_id, record in records.items() if record is None],
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rollup_docs (patent_id, record, embedding) VALUES (?, ?, ?)",
+                [
+                    (patent_id, json.dumps({k: v for k, v in record.items() if k != "embedding"}),
+                     None if record["embedding"] is None else record["embedding"].tobytes())
+                    for patent_id, record in records.items() if record is not None
+                ],
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO rollup_counts (granularity, period, sub_technology, assignee, count) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (granularity, sub_technology, assignee, period) DO UPDATE SET count = count + excluded.count
+                """,
+                [(*key, delta) for key, delta in counts.items() if delta],
+            )
+            self._conn.execute("DELETE FROM rollup_counts WHERE count <= 0")
+            for key, (delta, vector_delta) in centroids.items():
+                self._apply_centroid(key, delta, vector_delta)
+
+    def _load_records(self, patent_ids):
+        records = {}
+        for start in range(0, len(patent_ids), _LOOKUP_BATCH):
+            batch = patent_ids[start:start + _LOOKUP_BATCH]
+            rows = self._conn.execute(
+                f"SELECT patent_id, record, embedding FROM rollup_docs WHERE patent_id IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            for patent_id, record, embedding in rows:
+                record = json.loads(record)
+                record["embedding"] = None if embedding is None else np.frombuffer(embedding, dtype=np.float32)
+                records[patent_id] = record
+        return records
+
+    @staticmethod
+    def _accumulate(record, sign, counts, centroids):
+        sub_technologies = [ALL] + record["sub_technologies"]
+        assignees = [ALL] + record["assignees"]
+        embedding = record["embedding"]
+        for granularity in GRANULARITIES:
+            period = period_of(record["publication_date"], granularity)
+            for sub_technology in sub_technologies:
+                for assignee in assignees:
+                    counts[(granularity, period, sub_technology, assignee)] += sign
+                if embedding is not None:
+                    centroid = centroids[(granularity, period, sub_technology)]
+                    centroid[0] += sign
+                    centroid[1] = sign * embedding.astype(np.float64) if centroid[1] is None else centroid[1] + sign * embedding
+
+    def _apply_centroid(self, key, delta, vector_delta):
+        if vector_delta is None:
+            return
+        row = self._conn.execute(
+            "SELECT count, vector_sum FROM rollup_centroids WHERE granularity = ? AND period = ? AND sub_technology = ?", key
+        ).fetchone()
+        count, vector_sum = delta, vector_delta
+        if row is not None:
+            stored = np.frombuffer(row[1], dtype=np.float64)
+            if len(stored) != len(vector_delta):
+                raise ValueError(
+                    f"Rollup centroids in '{self.path}' have dimension {len(stored)}, new embeddings have "
+                    f"{len(vector_delta)}. Rebuild them with 'python trend_rollups.py --rebuild'."
+                )
+            count, vector_sum = row[0] + delta, stored + vector_delta
+        if count <= 0:
+            self._conn.execute(
+                "DELETE FROM rollup_centroids WHERE granularity = ? AND period = ? AND sub_technology = ?", key
+            )
+        else:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rollup_centroids (granularity, period, sub_technology, count, vector_sum) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, count, vector_sum.tobytes()),
+            )
+
+    def time_series(self, granularity="year", sub_technology=None, assignee=None):
+        """
+        Patents per period, oldest first.
+
+        Args:
+            granularity (str): 'year' or 'quarter'.
+            sub_technology (str): CPC main group such as 'H01M10'; None for all.
+            assignee (str): Assignee name, matched case-insensitively; None for all.
+
+        Returns:
+            list: (period, count) tuples. Undated patents are left out.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT period, SUM(count) FROM rollup_counts
+                WHERE granularity = ? AND sub_technology = ? AND assignee = ? COLLATE NOCASE AND period != ?
+                GROUP BY period ORDER BY period
+                """,
+                (granularity, sub_technology or ALL, assignee or ALL, UNKNOWN_PERIOD),
+            ).fetchall()
+        return [(period, count) for period, count in rows]
+
+    def top_assignees(self, sub_technology=None, start_year=None, end_year=None, limit=10):
+        """
+        Assignees with the most patents.
+
+        Args:
+            sub_technology (str): Restrict to one CPC main group; None for all.
+            start_year (str): First publication year counted, inclusive.
+            end_year (str): Last publication year counted, inclusive.
+            limit (int): Number of assignees returned.
+
+        Returns:
+            list: (assignee, count) tuples, largest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT assignee, SUM(count) AS total FROM rollup_counts
+                WHERE granularity = 'year' AND sub_technology = ? AND assignee != ? AND period BETWEEN ? AND ?
+                GROUP BY assignee ORDER BY total DESC, assignee LIMIT ?
+                """,
+                (sub_technology or ALL, ALL, str(start_year or "0000"), str(end_year or "9999"), limit),
+            ).fetchall()
+        return [(assignee, total) for assignee, total in rows]
+
+    def sub_technologies(self, limit=None):
+        """
+        Sub-technologies (CPC main groups) by patent count.
+
+        A patent classified in several groups is counted in each of them.
+
+        Returns:
+            list: (sub_technology, count) tuples, largest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT sub_technology, SUM(count) AS total FROM rollup_counts
+                WHERE granularity = 'year' AND assignee = ? AND sub_technology != ?
+                GROUP BY sub_technology ORDER BY total DESC, sub_technology LIMIT ?
+                """,
+                (ALL, ALL, -1 if limit is None else limit),
+            ).fetchall()
+        return [(sub_technology, total) for sub_technology, total in rows]
+
+    def centroids(self, granularity="year", sub_technology=None):
+        """
+        Mean embedding per period.
+
+        Returns:
+            list: (period, count, unit-length centroid) tuples, oldest first.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT period, count, vector_sum FROM rollup_centroids
+                WHERE granularity = ? AND sub_technology = ? AND period != ? ORDER BY period
+                """,
+                (granularity, sub_technology or ALL, UNKNOWN_PERIOD),
+            ).fetchall()
+        result = []
+        for period, count, vector_sum in rows:
+            centroid = np.frombuffer(vector_sum, dtype=np.float64) / count
+            result.append((period, count, centroid / max(float(np.linalg.norm(centroid)), 1e-12)))
+        return result
+
+    def centroid_drift(self, granularity="year", sub_technology=None):
+        """
+        How far the average patent moved in embedding space from one period to the next.
+
+        Returns:
+            list: dicts with period, count and drift (cosine distance to the
+            previous period's centroid; None for the first period).
+        """
+        drift = []
+        previous = None
+        for period, count, centroid in self.centroids(granularity, sub_technology):
+            distance = None if previous is None else round(1.0 - float(previous @ centroid), 6)
+            drift.append({"period": period, "count": count, "drift": distance})
+            previous = centroid
+        return drift
+
+    def stats(self):
+        with self._lock:
+            docs = self._conn.execute("SELECT COUNT(*) FROM rollup_docs").fetchone()[0]
+            count_rows = self._conn.execute("SELECT COUNT(*) FROM rollup_counts").fetchone()[0]
+            centroid_rows = self._conn.execute("SELECT COUNT(*) FROM rollup_centroids").fetchone()[0]
+        return {"documents": docs, "count_buckets": count_rows, "centroid_buckets": centroid_rows}
+
+    def clear(self):
+        with self._lock, self._conn:
+            for table in ("rollup_docs", "rollup_counts", "rollup_centroids"):
+                self._conn.execute(f"DELETE FROM {table}")
+
+
+_rollups = {}
+_rollups_lock = threading.Lock()
+
+
+def get_trend_rollups(index_name=PATENT_INDEX):
+    """Return the rollup store for an index, opening it on first use."""
+    with _rollups_lock:
+        if index_name not in _rollups:
+            _rollups[index_name] = TrendRollups(os.path.join(ROLLUP_DIR, f"{index_name}.sqlite3"))
+        return _rollups[index_name]
+
+
+def rebuild_trend_rollups(batch_size=500):
+    """
+    Recompute the rollups of the patent index from scratch by streaming every document.
+
+    Needed once for indices populated before rollups existed, or after the
+    embedding format changes.
+
+    Args:
+        batch_size (int): Documents applied per transaction.
+
+    Returns:
+        int: Number of documents counted.
+    """
+    from patent_search_tools import stream_search_hits
+
+    rollups = get_trend_rollups(PATENT_INDEX)
+    rollups.clear()
+    fields = ["patent_id", "publication_date", "assignees", "cpc_groups", "embedding"]
+    batch = []
+    total = 0
+    for hit in stream_search_hits(source_fields=fields, page_size=batch_size):
+        batch.append({"patent_id": hit["_id"], **hit["_source"]})
+        if len(batch) >= batch_size:
+            rollups.upsert(batch)
+            total += len(batch)
+            batch = []
+    rollups.upsert(batch)
+    return total + len(batch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the patent trend rollups.")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the rollups from every document in the index.")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="year")
+    parser.add_argument("--sub-technology", default=None, help="CPC main group, e.g. H01M10.")
+    parser.add_argument("--assignee", default=None)
+    args = parser.parse_args()
+
+    if args.rebuild:
+        print(f"✅ Rebuilt rollups for '{PATENT_INDEX}' from {rebuild_trend_rollups()} patents.")
+    rollups = get_trend_rollups(PATENT_INDEX)
+    print(f"📊 {rollups.stats()}")
+    for period, count in rollups.time_series(args.granularity, args.sub_technology, args.assignee):
+        print(f"   {period}: {count}")